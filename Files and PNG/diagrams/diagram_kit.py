@@ -0,0 +1,136 @@
+"""
+Shared drawing primitives for the Stickly architecture diagrams.
+
+A diagram spec is a JSON document:
+
+    {
+        "title": "...",
+        "output": "stickly_app_architecture.png",
+        "figsize": [20, 14], "xlim": [0, 20], "ylim": [0, 14],
+        "dpi": 300,
+        "palette": {"frontend": "#E34F26", ...},
+        "defaults": {"box": {"size": 8}, "arrow": {"width": 2.5}},
+        "elements": [
+            {"type": "box", "x": 0.5, "y": 9, "w": 2.3, "h": 0.6, "text": "HTML/CSS\\nUI", "color": "frontend"},
+            {"type": "arrow", "start": [10, 11], "end": [10, 10.6], "label": "User Actions"},
+            ...
+        ]
+    }
+
+Element keys are the keyword arguments of the matching function below.
+Any colour may name a palette entry instead of a hex value.
+"""
+
+DEFAULT_DPI = 300
+EDGE_COLOR = '#2C3E50'
+COLOR_KEYS = ('color', 'edge', 'face')
+
+
+def box(ax, x, y, w, h, text, color, size=9, pad=0.08, text_color='white'):
+    """Filled rounded box with centred bold text."""
+    from matplotlib.patches import FancyBboxPatch
+
+    ax.add_patch(FancyBboxPatch((x, y), w, h, boxstyle=f'round,pad={pad}',
+                                facecolor=color, edgecolor=EDGE_COLOR, linewidth=2, alpha=0.9))
+    ax.text(x + w / 2, y + h / 2, text, ha='center', va='center',
+            fontsize=size, fontweight='bold', color=text_color, wrap=True)
+
+
+def arrow(ax, start, end, label='', color=EDGE_COLOR, style='solid', width=2.5,
+          head=0.25, label_size=8, label_offset=(0, 0.15), label_pad=0.25):
+    """Arrow from `start` to `end` with an optional label at its midpoint."""
+    from matplotlib.patches import FancyArrowPatch
+
+    (x1, y1), (x2, y2) = start, end
+    ax.add_patch(FancyArrowPatch((x1, y1), (x2, y2),
+                                 arrowstyle=f'->,head_width={head},head_length={head}',
+                                 linestyle=style, color=color, linewidth=width, alpha=0.8))
+    if label:
+        ax.text((x1 + x2) / 2 + label_offset[0], (y1 + y2) / 2 + label_offset[1], label,
+                ha='center', va='bottom', fontsize=label_size, style='italic',
+                bbox=dict(boxstyle=f'round,pad={label_pad}', facecolor='white', alpha=0.9, edgecolor=color))
+
+
+def panel(ax, x, y, w, h, color, edge=EDGE_COLOR, linewidth=2, alpha=0.1, pad=0.1):
+    """Translucent background panel grouping a layer or a flow."""
+    from matplotlib.patches import FancyBboxPatch
+
+    ax.add_patch(FancyBboxPatch((x, y), w, h, boxstyle=f'round,pad={pad}',
+                                facecolor=color, edgecolor=edge, linewidth=linewidth, alpha=alpha))
+
+
+def text(ax, x, y, text, size=10, color=EDGE_COLOR, weight='normal', style='normal',
+         ha='center', va='baseline', family=None, face=None, edge=None, pad=0.4, alpha=0.95):
+    """Free text; `face` draws it inside a rounded note box."""
+    bbox = None
+    if face:
+        bbox = dict(boxstyle=f'round,pad={pad}', facecolor=face, alpha=alpha,
+                    edgecolor=edge or EDGE_COLOR, linewidth=2)
+    ax.text(x, y, text, ha=ha, va=va, fontsize=size, color=color, fontweight=weight,
+            style=style, family=family, bbox=bbox)
+
+
+def lines(ax, x, y, lines, step=0.25, size=7, color=EDGE_COLOR, ha='left'):
+    """A column of text lines `step` apart; a line may be {"text", "weight", "color"}."""
+    for index, line in enumerate(lines):
+        line = line if isinstance(line, dict) else {'text': line}
+        ax.text(x, y - index * step, line['text'], ha=ha, fontsize=size,
+                fontweight=line.get('weight', 'normal'), color=line.get('color', color))
+
+
+def legend(ax, items, loc='upper left', size=9, ncol=3, title=None, title_size=10):
+    """Colour legend; `items` is a list of {"label", "color"}."""
+    import matplotlib.patches as mpatches
+
+    handles = [mpatches.Patch(facecolor=item['color'], label=item['label']) for item in items]
+    ax.legend(handles=handles, loc=loc, fontsize=size, framealpha=0.95, ncol=ncol,
+              title=title, title_fontsize=title_size)
+
+
+ELEMENTS = {
+    'arrow': arrow,
+    'box': box,
+    'legend': legend,
+    'lines': lines,
+    'panel': panel,
+    'text': text,
+}
+
+
+def resolve_colors(value, palette):
+    """Replace palette names with hex values anywhere in an element."""
+    if isinstance(value, dict):
+        return {key: (palette.get(item, item) if key in COLOR_KEYS and isinstance(item, str)
+                      else resolve_colors(item, palette))
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_colors(item, palette) for item in value]
+    return value
+
+
+def render(spec, output_path, dpi=None):
+    """Draw `spec` and save it as a PNG at `output_path`."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    palette = spec.get('palette', {})
+    defaults = spec.get('defaults', {})
+
+    fig, ax = plt.subplots(figsize=spec['figsize'], facecolor='white')
+    ax.set_xlim(*spec['xlim'])
+    ax.set_ylim(*spec['ylim'])
+    ax.axis('off')
+
+    for element in spec['elements']:
+        kind = element['type']
+        if kind not in ELEMENTS:
+            raise ValueError(f"{spec.get('title', output_path)}: unknown element type {kind!r}")
+        options = {**defaults.get(kind, {}), **element}
+        del options['type']
+        ELEMENTS[kind](ax, **resolve_colors(options, palette))
+
+    fig.tight_layout()
+    fig.savefig(output_path, format='png', dpi=dpi or spec.get('dpi', DEFAULT_DPI),
+                bbox_inches='tight', facecolor='white', edgecolor='none')
+    plt.close(fig)
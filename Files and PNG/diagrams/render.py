@@ -0,0 +1,162 @@
+"""
+Render the Stickly architecture diagrams from the JSON specs in specs/.
+
+    python "Files and PNG/diagrams/render.py"                    # stale diagrams only
+    python "Files and PNG/diagrams/render.py" app_architecture   # one diagram
+    python "Files and PNG/diagrams/render.py" --preview          # quick low-dpi drafts
+    python "Files and PNG/diagrams/render.py" --force --jobs 4
+
+A diagram is skipped when its spec, dpi and the drawing primitives hash the
+same as at its last render and the PNG on disk is the one that render wrote
+(.render-cache.json, committed next to the PNGs). Content hashes rather than
+mtimes keep the committed cache valid in fresh CI checkouts. --preview drafts
+are tracked in .render-cache.preview.json instead, which is git-ignored like
+the drafts themselves. Stale diagrams render in parallel, one process each.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+import diagram_kit  # noqa: E402
+
+SPEC_DIR = os.path.join(HERE, 'specs')
+OUTPUT_DIR = os.path.dirname(HERE)
+CACHE_PATH = os.path.join(HERE, '.render-cache.json')
+PREVIEW_CACHE_PATH = os.path.join(HERE, '.render-cache.preview.json')
+PREVIEW_DPI = 72
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_specs(names):
+    available = sorted(name[:-len('.json')] for name in os.listdir(SPEC_DIR) if name.endswith('.json'))
+    unknown = sorted(set(names) - set(available))
+    if unknown:
+        raise SystemExit(f"Unknown diagram(s): {', '.join(unknown)} (available: {', '.join(available)})")
+
+    specs = {}
+    for name in names or available:
+        with open(os.path.join(SPEC_DIR, f'{name}.json'), encoding='utf-8') as handle:
+            specs[name] = json.load(handle)
+
+    # Two diagrams writing the same file would silently overwrite each other.
+    outputs = {}
+    for name, spec in specs.items():
+        if spec['output'] in outputs:
+            raise SystemExit(f"{name} and {outputs[spec['output']]} both write {spec['output']}")
+        outputs[spec['output']] = name
+    return specs
+
+
+def load_cache(path):
+    try:
+        with open(path, encoding='utf-8') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache, path):
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as handle:
+        json.dump(cache, handle, indent=2, sort_keys=True)
+        handle.write('\n')
+    os.replace(temp_path, path)
+
+
+def plan(name, spec, dpi, preview, kit_digest):
+    """The render job for one spec: where it goes and the hash of its inputs."""
+    output = spec['output']
+    if preview:
+        output = f'{os.path.splitext(output)[0]}.preview.png'
+
+    inputs = json.dumps({'spec': spec, 'dpi': dpi, 'kit': kit_digest}, sort_keys=True, ensure_ascii=False)
+    return {
+        'name': name,
+        'output': output,
+        'path': os.path.join(OUTPUT_DIR, output),
+        'dpi': dpi,
+        'inputs': hashlib.sha256(inputs.encode('utf-8')).hexdigest(),
+    }
+
+
+def is_fresh(job, cache):
+    entry = cache.get(job['output'])
+    if not entry or entry.get('inputs') != job['inputs'] or not os.path.exists(job['path']):
+        return False
+    return entry.get('digest') == file_digest(job['path'])
+
+
+def render_job(job, spec):
+    """Runs in a worker process. Writes to a temp file so an interrupted
+    render never leaves a half-written PNG that the cache could vouch for."""
+    started = time.perf_counter()
+    temp_path = f"{job['path']}.tmp"
+    diagram_kit.render(spec, temp_path, dpi=job['dpi'])
+    os.replace(temp_path, job['path'])
+    return file_digest(job['path']), time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render the architecture diagrams from specs/*.json.')
+    parser.add_argument('names', nargs='*', help='spec names to render (default: all)')
+    parser.add_argument('--preview', action='store_true',
+                        help=f'render at {PREVIEW_DPI} dpi to <output>.preview.png')
+    parser.add_argument('--dpi', type=int, help='override the dpi of every spec')
+    parser.add_argument('--force', action='store_true', help='render even when the cache says up to date')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='parallel render processes')
+    args = parser.parse_args(argv)
+
+    specs = load_specs(args.names)
+    cache_path = PREVIEW_CACHE_PATH if args.preview else CACHE_PATH
+    cache = load_cache(cache_path)
+    kit_digest = file_digest(diagram_kit.__file__)
+
+    stale = []
+    for name, spec in specs.items():
+        dpi = args.dpi or (PREVIEW_DPI if args.preview else spec.get('dpi', diagram_kit.DEFAULT_DPI))
+        job = plan(name, spec, dpi, args.preview, kit_digest)
+        if not args.force and is_fresh(job, cache):
+            print(f'   {job["output"]} is up to date')
+        else:
+            stale.append(job)
+
+    if not stale:
+        return 0
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(stale)))) as pool:
+        futures = {pool.submit(render_job, job, specs[job['name']]): job for job in stale}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                digest, seconds = future.result()
+            except Exception as error:
+                failed += 1
+                print(f'❌ {job["name"]}: {error}', file=sys.stderr)
+                continue
+
+            # Saved per diagram so one failure keeps the others' progress.
+            cache[job['output']] = {'inputs': job['inputs'], 'digest': digest, 'dpi': job['dpi']}
+            save_cache(cache, cache_path)
+            print(f'✅ {job["output"]} rendered at {job["dpi"]} dpi in {seconds:.1f}s')
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+#!/usr/bin/env node
+// Compare two bench/run.js reports endpoint by endpoint.
+//
+//   node bench/compare.js before.json after.json
+
+const fs = require('fs');
+
+function load(file) {
+    return JSON.parse(fs.readFileSync(file, 'utf8'));
+}
+
+function change(before, after) {
+    if (!before) return after ? '   new' : '     -';
+    const ratio = (after - before) / before;
+    return `${ratio >= 0 ? '+' : ''}${(ratio * 100).toFixed(1)}%`.padStart(7);
+}
+
+function main() {
+    const [beforeFile, afterFile] = process.argv.slice(2);
+    if (!beforeFile || !afterFile) {
+        console.error('Usage: node bench/compare.js <before.json> <after.json>');
+        process.exit(1);
+    }
+
+    const before = load(beforeFile);
+    const after = load(afterFile);
+    console.log(`before ${before.meta.revision || '?'}  after ${after.meta.revision || '?'}`);
+
+    Object.entries(after.workloads).forEach(([workload, result]) => {
+        const previous = before.workloads[workload] || { endpoints: {}, rssBytes: {} };
+        console.log(`\n${workload}: ${result.throughputRps} req/s (${change(previous.throughputRps, result.throughputRps).trim()}), peak RSS ${Math.round((result.rssBytes.peak || 0) / 1048576)} MB (${change(previous.rssBytes.peak, result.rssBytes.peak).trim()})`);
+
+        Object.entries(result.endpoints).forEach(([endpoint, stats]) => {
+            const old = previous.endpoints[endpoint] || {};
+            console.log(
+                `  ${endpoint.padEnd(48)} rps ${String(stats.throughputRps).padStart(8)} ${change(old.throughputRps, stats.throughputRps)}`
+                + `  p50 ${String(stats.p50Ms).padStart(7)}ms ${change(old.p50Ms, stats.p50Ms)}`
+                + `  p99 ${String(stats.p99Ms).padStart(7)}ms ${change(old.p99Ms, stats.p99Ms)}`
+                + `  bytes/req ${String(stats.bytesPerRequest).padStart(7)} ${change(old.bytesPerRequest, stats.bytesPerRequest)}`
+            );
+        });
+    });
+}
+
+main();
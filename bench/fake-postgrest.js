@@ -0,0 +1,278 @@
+// In-memory stand-in for the Supabase REST API (PostgREST) serving the
+// `stickly_messages` table from supabase/stickly_messages.sql. Only the
+// subset supabase-js uses in server.js is implemented: select with
+// eq/gt/lt/in/or filters, order, limit/offset; upsert on `message_id`;
+// and filtered updates. Latency and error rate are injectable.
+
+const http = require('http');
+
+const COLUMN_DEFAULTS = {
+    text: '',
+    category: 'thoughts',
+    image: null,
+    thumbnail: null,
+    likes: 0,
+    username: 'Anonymous',
+    avatar: '👤',
+    expires_at: null,
+    replies: [],
+    reports: [],
+    deleted: false
+};
+const TIMESTAMP_COLUMNS = new Set(['timestamp', 'expires_at', 'updated_at']);
+const RESERVED_PARAMS = new Set(['select', 'columns', 'order', 'limit', 'offset', 'on_conflict', 'or', 'and']);
+
+function unquote(value) {
+    return value.length >= 2 && value.startsWith('"') && value.endsWith('"') ? value.slice(1, -1) : value;
+}
+
+// Split on top-level commas, respecting parentheses and double quotes.
+function splitTopLevel(value) {
+    const parts = [];
+    let depth = 0;
+    let quoted = false;
+    let current = '';
+
+    for (const char of value) {
+        if (char === '"') quoted = !quoted;
+        if (!quoted && char === '(') depth += 1;
+        if (!quoted && char === ')') depth -= 1;
+        if (!quoted && depth === 0 && char === ',') {
+            parts.push(current);
+            current = '';
+        } else {
+            current += char;
+        }
+    }
+    if (current) parts.push(current);
+    return parts;
+}
+
+function toComparable(column, value) {
+    if (value === null || value === undefined) return null;
+    if (TIMESTAMP_COLUMNS.has(column)) return new Date(value).getTime();
+    if (typeof value === 'number' || typeof value === 'boolean') return value;
+    if (value === 'true') return true;
+    if (value === 'false') return false;
+    if (value === 'null') return null;
+    if (column === 'message_id' || column === 'likes') return Number(value);
+    return value;
+}
+
+// Build a row predicate from `column`, `operator.value`.
+function compileCondition(column, expression) {
+    const dot = expression.indexOf('.');
+    const operator = expression.slice(0, dot);
+    const raw = expression.slice(dot + 1);
+
+    if (operator === 'in') {
+        const values = new Set(splitTopLevel(raw.replace(/^\(|\)$/g, '')).map(item => toComparable(column, unquote(item))));
+        return row => values.has(toComparable(column, row[column]));
+    }
+
+    if (operator === 'is') {
+        const expected = toComparable(column, raw);
+        return row => toComparable(column, row[column]) === expected;
+    }
+
+    const expected = toComparable(column, unquote(raw));
+    const compare = {
+        eq: (a, b) => a === b,
+        neq: (a, b) => a !== b,
+        gt: (a, b) => a > b,
+        gte: (a, b) => a >= b,
+        lt: (a, b) => a < b,
+        lte: (a, b) => a <= b
+    }[operator];
+
+    if (!compare) {
+        throw new Error(`Unsupported filter operator: ${operator}`);
+    }
+
+    return row => {
+        const actual = toComparable(column, row[column]);
+        return actual !== null && compare(actual, expected);
+    };
+}
+
+// Parse a logic tree such as `(a.lt.1,and(a.eq.1,b.lt.2))`.
+function compileLogic(kind, body) {
+    const predicates = splitTopLevel(body.replace(/^\(|\)$/g, '')).map(term => {
+        const nested = term.match(/^(and|or)(\(.*\))$/);
+        if (nested) {
+            return compileLogic(nested[1], nested[2]);
+        }
+
+        const dot = term.indexOf('.');
+        return compileCondition(term.slice(0, dot), term.slice(dot + 1));
+    });
+
+    return kind === 'or'
+        ? row => predicates.some(predicate => predicate(row))
+        : row => predicates.every(predicate => predicate(row));
+}
+
+function compileFilters(searchParams) {
+    const predicates = [];
+    searchParams.forEach((value, key) => {
+        if (key === 'or' || key === 'and') {
+            predicates.push(compileLogic(key, value));
+        } else if (!RESERVED_PARAMS.has(key)) {
+            predicates.push(compileCondition(key, value));
+        }
+    });
+    return row => predicates.every(predicate => predicate(row));
+}
+
+function compileOrder(orderParam) {
+    if (!orderParam) return null;
+
+    const keys = orderParam.split(',').map(term => {
+        const [column, direction = 'asc'] = term.split('.');
+        return { column, sign: direction === 'desc' ? -1 : 1 };
+    });
+
+    return (a, b) => {
+        for (const { column, sign } of keys) {
+            const left = toComparable(column, a[column]);
+            const right = toComparable(column, b[column]);
+            if (left === right) continue;
+            if (left === null) return 1;
+            if (right === null) return -1;
+            return left < right ? -sign : sign;
+        }
+        return 0;
+    };
+}
+
+function project(row, selectParam) {
+    if (!selectParam || selectParam === '*') return { ...row };
+    const projected = {};
+    selectParam.split(',').forEach(column => {
+        projected[column] = row[column] === undefined ? null : row[column];
+    });
+    return projected;
+}
+
+function createFakePostgrest(options = {}) {
+    const {
+        table = 'stickly_messages',
+        latencyMs = 0,
+        jitterMs = 0,
+        errorRate = 0
+    } = options;
+
+    const rows = new Map(); // message_id -> row
+    const stats = { select: 0, upsert: 0, update: 0, rowsRead: 0, rowsWritten: 0, injectedErrors: 0 };
+    const tablePath = `/rest/v1/${table}`;
+
+    function put(row) {
+        const now = new Date().toISOString();
+        const existing = rows.get(Number(row.message_id));
+        const next = {
+            ...COLUMN_DEFAULTS,
+            timestamp: now,
+            ...existing,
+            ...row,
+            message_id: Number(row.message_id),
+            updated_at: row.updated_at || now
+        };
+        rows.set(next.message_id, next);
+        return next;
+    }
+
+    function readBody(req) {
+        return new Promise((resolve, reject) => {
+            const chunks = [];
+            req.on('data', chunk => chunks.push(chunk));
+            req.on('end', () => {
+                const raw = Buffer.concat(chunks).toString('utf8');
+                try {
+                    resolve(raw ? JSON.parse(raw) : null);
+                } catch (error) {
+                    reject(error);
+                }
+            });
+            req.on('error', reject);
+        });
+    }
+
+    function send(res, status, body) {
+        const payload = body === undefined ? '' : JSON.stringify(body);
+        res.writeHead(status, { 'Content-Type': 'application/json', 'Content-Length': Buffer.byteLength(payload) });
+        res.end(payload);
+    }
+
+    async function handle(req, res) {
+        const url = new URL(req.url, 'http://localhost');
+        if (url.pathname !== tablePath) {
+            return send(res, 404, { message: `relation "${url.pathname}" does not exist` });
+        }
+
+        const delay = latencyMs + (jitterMs > 0 ? Math.random() * jitterMs : 0);
+        if (delay > 0) {
+            await new Promise(resolve => setTimeout(resolve, delay));
+        }
+
+        if (errorRate > 0 && Math.random() < errorRate) {
+            stats.injectedErrors += 1;
+            return send(res, 503, { message: 'Injected failure', code: 'BENCH' });
+        }
+
+        const matches = compileFilters(url.searchParams);
+        const returnRepresentation = String(req.headers.prefer || '').includes('return=representation');
+
+        if (req.method === 'GET') {
+            stats.select += 1;
+            let result = [...rows.values()].filter(matches);
+            const order = compileOrder(url.searchParams.get('order'));
+            if (order) result.sort(order);
+
+            const offset = Number.parseInt(url.searchParams.get('offset') || '0', 10);
+            const limit = url.searchParams.has('limit') ? Number.parseInt(url.searchParams.get('limit'), 10) : Infinity;
+            result = result.slice(offset, offset + limit).map(row => project(row, url.searchParams.get('select')));
+            stats.rowsRead += result.length;
+            return send(res, 200, result);
+        }
+
+        if (req.method === 'POST') {
+            stats.upsert += 1;
+            const body = await readBody(req);
+            const written = (Array.isArray(body) ? body : [body]).map(put);
+            stats.rowsWritten += written.length;
+            return returnRepresentation ? send(res, 201, written) : send(res, 201);
+        }
+
+        if (req.method === 'PATCH') {
+            stats.update += 1;
+            const body = await readBody(req);
+            const updated = [...rows.values()].filter(matches).map(row => put({ ...row, ...body }));
+            stats.rowsWritten += updated.length;
+            return returnRepresentation ? send(res, 200, updated) : send(res, 204);
+        }
+
+        return send(res, 405, { message: `Unsupported method ${req.method}` });
+    }
+
+    const server = http.createServer((req, res) => {
+        handle(req, res).catch(error => send(res, 400, { message: error.message }));
+    });
+
+    return {
+        listen(port = 0) {
+            return new Promise(resolve => {
+                server.listen(port, '127.0.0.1', () => resolve(server.address().port));
+            });
+        },
+        close() {
+            return new Promise(resolve => server.close(() => resolve()));
+        },
+        put,
+        get size() {
+            return rows.size;
+        },
+        stats: () => ({ rows: rows.size, ...stats })
+    };
+}
+
+module.exports = { createFakePostgrest };
@@ -0,0 +1,438 @@
+#!/usr/bin/env node
+// Benchmark runner: boots server.js against the fake PostgREST table,
+// drives mixed workloads and prints a JSON report (throughput, p50/p99
+// latency, payload bytes per endpoint and server RSS) for comparing builds.
+//
+//   node bench/run.js --clients=50 --duration=10 --latency=20 --out=before.json
+//   node bench/compare.js before.json after.json
+
+const { spawn, execSync } = require('child_process');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { PNG } = require('pngjs');
+const { createFakePostgrest } = require('./fake-postgrest');
+
+const WORKLOADS = ['feed', 'likes', 'replies', 'media', 'expiry'];
+const CATEGORIES = ['whistleblower', 'controversy', 'thoughts', 'confessions', 'others'];
+
+function parseArgs(argv) {
+    const options = {
+        workloads: WORKLOADS,
+        clients: 50,
+        duration: 10,
+        seed: 2000,
+        latency: 15,
+        jitter: 10,
+        errorRate: 0,
+        replyDepth: 40,
+        hydrateCacheMs: 1000,
+        encoding: 'identity',
+        out: null
+    };
+
+    argv.forEach(arg => {
+        const match = arg.match(/^--([a-z-]+)=(.*)$/);
+        if (!match) return;
+        const key = match[1].replace(/-([a-z])/g, (_, char) => char.toUpperCase());
+        if (key === 'workloads') {
+            options.workloads = match[2].split(',').filter(name => WORKLOADS.includes(name));
+        } else if (key === 'out' || key === 'encoding') {
+            options[key] = match[2];
+        } else if (key in options) {
+            options[key] = Number(match[2]);
+        }
+    });
+
+    return options;
+}
+
+function percentile(sorted, fraction) {
+    if (sorted.length === 0) return 0;
+    return sorted[Math.min(sorted.length - 1, Math.floor(fraction * sorted.length))];
+}
+
+function round(value, digits = 2) {
+    const factor = 10 ** digits;
+    return Math.round(value * factor) / factor;
+}
+
+function createRecorder() {
+    const endpoints = new Map(); // label -> { latencies, errors, bytes }
+
+    function record(label, durationMs, bytes, ok) {
+        if (!endpoints.has(label)) {
+            endpoints.set(label, { latencies: [], errors: 0, bytes: 0 });
+        }
+        const entry = endpoints.get(label);
+        entry.latencies.push(durationMs);
+        entry.bytes += bytes;
+        if (!ok) entry.errors += 1;
+    }
+
+    function summarize(durationS) {
+        const summary = {};
+        let requests = 0;
+        let errors = 0;
+
+        endpoints.forEach((entry, label) => {
+            const sorted = entry.latencies.slice().sort((a, b) => a - b);
+            const count = sorted.length;
+            requests += count;
+            errors += entry.errors;
+            summary[label] = {
+                count,
+                errors: entry.errors,
+                throughputRps: round(count / durationS),
+                p50Ms: round(percentile(sorted, 0.5)),
+                p99Ms: round(percentile(sorted, 0.99)),
+                maxMs: round(sorted[count - 1] || 0),
+                meanMs: round(sorted.reduce((sum, value) => sum + value, 0) / Math.max(1, count)),
+                bytes: entry.bytes,
+                bytesPerRequest: Math.round(entry.bytes / Math.max(1, count))
+            };
+        });
+
+        return { requests, errors, throughputRps: round(requests / durationS), endpoints: summary };
+    }
+
+    return { record, summarize };
+}
+
+function createClient(baseUrl, recorder, acceptEncoding = 'identity') {
+    // `label` groups requests by endpoint template in the report.
+    async function request(label, method, urlPath, { json, form, headers = {} } = {}) {
+        const init = { method, headers: { 'Accept-Encoding': acceptEncoding, ...headers } };
+        if (json !== undefined) {
+            init.headers['Content-Type'] = 'application/json';
+            init.body = JSON.stringify(json);
+        } else if (form) {
+            init.body = form;
+        }
+
+        const startedAt = process.hrtime.bigint();
+        let response;
+        let body = Buffer.alloc(0);
+        try {
+            response = await fetch(`${baseUrl}${urlPath}`, init);
+            body = Buffer.from(await response.arrayBuffer());
+        } catch (error) {
+            recorder.record(label, Number(process.hrtime.bigint() - startedAt) / 1e6, 0, false);
+            return { status: 0, headers: new Headers(), body: null };
+        }
+
+        // Count bytes on the wire (compressed when the server encoded the body).
+        const durationMs = Number(process.hrtime.bigint() - startedAt) / 1e6;
+        const wireBytes = Number(response.headers.get('content-length'));
+        recorder.record(label, durationMs, Number.isFinite(wireBytes) && wireBytes > 0 ? wireBytes : body.length, response.status < 400);
+
+        let parsed = null;
+        if ((response.headers.get('content-type') || '').includes('application/json') && body.length > 0) {
+            parsed = JSON.parse(body.toString('utf8'));
+        }
+        return { status: response.status, headers: response.headers, body: parsed };
+    }
+
+    return { request };
+}
+
+function makePng(seed) {
+    const png = new PNG({ width: 64, height: 64 });
+    for (let i = 0; i < png.data.length; i += 4) {
+        png.data[i] = (seed * 31 + i) & 255;
+        png.data[i + 1] = (seed * 17 + i * 3) & 255;
+        png.data[i + 2] = (seed * 7 + i * 5) & 255;
+        png.data[i + 3] = 255;
+    }
+    return PNG.sync.write(png);
+}
+
+function seedTable(fake, count) {
+    const now = Date.now();
+    for (let i = 0; i < count; i += 1) {
+        const timestamp = new Date(now - i * 60000).toISOString();
+        fake.put({
+            message_id: 1000000 + i,
+            text: `Seeded message ${i} `.repeat(1 + (i % 8)),
+            category: CATEGORIES[i % CATEGORIES.length],
+            timestamp,
+            likes: (i * 7919) % 250,
+            expires_at: new Date(now + 7 * 24 * 3600 * 1000).toISOString(),
+            replies: i % 5 === 0
+                ? [{ id: 5000000 + i, text: 'seeded reply', username: 'Anonymous', avatar: '👤', timestamp, likes: 0, replies: [] }]
+                : [],
+            updated_at: timestamp
+        });
+    }
+}
+
+async function waitForServer(baseUrl, child) {
+    const deadline = Date.now() + 20000;
+    while (Date.now() < deadline) {
+        if (child.exitCode !== null) {
+            throw new Error(`server.js exited with code ${child.exitCode}`);
+        }
+        try {
+            const response = await fetch(`${baseUrl}/api/messages/counts`);
+            if (response.ok) return;
+        } catch (error) {
+            // not listening yet
+        }
+        await new Promise(resolve => setTimeout(resolve, 100));
+    }
+    throw new Error('server.js did not become ready in time');
+}
+
+async function readRssBytes(baseUrl) {
+    try {
+        const text = await (await fetch(`${baseUrl}/metrics`)).text();
+        const match = text.match(/^process_resident_memory_bytes (\d+(?:\.\d+)?)/m);
+        return match ? Number(match[1]) : null;
+    } catch (error) {
+        return null;
+    }
+}
+
+function diffStats(before, after) {
+    const diff = {};
+    Object.keys(after).forEach(key => {
+        diff[key] = after[key] - (before[key] || 0);
+    });
+    return diff;
+}
+
+// Each workload returns a per-client loop; `state` is shared by the clients.
+const workloadFactories = {
+    feed: ({ client }) => {
+        let version = null;
+        let iteration = 0;
+        return async () => {
+            iteration += 1;
+            if (iteration % 10 === 0) {
+                await client.request('GET /api/messages?order=trending&limit', 'GET', '/api/messages?order=trending&limit=50');
+                return;
+            }
+            if (iteration % 7 === 0) {
+                await client.request('GET /api/messages/counts', 'GET', '/api/messages/counts');
+                return;
+            }
+
+            const category = iteration % 3 === 0 ? CATEGORIES[iteration % CATEGORIES.length] : null;
+            const query = [category ? `category=${category}` : null, version !== null ? `since=${version}` : null].filter(Boolean).join('&');
+            const label = version === null ? 'GET /api/messages' : 'GET /api/messages?since';
+            const response = await client.request(label, 'GET', `/api/messages${query ? `?${query}` : ''}`);
+            if (!category) {
+                version = response.headers.get('x-stickly-version') || version;
+            }
+        };
+    },
+
+    likes: ({ client, state }) => async () => {
+        await client.request('POST /api/messages/:id/like', 'POST', `/api/messages/${state.hotMessageId}/like`);
+    },
+
+    replies: ({ client, state, options }) => {
+        let parentReplyId = null;
+        let depth = 0;
+        return async () => {
+            if (depth >= options.replyDepth) {
+                parentReplyId = null;
+                depth = 0;
+            }
+
+            const response = parentReplyId === null
+                ? await client.request('POST /api/messages/:id/reply', 'POST', `/api/messages/${state.threadMessageId}/reply`, { json: { text: 'bench reply' } })
+                : await client.request('POST /api/messages/:id/replies/:replyId/reply', 'POST', `/api/messages/${state.threadMessageId}/replies/${parentReplyId}/reply`, { json: { text: 'bench nested reply' } });
+
+            if (response.body && response.body.id) {
+                parentReplyId = response.body.id;
+                depth += 1;
+                await client.request('POST /api/messages/:id/replies/:replyId/like', 'POST', `/api/messages/${state.threadMessageId}/replies/${parentReplyId}/like`);
+            }
+        };
+    },
+
+    media: ({ client, state }) => {
+        let iteration = 0;
+        return async () => {
+            iteration += 1;
+            // Half the uploads repeat an image to exercise content-hash dedupe.
+            const image = iteration % 2 === 0 ? state.sharedImage : makePng(state.nextImageSeed++);
+            const form = new FormData();
+            form.append('message', 'bench media post');
+            form.append('category', 'others');
+            form.append('mediaFile', new Blob([image], { type: 'image/png' }), 'bench.png');
+            const response = await client.request('POST /api/messages (media)', 'POST', '/api/messages', { form });
+            if (response.body && response.body.id) {
+                const message = await client.request('GET /api/messages?limit', 'GET', '/api/messages?limit=1');
+                const mediaUrl = message.body && message.body.items && message.body.items[0] && message.body.items[0].image;
+                if (mediaUrl && mediaUrl.startsWith('/media/')) {
+                    await client.request('GET /media/:key', 'GET', mediaUrl);
+                }
+            }
+        };
+    },
+
+    expiry: ({ client, state, options, fake }) => {
+        let iteration = 0;
+        let version = state.expiryVersion;
+        return async () => {
+            iteration += 1;
+            // Short-lived rows written behind the server's back reach it via
+            // incremental hydration and are then expired by the scheduler.
+            if (iteration % 5 === 0) {
+                fake.put({
+                    message_id: state.nextExternalId++,
+                    text: 'short-lived bench row',
+                    category: CATEGORIES[iteration % CATEGORIES.length],
+                    expires_at: new Date(Date.now() + 500 + Math.random() * 2500).toISOString()
+                });
+            }
+
+            // Admin soft-deletes of seeded messages (local posts would push back hydration).
+            if (iteration % 10 === 0 && state.nextDeleteId < 1000000 + options.seed) {
+                await client.request('DELETE /api/messages/:id', 'DELETE', `/api/messages/${state.nextDeleteId++}`, {
+                    headers: { 'x-admin-session-id': state.adminSessionId }
+                });
+            }
+
+            const feed = await client.request('GET /api/messages?since', 'GET', `/api/messages?since=${version}`);
+            version = feed.headers.get('x-stickly-version') || version;
+        };
+    }
+};
+
+async function runWorkload(name, context) {
+    const { baseUrl, options, fake } = context;
+    const recorder = createRecorder();
+    const client = createClient(baseUrl, recorder, options.encoding);
+    const fakeBefore = fake.stats();
+    const rssSamples = [];
+    const rssStart = await readRssBytes(baseUrl);
+
+    const sampler = setInterval(() => {
+        readRssBytes(baseUrl).then(bytes => bytes && rssSamples.push(bytes));
+    }, 500);
+
+    const stopAt = Date.now() + options.duration * 1000;
+    const startedAt = Date.now();
+    const loops = Array.from({ length: options.clients }, () => {
+        const step = workloadFactories[name]({ client, state: context.state, options, fake });
+        return (async () => {
+            while (Date.now() < stopAt) {
+                await step();
+            }
+        })();
+    });
+    await Promise.all(loops);
+    const durationS = (Date.now() - startedAt) / 1000;
+    clearInterval(sampler);
+
+    // Let write-behind and expiry settle so Supabase traffic is attributed here.
+    await new Promise(resolve => setTimeout(resolve, name === 'expiry' ? 3500 : 300));
+    const rssEnd = await readRssBytes(baseUrl);
+
+    return {
+        durationS: round(durationS),
+        ...recorder.summarize(durationS),
+        rssBytes: {
+            start: rssStart,
+            peak: Math.max(rssStart || 0, rssEnd || 0, ...rssSamples),
+            end: rssEnd
+        },
+        supabase: diffStats(fakeBefore, fake.stats())
+    };
+}
+
+function gitRevision() {
+    try {
+        return execSync('git rev-parse --short HEAD', { cwd: path.join(__dirname, '..'), stdio: ['ignore', 'pipe', 'ignore'] }).toString().trim();
+    } catch (error) {
+        return null;
+    }
+}
+
+async function main() {
+    const options = parseArgs(process.argv.slice(2));
+    const fake = createFakePostgrest({ latencyMs: options.latency, jitterMs: options.jitter, errorRate: options.errorRate });
+    seedTable(fake, options.seed);
+    const fakePort = await fake.listen();
+
+    const dataDir = fs.mkdtempSync(path.join(os.tmpdir(), 'stickly-bench-'));
+    const port = 20000 + Math.floor(Math.random() * 20000);
+    const baseUrl = `http://127.0.0.1:${port}`;
+    const child = spawn(process.execPath, [path.join(__dirname, '..', 'server.js')], {
+        env: {
+            ...process.env,
+            PORT: String(port),
+            SUPABASE_URL: `http://127.0.0.1:${fakePort}`,
+            SUPABASE_SERVICE_ROLE_KEY: 'bench-service-role-key',
+            STICKLY_DATA_DIR: dataDir,
+            MEDIA_DIR: path.join(dataDir, 'media'),
+            SUPABASE_HYDRATE_CACHE_MS: String(options.hydrateCacheMs),
+            RATE_LIMIT_ENABLED: 'false', // every bench client shares one IP
+            REQUEST_LOG_SAMPLE_RATE: '0'
+        },
+        stdio: ['ignore', 'ignore', 'inherit']
+    });
+
+    const report = {
+        meta: {
+            revision: gitRevision(),
+            node: process.version,
+            platform: `${process.platform}-${process.arch}`,
+            cpus: os.cpus().length,
+            startedAt: new Date().toISOString(),
+            options
+        },
+        workloads: {}
+    };
+
+    try {
+        await waitForServer(baseUrl, child);
+
+        const setup = createClient(baseUrl, createRecorder());
+        const hot = await setup.request('setup', 'POST', '/api/messages', { json: { message: 'hot post', category: 'controversy' } });
+        const thread = await setup.request('setup', 'POST', '/api/messages', { json: { message: 'deep thread', category: 'thoughts' } });
+        const admin = await setup.request('setup', 'POST', '/api/admin/login', { json: { username: 'admin', password: 'admin123' } });
+        const feed = await setup.request('setup', 'GET', '/api/messages');
+
+        const context = {
+            baseUrl,
+            options,
+            fake,
+            state: {
+                hotMessageId: hot.body && hot.body.id,
+                threadMessageId: thread.body && thread.body.id,
+                adminSessionId: admin.body && admin.body.sessionId,
+                expiryVersion: feed.headers.get('x-stickly-version'),
+                sharedImage: makePng(0),
+                nextImageSeed: 1,
+                nextExternalId: 9000000,
+                nextDeleteId: 1000000
+            }
+        };
+
+        for (const name of options.workloads) {
+            process.stderr.write(`bench: running ${name} (${options.clients} clients, ${options.duration}s)\n`);
+            report.workloads[name] = await runWorkload(name, context);
+        }
+    } finally {
+        child.kill('SIGTERM');
+        await fake.close();
+        fs.rmSync(dataDir, { recursive: true, force: true });
+    }
+
+    const output = `${JSON.stringify(report, null, 2)}\n`;
+    if (options.out) {
+        fs.writeFileSync(options.out, output);
+        process.stderr.write(`bench: report written to ${options.out}\n`);
+    } else {
+        process.stdout.write(output);
+    }
+}
+
+main().catch(error => {
+    console.error('Benchmark failed:', error);
+    process.exit(1);
+});
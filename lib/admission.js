@@ -0,0 +1,92 @@
+// Admission control for write endpoints.
+//
+// createRateLimiter: token buckets per route class and client key. Each class
+// has a burst `capacity` refilled at `refillPerSecond`. Buckets live in one
+// LRU-ordered map capped at `maxKeys`; evicting the least recently used
+// bucket only forgives a client that has been quiet the longest.
+//
+// createConcurrencyGate: a counting semaphore that never queues. Callers that
+// cannot get a slot are expected to shed the request (503 + Retry-After).
+
+function createRateLimiter(options) {
+    const { classes, maxKeys = 50000, now = Date.now } = options;
+    const buckets = new Map(); // `${routeClass}|${key}` -> { tokens, updatedAt }
+    const stats = { allowed: 0, limited: 0, evicted: 0 };
+
+    function refill(bucketKey, limits, at) {
+        let bucket = buckets.get(bucketKey);
+        if (bucket) {
+            buckets.delete(bucketKey); // refresh LRU position
+            bucket.tokens = Math.min(limits.capacity, bucket.tokens + ((at - bucket.updatedAt) / 1000) * limits.refillPerSecond);
+            bucket.updatedAt = at;
+        } else {
+            bucket = { tokens: limits.capacity, updatedAt: at };
+        }
+
+        buckets.set(bucketKey, bucket);
+        if (buckets.size > maxKeys) {
+            buckets.delete(buckets.keys().next().value);
+            stats.evicted += 1;
+        }
+        return bucket;
+    }
+
+    // Spend one token from every bucket in `keys` (e.g. IP and session). Returns
+    // null when allowed, or `{ retryAfterSeconds }` when any bucket is empty;
+    // nothing is spent in that case.
+    function take(routeClass, keys) {
+        const limits = classes[routeClass];
+        if (!limits) {
+            throw new Error(`Unknown rate limit class: ${routeClass}`);
+        }
+
+        const at = now();
+        const bucketsForRequest = keys.map(key => refill(`${routeClass}|${key}`, limits, at));
+        const emptiest = bucketsForRequest.reduce((lowest, bucket) => (bucket.tokens < lowest.tokens ? bucket : lowest));
+        if (emptiest.tokens < 1) {
+            stats.limited += 1;
+            return { retryAfterSeconds: Math.max(1, Math.ceil((1 - emptiest.tokens) / limits.refillPerSecond)) };
+        }
+
+        bucketsForRequest.forEach(bucket => {
+            bucket.tokens -= 1;
+        });
+        stats.allowed += 1;
+        return null;
+    }
+
+    return {
+        take,
+        stats: () => ({ keys: buckets.size, ...stats })
+    };
+}
+
+function createConcurrencyGate(options) {
+    const { maxInFlight } = options;
+    let inFlight = 0;
+    const stats = { acquired: 0, rejected: 0 };
+
+    // Returns a release function, or null when every slot is taken.
+    function tryAcquire() {
+        if (inFlight >= maxInFlight) {
+            stats.rejected += 1;
+            return null;
+        }
+
+        inFlight += 1;
+        stats.acquired += 1;
+        let released = false;
+        return () => {
+            if (released) return;
+            released = true;
+            inFlight -= 1;
+        };
+    }
+
+    return {
+        tryAcquire,
+        stats: () => ({ inFlight, maxInFlight, ...stats })
+    };
+}
+
+module.exports = { createRateLimiter, createConcurrencyGate };
@@ -0,0 +1,156 @@
+// Versioned change log for the message feed.
+// Every mutation bumps a monotonically increasing store version and records
+// which message changed, so clients can ask "what changed since version N?"
+// instead of downloading the whole board again.
+//
+// Versions only order changes within one process. When several nodes serve
+// the same clients (see cluster.js), pass `origin` (the node id): versions are
+// then handed out as "<origin>:<n>" tags and a tag minted by another node is
+// never diffed against this log, so a client switching nodes gets a snapshot.
+
+const DEFAULT_MAX_REMOVED = 5000;
+
+function createChangeFeed(options = {}) {
+    const maxRemoved = Number.isFinite(options.maxRemoved) && options.maxRemoved > 0
+        ? options.maxRemoved
+        : DEFAULT_MAX_REMOVED;
+    const origin = options.origin === undefined || options.origin === null ? null : String(options.origin);
+
+    // Seed from the wall clock (in microseconds) so versions keep increasing
+    // across restarts and a stale client cursor is never mistaken for a fresh one.
+    let version = Date.now() * 1000;
+    // Versions at or below this floor can no longer be answered with a delta.
+    let floorVersion = version;
+
+    const changedAt = new Map(); // messageId -> version of its latest upsert
+    const removedAt = new Map(); // messageId -> version it was removed at (insertion ordered)
+    let log = []; // [{ version, id }] ascending by version
+
+    function compactLog() {
+        if (log.length <= (changedAt.size + removedAt.size) * 2 + 64) {
+            return;
+        }
+
+        log = log.filter(entry =>
+            changedAt.get(entry.id) === entry.version || removedAt.get(entry.id) === entry.version
+        );
+    }
+
+    function touch(messageId) {
+        version += 1;
+        changedAt.set(messageId, version);
+        removedAt.delete(messageId);
+        log.push({ version, id: messageId });
+        compactLog();
+        return version;
+    }
+
+    function remove(messageId) {
+        version += 1;
+        changedAt.delete(messageId);
+        removedAt.set(messageId, version);
+        log.push({ version, id: messageId });
+
+        while (removedAt.size > maxRemoved) {
+            const [oldestId, oldestVersion] = removedAt.entries().next().value;
+            removedAt.delete(oldestId);
+            floorVersion = Math.max(floorVersion, oldestVersion);
+        }
+
+        compactLog();
+        return version;
+    }
+
+    // Forget everything before now, e.g. after the whole state was replaced.
+    function reset() {
+        version += 1;
+        floorVersion = version;
+        changedAt.clear();
+        removedAt.clear();
+        log = [];
+        return version;
+    }
+
+    function firstLogIndexAfter(sinceVersion) {
+        let low = 0;
+        let high = log.length;
+
+        while (low < high) {
+            const mid = (low + high) >>> 1;
+            if (log[mid].version <= sinceVersion) {
+                low = mid + 1;
+            } else {
+                high = mid;
+            }
+        }
+
+        return low;
+    }
+
+    // Returns { changed: [ids], removed: [ids] } or null when the cursor is
+    // too old (or from the future) and the caller has to send a full snapshot.
+    function changesSince(sinceVersion) {
+        if (!Number.isFinite(sinceVersion) || sinceVersion < floorVersion || sinceVersion > version) {
+            return null;
+        }
+
+        const changed = [];
+        const removed = [];
+        const seen = new Set();
+
+        for (let i = firstLogIndexAfter(sinceVersion); i < log.length; i++) {
+            const { id, version: entryVersion } = log[i];
+            if (seen.has(id)) {
+                continue;
+            }
+
+            if (changedAt.get(id) === entryVersion) {
+                seen.add(id);
+                changed.push(id);
+            } else if (removedAt.get(id) === entryVersion) {
+                seen.add(id);
+                removed.push(id);
+            }
+        }
+
+        return { changed, removed };
+    }
+
+    // The version as handed to clients: a number, or "<origin>:<n>" with an origin.
+    function formatVersion(value = version) {
+        return origin === null ? value : `${origin}:${value}`;
+    }
+
+    // Client-supplied version back to a number; NaN when it is malformed or
+    // was minted by another origin.
+    function parseVersion(tag) {
+        if (tag === undefined || tag === null || tag === '') {
+            return NaN;
+        }
+
+        const text = String(tag);
+        if (origin === null) {
+            return Number(text);
+        }
+
+        const separator = text.indexOf(':');
+        return separator > 0 && text.slice(0, separator) === origin ? Number(text.slice(separator + 1)) : NaN;
+    }
+
+    return {
+        touch,
+        remove,
+        reset,
+        changesSince,
+        formatVersion,
+        parseVersion,
+        get version() {
+            return version;
+        },
+        get versionTag() {
+            return formatVersion(version);
+        }
+    };
+}
+
+module.exports = { createChangeFeed };
@@ -0,0 +1,212 @@
+// Scale-out support: several worker processes per box (node:cluster) and
+// several pods, all serving reads from their own in-memory replica.
+//
+// Every message has exactly one owner node, the one encoded in its ID by the
+// ID generator. Mutations are forwarded to the owner, which applies them,
+// syncs Supabase and pushes the new copy to every other node; non-owners only
+// ever merge what owners publish. Node n lives on pod floor(n / workers) and
+// listens for peer traffic on STICKLY_PEER_PORT + (n % workers).
+
+const cluster = require('cluster');
+const crypto = require('crypto');
+const os = require('os');
+const { MAX_NODE_ID, nodeIdOf } = require('./id-generator');
+
+const FORWARDED_HEADER = 'x-stickly-forwarded';
+const PEER_SECRET_HEADER = 'x-stickly-peer-secret';
+const PEER_CHANGES_PATH = '/internal/peer/changes';
+const PEER_TIMEOUT_MS = 5000;
+const PEER_CHANGES_BATCH_SIZE = 200;
+
+function parseCount(value, fallback) {
+    const parsed = Number.parseInt(value, 10);
+    return Number.isInteger(parsed) && parsed > 0 ? parsed : fallback;
+}
+
+// Pod index from STICKLY_POD_INDEX or a StatefulSet host name (`stickly-2`).
+function resolvePodIndex(env) {
+    const explicit = Number.parseInt(env.STICKLY_POD_INDEX, 10);
+    if (Number.isInteger(explicit) && explicit >= 0) {
+        return explicit;
+    }
+
+    const ordinal = os.hostname().match(/-(\d+)$/);
+    return ordinal ? Number(ordinal[1]) : 0;
+}
+
+function readScaleOutConfig(env = process.env) {
+    const workers = parseCount(env.STICKLY_WORKERS, 1);
+    const pods = parseCount(env.STICKLY_PODS, 1);
+    const podIndex = resolvePodIndex(env);
+    const workerIndex = Number.parseInt(env.STICKLY_WORKER_INDEX || '0', 10) || 0;
+    const totalNodes = workers * pods;
+
+    if (totalNodes > MAX_NODE_ID + 1) {
+        throw new Error(`STICKLY_WORKERS x STICKLY_PODS must not exceed ${MAX_NODE_ID + 1}`);
+    }
+
+    // The secret lets a request inject messages and skip rate limits, so there
+    // is deliberately no built-in default.
+    if (totalNodes > 1 && !env.STICKLY_PEER_SECRET) {
+        throw new Error('STICKLY_PEER_SECRET must be set when STICKLY_WORKERS or STICKLY_PODS is above 1');
+    }
+
+    return {
+        enabled: totalNodes > 1,
+        workers,
+        pods,
+        podIndex,
+        workerIndex,
+        totalNodes,
+        nodeId: podIndex * workers + workerIndex,
+        peerPortBase: parseCount(env.STICKLY_PEER_PORT, 4000),
+        peerHostTemplate: env.STICKLY_PEER_HOST_TEMPLATE || null,
+        secret: env.STICKLY_PEER_SECRET || null
+    };
+}
+
+function shouldRunClusterPrimary(config) {
+    return config.workers > 1 && cluster.isPrimary;
+}
+
+// Fork one worker per STICKLY_WORKERS, each with a fixed worker index so its
+// node ID (and therefore the messages it owns) survives restarts.
+function runClusterPrimary(config) {
+    let shuttingDown = false;
+    const spawnWorker = workerIndex => {
+        const worker = cluster.fork({ STICKLY_WORKER_INDEX: String(workerIndex) });
+        worker.on('exit', (code, signal) => {
+            if (shuttingDown) return;
+            console.error(`Worker ${workerIndex} exited (${signal || code}), restarting`);
+            setTimeout(() => spawnWorker(workerIndex), 500);
+        });
+    };
+
+    process.on('SIGTERM', () => {
+        shuttingDown = true;
+        Object.values(cluster.workers).forEach(worker => worker.process.kill('SIGTERM'));
+    });
+
+    for (let workerIndex = 0; workerIndex < config.workers; workerIndex += 1) {
+        spawnWorker(workerIndex);
+    }
+    console.log(`Cluster primary started ${config.workers} workers on pod ${config.podIndex}`);
+    // The primary hands each connection to the next worker, so nothing keeps a
+    // client on the node its feed version and socket.io session belong to.
+    console.warn('STICKLY_WORKERS > 1 spreads one client over several nodes: `since=` polls get full snapshots and socket.io needs the WebSocket transport. For production scale out with pods (STICKLY_PODS, k8s/stickly-scaled.yaml) and STICKLY_WORKERS=1.');
+}
+
+function createPeerRouter(config) {
+    function ownerOf(messageId) {
+        const nodeId = nodeIdOf(messageId);
+        return nodeId < config.totalNodes ? nodeId : messageId % config.totalNodes;
+    }
+
+    function isLocal(messageId) {
+        return !config.enabled || ownerOf(messageId) === config.nodeId;
+    }
+
+    function peerBaseUrl(nodeId) {
+        const pod = Math.floor(nodeId / config.workers);
+        const port = config.peerPortBase + (nodeId % config.workers);
+        if (pod === config.podIndex) {
+            return `http://127.0.0.1:${port}`;
+        }
+        if (!config.peerHostTemplate) {
+            throw new Error('STICKLY_PEER_HOST_TEMPLATE is required when STICKLY_PODS > 1');
+        }
+        return `http://${config.peerHostTemplate.replace('{pod}', String(pod))}:${port}`;
+    }
+
+    // Replay a JSON API request on the owner node and return its response.
+    async function forward(nodeId, { method, path, headers = {}, body }) {
+        const response = await fetch(`${peerBaseUrl(nodeId)}${path}`, {
+            method,
+            headers: {
+                ...headers,
+                'Content-Type': 'application/json',
+                [FORWARDED_HEADER]: String(config.nodeId),
+                [PEER_SECRET_HEADER]: config.secret
+            },
+            body: method === 'GET' || body === undefined ? undefined : JSON.stringify(body),
+            signal: AbortSignal.timeout(PEER_TIMEOUT_MS)
+        });
+
+        return {
+            status: response.status,
+            contentType: response.headers.get('content-type') || 'application/json',
+            body: Buffer.from(await response.arrayBuffer())
+        };
+    }
+
+    async function postChanges(nodeId, changes) {
+        const response = await fetch(`${peerBaseUrl(nodeId)}${PEER_CHANGES_PATH}`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                [PEER_SECRET_HEADER]: config.secret
+            },
+            body: JSON.stringify(changes),
+            signal: AbortSignal.timeout(PEER_TIMEOUT_MS)
+        });
+
+        if (!response.ok) {
+            throw new Error(`peer ${nodeId} answered ${response.status}`);
+        }
+    }
+
+    // Push `{ seq, messages: [{ message, reports }], removed: [id] }` to every
+    // other node. `seq` grows with every change on this node; receivers use it
+    // to drop a push that arrives after a newer one for the same message.
+    function publish(changes) {
+        const batches = [];
+        for (let offset = 0; offset < changes.messages.length; offset += PEER_CHANGES_BATCH_SIZE) {
+            batches.push({ from: config.nodeId, seq: changes.seq, messages: changes.messages.slice(offset, offset + PEER_CHANGES_BATCH_SIZE), removed: [] });
+        }
+        if (batches.length === 0) {
+            batches.push({ from: config.nodeId, seq: changes.seq, messages: [], removed: [] });
+        }
+        batches[0].removed = changes.removed;
+
+        for (let nodeId = 0; nodeId < config.totalNodes; nodeId += 1) {
+            if (nodeId === config.nodeId) continue;
+            batches.forEach(batch => {
+                postChanges(nodeId, batch).catch(error => {
+                    // Peers catch up through Supabase hydration if a push is lost.
+                    console.error(`Peer change push to node ${nodeId} failed:`, error.message);
+                });
+            });
+        }
+    }
+
+    function isPeerRequest(req) {
+        const presented = req.get(PEER_SECRET_HEADER);
+        if (!config.enabled || !config.secret || typeof presented !== 'string') {
+            return false;
+        }
+
+        const expected = Buffer.from(config.secret);
+        const actual = Buffer.from(presented);
+        return actual.length === expected.length && crypto.timingSafeEqual(actual, expected);
+    }
+
+    return {
+        config,
+        enabled: config.enabled,
+        nodeId: config.nodeId,
+        ownerOf,
+        isLocal,
+        forward,
+        publish,
+        isPeerRequest
+    };
+}
+
+module.exports = {
+    FORWARDED_HEADER,
+    PEER_CHANGES_PATH,
+    readScaleOutConfig,
+    shouldRunClusterPrimary,
+    runClusterPrimary,
+    createPeerRouter
+};
@@ -0,0 +1,167 @@
+// Expiry scheduler backed by a binary min-heap keyed by epoch millis.
+// A single timer is armed for the earliest deadline; when it fires, exactly
+// the due messages are handed to `onExpire` in one batch. Rescheduled or
+// cancelled entries are dropped lazily when they reach the top of the heap.
+// The timer fires `coalesceMs` after the earliest deadline, so messages
+// expiring a few ms apart leave in one batch (one Supabase update) instead of
+// one timer and one update each; expiry runs at most that much late.
+
+const MAX_TIMER_DELAY_MS = 2 ** 31 - 1;
+const DEFAULT_COALESCE_MS = 250;
+
+function createExpiryScheduler(options) {
+    const { onExpire } = options;
+    const coalesceMs = Number.isFinite(options.coalesceMs) && options.coalesceMs >= 0 ? options.coalesceMs : DEFAULT_COALESCE_MS;
+    const heap = []; // [{ at, id }] ordered by `at`
+    const deadlines = new Map(); // messageId -> current deadline (epoch ms)
+    let timer = null;
+    let timerAt = null;
+
+    function swap(i, j) {
+        const tmp = heap[i];
+        heap[i] = heap[j];
+        heap[j] = tmp;
+    }
+
+    function siftUp(index) {
+        while (index > 0) {
+            const parent = (index - 1) >> 1;
+            if (heap[parent].at <= heap[index].at) break;
+            swap(parent, index);
+            index = parent;
+        }
+    }
+
+    function siftDown(index) {
+        for (;;) {
+            const left = index * 2 + 1;
+            const right = left + 1;
+            let smallest = index;
+
+            if (left < heap.length && heap[left].at < heap[smallest].at) smallest = left;
+            if (right < heap.length && heap[right].at < heap[smallest].at) smallest = right;
+            if (smallest === index) break;
+
+            swap(smallest, index);
+            index = smallest;
+        }
+    }
+
+    function pop() {
+        const top = heap[0];
+        const last = heap.pop();
+        if (heap.length > 0) {
+            heap[0] = last;
+            siftDown(0);
+        }
+        return top;
+    }
+
+    // Drop stale entries from the top so heap[0] is always a live deadline.
+    function pruneTop() {
+        while (heap.length > 0 && deadlines.get(heap[0].id) !== heap[0].at) {
+            pop();
+        }
+    }
+
+    function arm() {
+        pruneTop();
+        if (heap.length === 0) {
+            if (timer) {
+                clearTimeout(timer);
+                timer = null;
+                timerAt = null;
+            }
+            return;
+        }
+
+        const nextAt = heap[0].at;
+        if (timer && timerAt === nextAt) {
+            return;
+        }
+
+        if (timer) {
+            clearTimeout(timer);
+        }
+
+        timerAt = nextAt;
+        timer = setTimeout(fire, Math.min(MAX_TIMER_DELAY_MS, Math.max(0, nextAt + coalesceMs - Date.now())));
+        if (typeof timer.unref === 'function') {
+            timer.unref();
+        }
+    }
+
+    function fire() {
+        timer = null;
+        timerAt = null;
+
+        const now = Date.now();
+        const dueIds = [];
+        pruneTop();
+        while (heap.length > 0 && heap[0].at <= now) {
+            const entry = pop();
+            if (deadlines.get(entry.id) === entry.at) {
+                deadlines.delete(entry.id);
+                dueIds.push(entry.id);
+            }
+            pruneTop();
+        }
+
+        if (dueIds.length > 0) {
+            try {
+                onExpire(dueIds);
+            } catch (error) {
+                console.error('Expiry handler failed:', error.message);
+            }
+        }
+
+        arm();
+    }
+
+    function schedule(messageId, expiresAtMs) {
+        if (!Number.isFinite(expiresAtMs)) {
+            cancel(messageId);
+            return;
+        }
+
+        if (deadlines.get(messageId) === expiresAtMs) {
+            return;
+        }
+
+        deadlines.set(messageId, expiresAtMs);
+        heap.push({ at: expiresAtMs, id: messageId });
+        siftUp(heap.length - 1);
+
+        // Compact when stale entries dominate the heap.
+        if (heap.length > deadlines.size * 2 + 64) {
+            const live = heap.filter(entry => deadlines.get(entry.id) === entry.at);
+            heap.length = 0;
+            live.forEach(entry => {
+                heap.push(entry);
+                siftUp(heap.length - 1);
+            });
+        }
+
+        arm();
+    }
+
+    function cancel(messageId) {
+        if (deadlines.delete(messageId)) {
+            arm();
+        }
+    }
+
+    return {
+        schedule,
+        cancel,
+        get size() {
+            return deadlines.size;
+        },
+        get nextExpiryAt() {
+            pruneTop();
+            return heap.length > 0 ? heap[0].at : null;
+        }
+    };
+}
+
+module.exports = { createExpiryScheduler };
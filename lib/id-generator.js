@@ -0,0 +1,79 @@
+// Collision-free numeric IDs for messages and replies.
+// IDs are laid out as (milliseconds since ID_EPOCH_MS) * 4096 + node * 64 + sequence,
+// which keeps them monotonic per process, unique across up to 64 nodes
+// (replicas / cluster workers) and inside Number.MAX_SAFE_INTEGER for ~69 years.
+// They are always larger than the legacy Date.now() IDs already stored.
+
+const os = require('os');
+const crypto = require('crypto');
+
+const ID_EPOCH_MS = Date.UTC(2020, 0, 1);
+const NODE_BITS = 6;
+const SEQUENCE_BITS = 6;
+const MAX_NODE_ID = (1 << NODE_BITS) - 1;
+const MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1;
+const TIME_MULTIPLIER = 1 << (NODE_BITS + SEQUENCE_BITS);
+
+// `replicas` is how many processes allocate IDs side by side. With more than
+// one, every process needs an explicit, distinct node id: two host-name hashes
+// collide with probability 1/64 per pair, and then so do their IDs.
+function resolveNodeId(value, replicas = 1) {
+    if (value !== undefined && value !== null && value !== '') {
+        const parsed = Number(value);
+        if (!Number.isInteger(parsed) || parsed < 0 || parsed > MAX_NODE_ID) {
+            throw new Error(`STICKLY_NODE_ID must be an integer from 0 to ${MAX_NODE_ID}, got ${value}`);
+        }
+        return parsed;
+    }
+
+    if (replicas > 1) {
+        throw new Error(`STICKLY_NODE_ID (0-${MAX_NODE_ID}) must be set to a distinct value per replica when running ${replicas} replicas`);
+    }
+
+    // Fall back to a stable hash of the host name (the pod name on Kubernetes).
+    // Only unique while a single replica is running.
+    const digest = crypto.createHash('sha256').update(os.hostname()).digest();
+    const nodeId = digest.readUInt16BE(0) % (MAX_NODE_ID + 1);
+    console.warn(
+        `STICKLY_NODE_ID is not set; using node id ${nodeId} derived from the host name. ` +
+        'This is only collision-free with a single replica; scale out with STICKLY_PODS ' +
+        '(k8s/stickly-scaled.yaml), which assigns distinct node ids.'
+    );
+    return nodeId;
+}
+
+function createIdGenerator(options = {}) {
+    const nodeId = resolveNodeId(options.nodeId, options.replicas);
+    let lastMs = 0;
+    let sequence = 0;
+
+    function nextId() {
+        const nowMs = Math.max(Date.now() - ID_EPOCH_MS, lastMs);
+
+        if (nowMs === lastMs) {
+            sequence += 1;
+            if (sequence > MAX_SEQUENCE) {
+                // Sequence exhausted for this millisecond: borrow the next one.
+                lastMs += 1;
+                sequence = 0;
+            }
+        } else {
+            lastMs = nowMs;
+            sequence = 0;
+        }
+
+        return lastMs * TIME_MULTIPLIER + nodeId * (MAX_SEQUENCE + 1) + sequence;
+    }
+
+    return {
+        nextId,
+        nodeId
+    };
+}
+
+// Node that allocated `id` (meaningless for legacy Date.now() IDs).
+function nodeIdOf(id) {
+    return Math.floor(id / (MAX_SEQUENCE + 1)) % (MAX_NODE_ID + 1);
+}
+
+module.exports = { MAX_NODE_ID, createIdGenerator, nodeIdOf };
@@ -0,0 +1,127 @@
+// Bounded pool of worker threads for upload processing (media-worker.js).
+// Content sniffing and thumbnail rendering are CPU-bound, so they run off the
+// main event loop with at most `size` jobs in flight and `maxQueue`
+// jobs waiting. When the queue is full `process` rejects with code
+// MEDIA_POOL_BUSY so the caller can shed load instead of piling up work.
+
+const os = require('os');
+const path = require('path');
+const { Worker } = require('worker_threads');
+
+const WORKER_FILE = path.join(__dirname, 'media-worker.js');
+
+function defaultPoolSize() {
+    const cpus = typeof os.availableParallelism === 'function' ? os.availableParallelism() : os.cpus().length;
+    return Math.max(1, Math.min(4, cpus - 1));
+}
+
+function createMediaPool(options = {}) {
+    const { size = defaultPoolSize(), maxQueue = 32 } = options;
+    const idle = [];
+    const queue = [];
+    const running = new Map(); // worker -> job
+    const workers = new Set();
+    const stats = { processed: 0, failed: 0, rejected: 0 };
+    let nextJobId = 1;
+    let closed = false;
+
+    function spawn() {
+        const worker = new Worker(WORKER_FILE);
+        worker.unref(); // idle workers must not keep the process alive
+        workers.add(worker);
+
+        worker.on('message', message => {
+            const job = running.get(worker);
+            running.delete(worker);
+            if (job && job.id === message.id) {
+                if (message.unsupported) {
+                    stats.failed += 1;
+                    const error = new Error('Unsupported or unrecognised media content');
+                    error.code = 'MEDIA_UNSUPPORTED';
+                    job.reject(error);
+                } else if (message.error) {
+                    stats.failed += 1;
+                    job.reject(new Error(message.error));
+                } else {
+                    stats.processed += 1;
+                    job.resolve({
+                        mimetype: message.mimetype,
+                        width: message.width,
+                        height: message.height,
+                        thumbnail: message.thumbnail
+                            ? { ...message.thumbnail, buffer: Buffer.from(message.thumbnail.buffer) }
+                            : null
+                    });
+                }
+            }
+            idle.push(worker);
+            drain();
+        });
+
+        // A crashed worker fails its job and is replaced on the next drain.
+        worker.on('error', error => {
+            const job = running.get(worker);
+            running.delete(worker);
+            if (job) {
+                stats.failed += 1;
+                job.reject(error);
+            }
+        });
+        worker.on('exit', () => {
+            workers.delete(worker);
+            running.delete(worker);
+            const idleIndex = idle.indexOf(worker);
+            if (idleIndex !== -1) idle.splice(idleIndex, 1);
+            if (!closed) drain();
+        });
+
+        return worker;
+    }
+
+    function drain() {
+        while (queue.length > 0) {
+            let worker = idle.pop();
+            if (!worker) {
+                if (workers.size >= size) return;
+                worker = spawn();
+            }
+
+            const job = queue.shift();
+            running.set(worker, job);
+            worker.postMessage({ id: job.id, path: job.path });
+        }
+    }
+
+    // Resolve to `{ mimetype, width, height, thumbnail }` for the file at
+    // `filePath`, where `mimetype` is sniffed from the content.
+    function processMedia(filePath) {
+        if (closed) {
+            return Promise.reject(new Error('Media pool is closed'));
+        }
+        if (queue.length >= maxQueue) {
+            stats.rejected += 1;
+            const error = new Error('Media processing queue is full');
+            error.code = 'MEDIA_POOL_BUSY';
+            return Promise.reject(error);
+        }
+
+        return new Promise((resolve, reject) => {
+            queue.push({ id: nextJobId++, path: filePath, resolve, reject });
+            drain();
+        });
+    }
+
+    async function close() {
+        closed = true;
+        queue.splice(0).forEach(job => job.reject(new Error('Media pool is closed')));
+        await Promise.all([...workers].map(worker => worker.terminate()));
+    }
+
+    return {
+        process: processMedia,
+        close,
+        stats: () => ({ workers: workers.size, busy: running.size, queued: queue.length, ...stats })
+    };
+}
+
+module.exports = { createMediaPool };
@@ -0,0 +1,298 @@
+// Content-addressed media storage.
+// Uploads are stored once under their SHA-256 hash, either on local disk or in
+// an S3-compatible bucket (AWS S3, MinIO, R2, ...), and messages only keep a
+// short `/media/<hash>.<ext>` reference instead of an inline base64 data URL.
+
+const fs = require('fs');
+const path = require('path');
+const crypto = require('crypto');
+const { Readable } = require('stream');
+const { pipeline } = require('stream/promises');
+
+const MEDIA_ROUTE_PREFIX = '/media/';
+const MEDIA_KEY_PATTERN = /^[a-f0-9]{64}\.[a-z0-9]{2,5}$/;
+const MEDIA_CACHE_CONTROL = 'public, max-age=31536000, immutable';
+
+const EXTENSION_BY_MIMETYPE = {
+    'image/jpeg': 'jpg',
+    'image/jpg': 'jpg',
+    'image/png': 'png',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+    'video/mp4': 'mp4',
+    'video/webm': 'webm',
+    'video/ogg': 'ogg',
+    'video/quicktime': 'mov'
+};
+
+const MIMETYPE_BY_EXTENSION = {
+    jpg: 'image/jpeg',
+    png: 'image/png',
+    gif: 'image/gif',
+    webp: 'image/webp',
+    mp4: 'video/mp4',
+    webm: 'video/webm',
+    ogg: 'video/ogg',
+    mov: 'video/quicktime'
+};
+
+function getMediaExtension(mimetype, originalName = '') {
+    const byMimetype = EXTENSION_BY_MIMETYPE[String(mimetype || '').toLowerCase()];
+    if (byMimetype) {
+        return byMimetype;
+    }
+
+    const byName = path.extname(originalName).replace('.', '').toLowerCase();
+    if (byName === 'jpeg') {
+        return 'jpg';
+    }
+
+    return MIMETYPE_BY_EXTENSION[byName] ? byName : 'bin';
+}
+
+function isValidMediaKey(key) {
+    return typeof key === 'string' && MEDIA_KEY_PATTERN.test(key);
+}
+
+function toMediaUrl(key) {
+    return `${MEDIA_ROUTE_PREFIX}${key}`;
+}
+
+function createLocalMediaBackend(rootDir) {
+    async function exists(key) {
+        try {
+            await fs.promises.access(path.join(rootDir, key));
+            return true;
+        } catch (error) {
+            return false;
+        }
+    }
+
+    async function put(key, buffer) {
+        await fs.promises.mkdir(rootDir, { recursive: true });
+        const finalPath = path.join(rootDir, key);
+        const tempPath = `${finalPath}.${process.pid}.${crypto.randomBytes(6).toString('hex')}.tmp`;
+
+        await fs.promises.writeFile(tempPath, buffer);
+        await fs.promises.rename(tempPath, finalPath);
+    }
+
+    // Move a finished temp file into place; copy when it is on another volume.
+    async function putFile(key, filePath) {
+        await fs.promises.mkdir(rootDir, { recursive: true });
+        const finalPath = path.join(rootDir, key);
+        try {
+            await fs.promises.rename(filePath, finalPath);
+        } catch (error) {
+            if (error.code !== 'EXDEV') throw error;
+            const tempPath = `${finalPath}.${process.pid}.${crypto.randomBytes(6).toString('hex')}.tmp`;
+            await fs.promises.copyFile(filePath, tempPath);
+            await fs.promises.rename(tempPath, finalPath);
+        }
+    }
+
+    function serve(req, res, key) {
+        res.sendFile(key, {
+            root: rootDir,
+            acceptRanges: true,
+            cacheControl: false,
+            etag: false,
+            lastModified: false,
+            headers: {
+                'Cache-Control': MEDIA_CACHE_CONTROL,
+                'Content-Type': MIMETYPE_BY_EXTENSION[path.extname(key).slice(1)] || 'application/octet-stream'
+            }
+        }, error => {
+            if (error && !res.headersSent) {
+                res.status(error.statusCode === 404 || error.code === 'ENOENT' ? 404 : 500).json({ error: 'Media not found' });
+            }
+        });
+    }
+
+    return { name: 'local', exists, put, putFile, serve };
+}
+
+function hmac(key, value) {
+    return crypto.createHmac('sha256', key).update(value).digest();
+}
+
+function sha256Hex(value) {
+    return crypto.createHash('sha256').update(value).digest('hex');
+}
+
+// Minimal AWS Signature V4 client for path-style S3 requests.
+function createS3MediaBackend(config) {
+    const endpoint = config.endpoint.replace(/\/+$/, '');
+    const region = config.region || 'us-east-1';
+    const prefix = config.prefix ? `${config.prefix.replace(/^\/+|\/+$/g, '')}/` : '';
+
+    function signedHeaders(method, objectKey, payloadHash, extraHeaders = {}) {
+        const url = new URL(`${endpoint}/${config.bucket}/${prefix}${objectKey}`);
+        const amzDate = new Date().toISOString().replace(/[:-]|\.\d{3}/g, '');
+        const dateStamp = amzDate.slice(0, 8);
+        const headers = {
+            host: url.host,
+            'x-amz-content-sha256': payloadHash,
+            'x-amz-date': amzDate,
+            ...extraHeaders
+        };
+
+        const headerNames = Object.keys(headers).map(name => name.toLowerCase()).sort();
+        const canonicalHeaders = headerNames.map(name => `${name}:${String(headers[name]).trim()}\n`).join('');
+        const signedHeaderList = headerNames.join(';');
+        const canonicalRequest = [
+            method,
+            url.pathname.split('/').map(encodeURIComponent).join('/'),
+            '',
+            canonicalHeaders,
+            signedHeaderList,
+            payloadHash
+        ].join('\n');
+
+        const scope = `${dateStamp}/${region}/s3/aws4_request`;
+        const stringToSign = ['AWS4-HMAC-SHA256', amzDate, scope, sha256Hex(canonicalRequest)].join('\n');
+        const signingKey = hmac(hmac(hmac(hmac(`AWS4${config.secretAccessKey}`, dateStamp), region), 's3'), 'aws4_request');
+        const signature = crypto.createHmac('sha256', signingKey).update(stringToSign).digest('hex');
+
+        delete headers.host;
+        headers.authorization =
+            `AWS4-HMAC-SHA256 Credential=${config.accessKeyId}/${scope}, SignedHeaders=${signedHeaderList}, Signature=${signature}`;
+
+        return { url: url.toString(), headers };
+    }
+
+    async function exists(key) {
+        const request = signedHeaders('HEAD', key, sha256Hex(''));
+        const response = await fetch(request.url, { method: 'HEAD', headers: request.headers });
+        return response.ok;
+    }
+
+    async function put(key, buffer, contentType) {
+        const request = signedHeaders('PUT', key, sha256Hex(buffer), {
+            'content-type': contentType,
+            'cache-control': MEDIA_CACHE_CONTROL
+        });
+        const response = await fetch(request.url, { method: 'PUT', headers: request.headers, body: buffer });
+
+        if (!response.ok) {
+            throw new Error(`Media upload failed with status ${response.status}`);
+        }
+    }
+
+    // Stream a file from disk; the payload hash is known from the upload.
+    async function putFile(key, filePath, contentType, payloadHash, size) {
+        const request = signedHeaders('PUT', key, payloadHash, {
+            'content-type': contentType,
+            'content-length': String(size),
+            'cache-control': MEDIA_CACHE_CONTROL
+        });
+        const response = await fetch(request.url, {
+            method: 'PUT',
+            headers: request.headers,
+            body: fs.createReadStream(filePath),
+            duplex: 'half'
+        });
+
+        if (!response.ok) {
+            throw new Error(`Media upload failed with status ${response.status}`);
+        }
+    }
+
+    async function serve(req, res, key) {
+        const range = req.get('range');
+        const request = signedHeaders('GET', key, sha256Hex(''), range ? { range } : {});
+
+        try {
+            const response = await fetch(request.url, { headers: request.headers });
+
+            if (!response.ok) {
+                return res.status(response.status === 404 || response.status === 403 ? 404 : 502).json({ error: 'Media not found' });
+            }
+
+            res.status(response.status);
+            res.set('Cache-Control', MEDIA_CACHE_CONTROL);
+            res.set('Accept-Ranges', 'bytes');
+            res.set('Content-Type', MIMETYPE_BY_EXTENSION[path.extname(key).slice(1)] || 'application/octet-stream');
+            ['content-length', 'content-range'].forEach(name => {
+                const value = response.headers.get(name);
+                if (value) {
+                    res.set(name, value);
+                }
+            });
+
+            // pipeline() honours backpressure and, if the client goes away,
+            // destroys the body stream so the upstream S3 request is cancelled.
+            await pipeline(Readable.fromWeb(response.body), res);
+        } catch (error) {
+            if (error.code === 'ERR_STREAM_PREMATURE_CLOSE') {
+                return undefined; // client disconnected mid-download
+            }
+            console.error('Media read failed:', error.message);
+            if (!res.headersSent) {
+                res.status(502).json({ error: 'Media unavailable' });
+            } else {
+                res.destroy(error);
+            }
+        }
+    }
+
+    return { name: 's3', exists, put, putFile, serve };
+}
+
+function createMediaStore(options = {}) {
+    const backend = options.s3 && options.s3.endpoint && options.s3.bucket
+        ? createS3MediaBackend(options.s3)
+        : createLocalMediaBackend(options.rootDir);
+    const knownKeys = new Set();
+
+    // Store a buffer and return its short reference. Identical content is
+    // only written once.
+    async function put(buffer, mimetype, originalName) {
+        const hash = sha256Hex(buffer);
+        const key = `${hash}.${getMediaExtension(mimetype, originalName)}`;
+
+        if (!knownKeys.has(key) && !(await backend.exists(key))) {
+            await backend.put(key, buffer, MIMETYPE_BY_EXTENSION[key.split('.').pop()] || 'application/octet-stream');
+        }
+
+        knownKeys.add(key);
+        return { key, hash, size: buffer.length, url: toMediaUrl(key) };
+    }
+
+    // Store an upload that was already streamed to `filePath` and hashed.
+    // The temp file may be moved into place, so callers must not reuse it.
+    async function putFile(filePath, mimetype, originalName, hash, size) {
+        const key = `${hash}.${getMediaExtension(mimetype, originalName)}`;
+
+        if (!knownKeys.has(key) && !(await backend.exists(key))) {
+            await backend.putFile(key, filePath, MIMETYPE_BY_EXTENSION[key.split('.').pop()] || 'application/octet-stream', hash, size);
+        }
+
+        knownKeys.add(key);
+        return { key, hash, size, url: toMediaUrl(key) };
+    }
+
+    function serve(req, res, key) {
+        if (!isValidMediaKey(key)) {
+            return res.status(404).json({ error: 'Media not found' });
+        }
+
+        const etag = `"${key.split('.')[0]}"`;
+        res.set('ETag', etag);
+        if (req.get('if-none-match') === etag) {
+            res.set('Cache-Control', MEDIA_CACHE_CONTROL);
+            return res.status(304).end();
+        }
+
+        return backend.serve(req, res, key);
+    }
+
+    return { put, putFile, serve, backend: backend.name };
+}
+
+module.exports = {
+    MEDIA_ROUTE_PREFIX,
+    createMediaStore,
+    getMediaExtension,
+    isValidMediaKey
+};
@@ -0,0 +1,194 @@
+// Worker-thread side of the media pool (see media-pool.js).
+// Sniffs the real content type of an uploaded temp file from its magic bytes,
+// reads image dimensions and renders a downscaled thumbnail. Runs off the main
+// event loop so large uploads never stall unrelated requests.
+
+const { parentPort } = require('worker_threads');
+const fs = require('fs');
+const { PNG } = require('pngjs');
+
+const THUMBNAIL_MAX_EDGE = 480;
+// Decoding needs width * height * 4 bytes (about twice that for PNG), whatever
+// the file size: a 100 KB PNG can claim 20000x20000 pixels (1.6 GB). Images
+// above 16 MP (phone photos are ~12 MP) get no thumbnail, which bounds each
+// worker's decode to roughly 64-128 MB.
+const THUMBNAIL_MAX_SOURCE_PIXELS = 16 * 1000 * 1000;
+
+let sharp = null;
+try {
+    // Optional dependency (package.json optionalDependencies): decodes
+    // JPEG/GIF/WebP for thumbnails. Without it only PNG uploads get one.
+    sharp = require('sharp');
+} catch (error) {
+    sharp = null;
+}
+
+function startsWith(buffer, bytes, offset = 0) {
+    return buffer.length >= offset + bytes.length && bytes.every((byte, index) => buffer[offset + index] === byte);
+}
+
+function ascii(buffer, start, end) {
+    return buffer.length >= end ? buffer.toString('latin1', start, end) : '';
+}
+
+function sniffMimetype(buffer) {
+    if (startsWith(buffer, [0xff, 0xd8, 0xff])) return 'image/jpeg';
+    if (startsWith(buffer, [0x89, 0x50, 0x4e, 0x47, 0x0d, 0x0a, 0x1a, 0x0a])) return 'image/png';
+    if (ascii(buffer, 0, 6) === 'GIF87a' || ascii(buffer, 0, 6) === 'GIF89a') return 'image/gif';
+    if (ascii(buffer, 0, 4) === 'RIFF' && ascii(buffer, 8, 12) === 'WEBP') return 'image/webp';
+    if (startsWith(buffer, [0x1a, 0x45, 0xdf, 0xa3])) return 'video/webm';
+    if (ascii(buffer, 0, 4) === 'OggS') return 'video/ogg';
+    if (ascii(buffer, 4, 8) === 'ftyp') {
+        return ascii(buffer, 8, 12) === 'qt  ' ? 'video/quicktime' : 'video/mp4';
+    }
+    return null;
+}
+
+function readJpegSize(buffer) {
+    let offset = 2;
+    while (offset + 9 < buffer.length) {
+        if (buffer[offset] !== 0xff) return null;
+        const marker = buffer[offset + 1];
+        const length = buffer.readUInt16BE(offset + 2);
+        // SOF0..SOF15 except DHT (C4), JPG (C8) and DAC (CC) carry the frame size.
+        if (marker >= 0xc0 && marker <= 0xcf && ![0xc4, 0xc8, 0xcc].includes(marker)) {
+            return { width: buffer.readUInt16BE(offset + 7), height: buffer.readUInt16BE(offset + 5) };
+        }
+        offset += 2 + length;
+    }
+    return null;
+}
+
+function readWebpSize(buffer) {
+    const chunk = ascii(buffer, 12, 16);
+    if (chunk === 'VP8 ' && buffer.length >= 30) {
+        return { width: buffer.readUInt16LE(26) & 0x3fff, height: buffer.readUInt16LE(28) & 0x3fff };
+    }
+    if (chunk === 'VP8L' && buffer.length >= 25) {
+        const bits = buffer.readUInt32LE(21);
+        return { width: (bits & 0x3fff) + 1, height: ((bits >>> 14) & 0x3fff) + 1 };
+    }
+    if (chunk === 'VP8X' && buffer.length >= 30) {
+        return { width: buffer.readUIntLE(24, 3) + 1, height: buffer.readUIntLE(27, 3) + 1 };
+    }
+    return null;
+}
+
+function readImageSize(buffer, mimetype) {
+    if (mimetype === 'image/png' && buffer.length >= 24) {
+        return { width: buffer.readUInt32BE(16), height: buffer.readUInt32BE(20) };
+    }
+    if (mimetype === 'image/gif' && buffer.length >= 10) {
+        return { width: buffer.readUInt16LE(6), height: buffer.readUInt16LE(8) };
+    }
+    if (mimetype === 'image/jpeg') {
+        return readJpegSize(buffer);
+    }
+    if (mimetype === 'image/webp') {
+        return readWebpSize(buffer);
+    }
+    return null;
+}
+
+// Box-filter downscale of RGBA pixels.
+function downscale(source, width, height, targetWidth, targetHeight) {
+    const target = new PNG({ width: targetWidth, height: targetHeight });
+    const xRatio = width / targetWidth;
+    const yRatio = height / targetHeight;
+
+    for (let y = 0; y < targetHeight; y += 1) {
+        const y0 = Math.floor(y * yRatio);
+        const y1 = Math.max(y0 + 1, Math.floor((y + 1) * yRatio));
+        for (let x = 0; x < targetWidth; x += 1) {
+            const x0 = Math.floor(x * xRatio);
+            const x1 = Math.max(x0 + 1, Math.floor((x + 1) * xRatio));
+            const sums = [0, 0, 0, 0];
+            for (let sy = y0; sy < y1; sy += 1) {
+                for (let sx = x0; sx < x1; sx += 1) {
+                    const index = (sy * width + sx) * 4;
+                    sums[0] += source[index];
+                    sums[1] += source[index + 1];
+                    sums[2] += source[index + 2];
+                    sums[3] += source[index + 3];
+                }
+            }
+            const count = (y1 - y0) * (x1 - x0);
+            const targetIndex = (y * targetWidth + x) * 4;
+            for (let channel = 0; channel < 4; channel += 1) {
+                target.data[targetIndex + channel] = Math.round(sums[channel] / count);
+            }
+        }
+    }
+
+    return PNG.sync.write(target);
+}
+
+function fitWithin(width, height) {
+    const scale = Math.min(1, THUMBNAIL_MAX_EDGE / Math.max(width, height));
+    return { width: Math.max(1, Math.round(width * scale)), height: Math.max(1, Math.round(height * scale)) };
+}
+
+async function renderThumbnail(buffer, mimetype, size) {
+    if (!size || Math.max(size.width, size.height) <= THUMBNAIL_MAX_EDGE) {
+        return null; // already small enough to show as is
+    }
+    if (size.width * size.height > THUMBNAIL_MAX_SOURCE_PIXELS) {
+        return null; // checked from the header, before anything is decoded
+    }
+
+    const target = fitWithin(size.width, size.height);
+    if (mimetype === 'image/png') {
+        const decoded = PNG.sync.read(buffer);
+        return { buffer: downscale(decoded.data, decoded.width, decoded.height, target.width, target.height), mimetype: 'image/png', ...target };
+    }
+
+    if (sharp) {
+        const output = await sharp(buffer, { animated: false, limitInputPixels: THUMBNAIL_MAX_SOURCE_PIXELS }).resize(target.width, target.height).webp({ quality: 75 }).toBuffer();
+        return { buffer: output, mimetype: 'image/webp', ...target };
+    }
+
+    return null;
+}
+
+const SNIFF_BYTES = 64;
+
+function readHead(filePath) {
+    const head = Buffer.alloc(SNIFF_BYTES);
+    const fd = fs.openSync(filePath, 'r');
+    try {
+        return head.subarray(0, fs.readSync(fd, head, 0, SNIFF_BYTES, 0));
+    } finally {
+        fs.closeSync(fd);
+    }
+}
+
+// Only images are read in full (they are needed for sizing and thumbnails);
+// videos are sniffed from their first bytes.
+async function processMedia({ path: filePath }) {
+    const mimetype = sniffMimetype(readHead(filePath));
+    if (!mimetype) {
+        return { unsupported: true };
+    }
+    if (!mimetype.startsWith('image/')) {
+        return { mimetype, width: null, height: null, thumbnail: null };
+    }
+
+    const buffer = await fs.promises.readFile(filePath);
+    const size = readImageSize(buffer, mimetype);
+    let thumbnail = null;
+    try {
+        thumbnail = await renderThumbnail(buffer, mimetype, size);
+    } catch (error) {
+        thumbnail = null; // a preview is optional; the original is still valid
+    }
+
+    return { mimetype, width: size ? size.width : null, height: size ? size.height : null, thumbnail };
+}
+
+parentPort.on('message', async task => {
+    try {
+        parentPort.postMessage({ id: task.id, ...(await processMedia(task)) });
+    } catch (error) {
+        parentPort.postMessage({ id: task.id, error: error.message });
+    }
+});
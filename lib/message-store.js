@@ -0,0 +1,528 @@
+// Indexed in-memory message store.
+// Keeps an id -> message map, newest-first and most-liked-first lists per
+// category, running category counts, per-message reply indexes and a
+// most-reported ranking of report summaries, so routes never scan or sort the
+// whole board (or a whole reply tree) to find, count, filter, rank or paginate.
+// Every mutation is recorded in the change feed so delta polling keeps working,
+// and announced to subscribers (persistence, realtime push, ...).
+
+const { createChangeFeed } = require('./change-feed');
+const { createReplyIndex } = require('./reply-index');
+const { addToReportSummary, emptyReportSummary, normalizeReportSummary } = require('./report-summary');
+
+const MESSAGE_CATEGORIES = ['whistleblower', 'controversy', 'thoughts', 'confessions', 'others'];
+const FEED_ORDERS = ['newest', 'trending'];
+
+function getTimeKey(message) {
+    const timestampMs = new Date(message.timestamp).getTime();
+    return Number.isFinite(timestampMs) ? timestampMs : 0;
+}
+
+function getLikesKey(message) {
+    return Number.isFinite(message.likes) ? message.likes : 0;
+}
+
+// Newest first: higher timestamp first, ties broken by higher id.
+function isNewer(a, b) {
+    return a.time > b.time || (a.time === b.time && a.id > b.id);
+}
+
+// Most liked first, newest first among equals.
+function isHotter(a, b) {
+    return a.likes > b.likes || (a.likes === b.likes && isNewer(a, b));
+}
+
+// Most reported first, most recently reported first among equals.
+function isMoreReported(a, b) {
+    if (a.total !== b.total) return a.total > b.total;
+    if (a.last !== b.last) return a.last > b.last;
+    return a.id > b.id;
+}
+
+function reportRankKey(messageId, summary) {
+    const last = new Date(summary.lastReportedAt).getTime();
+    return { id: messageId, total: summary.total, last: Number.isFinite(last) ? last : 0 };
+}
+
+// Opaque page cursors carry the position key of the last item served, so
+// paging stays correct even if that message is deleted in the meantime.
+function encodeFeedCursor(order, key) {
+    return Buffer.from(JSON.stringify({ o: order, t: key.time, i: key.id, l: key.likes }), 'utf8').toString('base64url');
+}
+
+function decodeFeedCursor(cursor, order) {
+    try {
+        const parsed = JSON.parse(Buffer.from(String(cursor), 'base64url').toString('utf8'));
+        if (parsed.o !== order || !Number.isFinite(parsed.t) || !Number.isFinite(parsed.i) || !Number.isFinite(parsed.l)) {
+            return null;
+        }
+
+        return { time: parsed.t, id: parsed.i, likes: parsed.l };
+    } catch (error) {
+        return null;
+    }
+}
+
+function encodeReportsCursor(key) {
+    return Buffer.from(JSON.stringify({ n: key.total, t: key.last, i: key.id }), 'utf8').toString('base64url');
+}
+
+function decodeReportsCursor(cursor) {
+    try {
+        const parsed = JSON.parse(Buffer.from(String(cursor), 'base64url').toString('utf8'));
+        if (!Number.isFinite(parsed.n) || !Number.isFinite(parsed.t) || !Number.isFinite(parsed.i)) {
+            return null;
+        }
+
+        return { total: parsed.n, last: parsed.t, id: parsed.i };
+    } catch (error) {
+        return null;
+    }
+}
+
+function createMessageStore(options = {}) {
+    const feed = options.feed || createChangeFeed({ origin: options.origin });
+    const byId = new Map(); // messageId -> message
+    const rankKeys = new Map(); // messageId -> { id, time, likes } position key in the sorted lists
+    const ordered = []; // all messages, newest first
+    const orderedByCategory = new Map(MESSAGE_CATEGORIES.map(category => [category, []]));
+    const trending = []; // all messages, most liked first
+    const trendingByCategory = new Map(MESSAGE_CATEGORIES.map(category => [category, []]));
+    const reportsById = new Map(); // messageId -> report summary (see report-summary.js)
+    const reportKeys = new Map(); // messageId -> { id, total, last } position in mostReported
+    const mostReported = []; // report rank keys, most reported first
+    const replyIndexes = new Map(); // messageId -> reply index over message.replies
+    const listeners = new Set();
+
+    // type is 'upsert' (new or replaced), 'update' (changed in place),
+    // 'remove' or 'reports' (report list only, not part of the public feed).
+    // Updates carry a `reason` ('likes', 'replies', ...) when the caller knows
+    // which part changed, so subscribers can skip changes they do not care about,
+    // and reply changes also name the reply (`{ replyId, parentReplyId, removed }`).
+    function recordChange(type, messageId, reason = null, reply = null) {
+        if (type === 'remove') {
+            feed.remove(messageId);
+        } else if (type !== 'reports') {
+            feed.touch(messageId);
+        }
+
+        listeners.forEach(listener => {
+            try {
+                listener({ type, messageId, version: feed.version, reason, reply });
+            } catch (error) {
+                console.error('Message store listener failed:', error.message);
+            }
+        });
+    }
+
+    function subscribe(listener) {
+        listeners.add(listener);
+        return () => listeners.delete(listener);
+    }
+
+    // Index of the first entry that does not come before `key`.
+    function findInsertIndex(list, key, before) {
+        let low = 0;
+        let high = list.length;
+
+        while (low < high) {
+            const mid = (low + high) >>> 1;
+            if (before(rankKeys.get(list[mid].id), key)) {
+                low = mid + 1;
+            } else {
+                high = mid;
+            }
+        }
+
+        return low;
+    }
+
+    function insertSorted(list, message, before) {
+        list.splice(findInsertIndex(list, rankKeys.get(message.id), before), 0, message);
+    }
+
+    function removeSorted(list, message, before) {
+        const index = findInsertIndex(list, rankKeys.get(message.id), before);
+        if (list[index] === message) {
+            list.splice(index, 1);
+        }
+    }
+
+    // Index of the first ranking entry that does not come before `key`.
+    function findReportIndex(key, before = isMoreReported) {
+        let low = 0;
+        let high = mostReported.length;
+
+        while (low < high) {
+            const mid = (low + high) >>> 1;
+            if (before(mostReported[mid], key)) {
+                low = mid + 1;
+            } else {
+                high = mid;
+            }
+        }
+
+        return low;
+    }
+
+    // Store (or drop, when null) a message's summary and move it in the
+    // ranking. Reports arrive one at a time, so this is two binary searches.
+    function indexReports(messageId, summary) {
+        const previousKey = reportKeys.get(messageId);
+        if (previousKey) {
+            const index = findReportIndex(previousKey);
+            if (mostReported[index] === previousKey) {
+                mostReported.splice(index, 1);
+            }
+            reportKeys.delete(messageId);
+        }
+
+        if (!summary) {
+            reportsById.delete(messageId);
+            return;
+        }
+
+        const key = reportRankKey(messageId, summary);
+        reportsById.set(messageId, summary);
+        reportKeys.set(messageId, key);
+        mostReported.splice(findReportIndex(key), 0, key);
+    }
+
+    function listForCategory(lists, category) {
+        if (!lists.has(category)) {
+            lists.set(category, []);
+        }
+
+        return lists.get(category);
+    }
+
+    function newestLists(message) {
+        return [ordered, listForCategory(orderedByCategory, message.category)];
+    }
+
+    function trendingLists(message) {
+        return [trending, listForCategory(trendingByCategory, message.category)];
+    }
+
+    function addToIndexes(message) {
+        byId.set(message.id, message);
+        rankKeys.set(message.id, { id: message.id, time: getTimeKey(message), likes: getLikesKey(message) });
+        indexReplies(message);
+
+        newestLists(message).forEach(list => insertSorted(list, message, isNewer));
+        trendingLists(message).forEach(list => insertSorted(list, message, isHotter));
+    }
+
+    function removeFromIndexes(message) {
+        newestLists(message).forEach(list => removeSorted(list, message, isNewer));
+        trendingLists(message).forEach(list => removeSorted(list, message, isHotter));
+
+        byId.delete(message.id);
+        rankKeys.delete(message.id);
+        replyIndexes.delete(message.id);
+    }
+
+    // Move a message within the trending lists after its like count changed.
+    // Likes move by one at a time, so this is a binary search plus a short splice.
+    function syncTrendingRank(message) {
+        const key = rankKeys.get(message.id);
+        const likes = getLikesKey(message);
+        if (!key || key.likes === likes) {
+            return;
+        }
+
+        trendingLists(message).forEach(list => removeSorted(list, message, isHotter));
+        rankKeys.set(message.id, { ...key, likes });
+        trendingLists(message).forEach(list => insertSorted(list, message, isHotter));
+    }
+
+    function indexReplies(message) {
+        if (!Array.isArray(message.replies)) {
+            message.replies = [];
+        }
+
+        replyIndexes.set(message.id, createReplyIndex(message.replies));
+    }
+
+    function get(messageId) {
+        return byId.get(messageId);
+    }
+
+    function has(messageId) {
+        return byId.has(messageId);
+    }
+
+    // Returns the live, newest-first list for a category (or every message).
+    // Callers must treat it as read-only.
+    function list(category, order = 'newest') {
+        const isTrending = order === 'trending';
+        if (!category || category === 'all') {
+            return isTrending ? trending : ordered;
+        }
+
+        return (isTrending ? trendingByCategory : orderedByCategory).get(category) || [];
+    }
+
+    // One page of a category in `newest` or `trending` order. `after` is the
+    // position key of the last item of the previous page (see decodeFeedCursor).
+    function page({ category, order = 'newest', after = null, limit = 20 }) {
+        const source = list(category, order);
+        const before = order === 'trending' ? isHotter : isNewer;
+        const start = after
+            ? findInsertIndex(source, after, (entryKey, cursorKey) => !before(cursorKey, entryKey))
+            : 0;
+        const items = source.slice(start, start + limit);
+        const hasMore = start + limit < source.length;
+
+        return {
+            items,
+            nextCursor: hasMore && items.length > 0
+                ? encodeFeedCursor(order, rankKeys.get(items[items.length - 1].id))
+                : null
+        };
+    }
+
+    function counts() {
+        const result = { all: ordered.length };
+        MESSAGE_CATEGORIES.forEach(category => {
+            result[category] = listForCategory(orderedByCategory, category).length;
+        });
+        return result;
+    }
+
+    // Insert a new message or replace an existing one with the same id.
+    function upsert(message) {
+        const existing = byId.get(message.id);
+        if (existing) {
+            removeFromIndexes(existing);
+        }
+
+        addToIndexes(message);
+        recordChange('upsert', message.id);
+        return message;
+    }
+
+    // Upsert only when the incoming copy differs from the stored one, so
+    // re-reading unchanged rows does not advance the change feed.
+    function merge(message) {
+        const existing = byId.get(message.id);
+        if (existing && JSON.stringify(existing) === JSON.stringify(message)) {
+            return false;
+        }
+
+        upsert(message);
+        return true;
+    }
+
+    // Record an in-place mutation of a stored message; pass `reason`
+    // ('likes' for like counts) when only that part changed, and `replyId`
+    // when it was a reply's like count.
+    function touch(messageId, reason = null, replyId = null) {
+        const message = byId.get(messageId);
+        if (!message) {
+            return false;
+        }
+
+        syncTrendingRank(message);
+        recordChange('update', messageId, reason, replyId === null ? null : { replyId });
+        return true;
+    }
+
+    function remove(messageId) {
+        const message = byId.get(messageId);
+        if (!message) {
+            return null;
+        }
+
+        removeFromIndexes(message);
+        indexReports(messageId, null);
+        recordChange('remove', messageId);
+        return message;
+    }
+
+    // Replace the whole store (e.g. after hydrating from Supabase). Only
+    // messages whose content actually differs advance the change feed.
+    function replaceAll(nextMessages, nextReports = {}) {
+        const previousById = new Map(byId);
+        const previousReports = new Map(reportsById);
+
+        [ordered, trending, ...orderedByCategory.values(), ...trendingByCategory.values()].forEach(entries => {
+            entries.length = 0;
+        });
+        byId.clear();
+        rankKeys.clear();
+        reportsById.clear();
+        reportKeys.clear();
+        mostReported.length = 0;
+        replyIndexes.clear();
+
+        nextMessages.forEach(message => {
+            byId.set(message.id, message);
+            rankKeys.set(message.id, { id: message.id, time: getTimeKey(message), likes: getLikesKey(message) });
+        });
+
+        const byKey = before => (a, b) => {
+            const aKey = rankKeys.get(a.id);
+            const bKey = rankKeys.get(b.id);
+            return before(aKey, bKey) ? -1 : (before(bKey, aKey) ? 1 : 0);
+        };
+        const hottest = [...byId.values()].sort(byKey(isHotter));
+        hottest.forEach(message => trendingLists(message).forEach(entries => entries.push(message)));
+
+        [...byId.values()].sort(byKey(isNewer)).forEach(message => {
+            indexReplies(message);
+            newestLists(message).forEach(entries => entries.push(message));
+
+            const previous = previousById.get(message.id);
+            previousById.delete(message.id);
+            if (!previous || JSON.stringify(previous) !== JSON.stringify(message)) {
+                recordChange('upsert', message.id);
+            }
+        });
+
+        previousById.forEach((message, messageId) => {
+            recordChange('remove', messageId);
+        });
+
+        Object.entries(nextReports || {}).forEach(([messageId, reports]) => {
+            const numericId = Number(messageId);
+            const summary = normalizeReportSummary(reports);
+            if (byId.has(numericId) && summary) {
+                reportsById.set(numericId, summary);
+                reportKeys.set(numericId, reportRankKey(numericId, summary));
+            }
+        });
+        mostReported.push(...[...reportKeys.values()].sort((a, b) => (isMoreReported(a, b) ? -1 : 1)));
+
+        // Report summaries are compared wholesale; tell subscribers when any differ.
+        if (JSON.stringify([...previousReports]) !== JSON.stringify([...reportsById])) {
+            reportsById.forEach((reports, messageId) => recordChange('reports', messageId));
+        }
+    }
+
+    function findReply(messageId, replyId) {
+        const replyIndex = replyIndexes.get(messageId);
+        return replyIndex ? replyIndex.find(replyId) : null;
+    }
+
+    // Add a reply to a message, nested under `parentReplyId` when given.
+    function addReply(messageId, reply, parentReplyId = null) {
+        const replyIndex = replyIndexes.get(messageId);
+        if (!replyIndex || !replyIndex.add(reply, parentReplyId)) {
+            return false;
+        }
+
+        recordChange('update', messageId, 'replies', { replyId: reply.id, parentReplyId });
+        return true;
+    }
+
+    function removeReply(messageId, replyId) {
+        const replyIndex = replyIndexes.get(messageId);
+        if (!replyIndex || !replyIndex.remove(replyId)) {
+            return false;
+        }
+
+        recordChange('update', messageId, 'replies', { replyId, removed: true });
+        return true;
+    }
+
+    // The message's report summary, or null when it has never been reported.
+    function getReports(messageId) {
+        return reportsById.get(messageId) || null;
+    }
+
+    // Replace a message's reports with a summary (or legacy report list).
+    function setReports(messageId, reports) {
+        const nextReports = byId.has(messageId) ? normalizeReportSummary(reports) : null;
+        const previousReports = reportsById.get(messageId) || null;
+        if (JSON.stringify(previousReports) === JSON.stringify(nextReports)) {
+            return;
+        }
+
+        indexReports(messageId, nextReports);
+        recordChange('reports', messageId);
+    }
+
+    // Count one `{ reason, timestamp }` report; returns the new total.
+    function addReport(messageId, report) {
+        if (!byId.has(messageId)) {
+            return 0;
+        }
+
+        const summary = addToReportSummary(reportsById.get(messageId) || emptyReportSummary(), report);
+        indexReports(messageId, summary);
+        recordChange('reports', messageId);
+        return summary.total;
+    }
+
+    // One page of reported messages, most reported first. `after` is the rank
+    // key of the last item of the previous page (see decodeReportsCursor).
+    function reportsPage({ after = null, limit = 20 } = {}) {
+        const start = after
+            ? findReportIndex(after, (entryKey, cursorKey) => !isMoreReported(cursorKey, entryKey))
+            : 0;
+        const keys = mostReported.slice(start, start + limit);
+        const items = keys.map(key => ({ ...byId.get(key.id), reports: reportsById.get(key.id) }));
+        const hasMore = start + limit < mostReported.length;
+
+        return {
+            items,
+            total: mostReported.length,
+            nextCursor: hasMore && keys.length > 0 ? encodeReportsCursor(keys[keys.length - 1]) : null
+        };
+    }
+
+    // Plain-object views in the persisted snapshot shape.
+    function likesSnapshot() {
+        const likes = {};
+        byId.forEach((message, messageId) => {
+            likes[messageId] = Number.isFinite(message.likes) ? message.likes : 0;
+        });
+        return likes;
+    }
+
+    function reportsSnapshot() {
+        const reports = {};
+        reportsById.forEach((messageReports, messageId) => {
+            reports[messageId] = messageReports;
+        });
+        return reports;
+    }
+
+    return {
+        get,
+        has,
+        list,
+        page,
+        counts,
+        upsert,
+        merge,
+        touch,
+        remove,
+        replaceAll,
+        findReply,
+        addReply,
+        removeReply,
+        getReports,
+        setReports,
+        addReport,
+        reportsPage,
+        likesSnapshot,
+        reportsSnapshot,
+        subscribe,
+        changesSince: sinceVersion => feed.changesSince(sinceVersion),
+        parseVersion: tag => feed.parseVersion(tag),
+        get size() {
+            return byId.size;
+        },
+        get version() {
+            return feed.version;
+        },
+        // Version as sent to clients (node-qualified in scale-out mode)
+        get versionTag() {
+            return feed.versionTag;
+        }
+    };
+}
+
+module.exports = { MESSAGE_CATEGORIES, FEED_ORDERS, createMessageStore, decodeFeedCursor, decodeReportsCursor };
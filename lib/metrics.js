@@ -0,0 +1,168 @@
+// Prometheus instrumentation for the hot paths: HTTP routes (by route
+// template), Supabase calls, journal flushes, hydration and store size.
+// Default Node metrics include event-loop lag and its percentiles.
+
+const client = require('prom-client');
+
+const LATENCY_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5];
+
+function createMetrics(options = {}) {
+    const { gauges = {}, counters = {} } = options;
+    const register = new client.Registry();
+
+    client.collectDefaultMetrics({ register, eventLoopMonitoringPrecision: 10 });
+
+    const httpRequestCount = new client.Counter({
+        name: 'http_requests_total',
+        help: 'Total number of HTTP requests',
+        labelNames: ['method', 'route', 'status'],
+        registers: [register]
+    });
+
+    const httpRequestDuration = new client.Histogram({
+        name: 'http_request_duration_seconds',
+        help: 'HTTP request duration in seconds',
+        labelNames: ['method', 'route', 'status'],
+        buckets: LATENCY_BUCKETS,
+        registers: [register]
+    });
+
+    const supabaseDuration = new client.Histogram({
+        name: 'stickly_supabase_request_duration_seconds',
+        help: 'Supabase call latency in seconds',
+        labelNames: ['operation'],
+        buckets: LATENCY_BUCKETS,
+        registers: [register]
+    });
+
+    const supabaseErrors = new client.Counter({
+        name: 'stickly_supabase_errors_total',
+        help: 'Failed Supabase calls',
+        labelNames: ['operation'],
+        registers: [register]
+    });
+
+    const persistenceFlushDuration = new client.Histogram({
+        name: 'stickly_persistence_flush_duration_seconds',
+        help: 'Journal flush duration in seconds (including compaction when it runs)',
+        buckets: LATENCY_BUCKETS,
+        registers: [register]
+    });
+
+    const persistenceSnapshotBytes = new client.Gauge({
+        name: 'stickly_persistence_snapshot_bytes',
+        help: 'Size of the last compacted snapshot in bytes',
+        registers: [register]
+    });
+
+    const hydrationDuration = new client.Histogram({
+        name: 'stickly_hydration_duration_seconds',
+        help: 'Supabase hydration duration in seconds',
+        labelNames: ['mode'],
+        buckets: LATENCY_BUCKETS,
+        registers: [register]
+    });
+
+    const hydrationRows = new client.Counter({
+        name: 'stickly_hydration_rows_total',
+        help: 'Rows read from Supabase during hydration',
+        labelNames: ['mode'],
+        registers: [register]
+    });
+
+    const writeRejections = new client.Counter({
+        name: 'stickly_write_rejections_total',
+        help: 'Write requests refused by admission control',
+        labelNames: ['class', 'reason'],
+        registers: [register]
+    });
+
+    // Point-in-time values (store size, queue depth, ...) read at scrape time.
+    Object.entries(gauges).forEach(([name, { help, read }]) => {
+        new client.Gauge({
+            name,
+            help,
+            registers: [register],
+            collect() {
+                this.set(read());
+            }
+        });
+    });
+
+    // Running totals kept elsewhere (cache hits, ...), exported as counters:
+    // each scrape adds whatever the total grew by since the previous one.
+    Object.entries(counters).forEach(([name, { help, read }]) => {
+        let lastTotal = 0;
+        new client.Counter({
+            name,
+            help,
+            registers: [register],
+            collect() {
+                const total = read();
+                if (total > lastTotal) {
+                    this.inc(total - lastTotal);
+                }
+                lastTotal = total;
+            }
+        });
+    });
+
+    // Express middleware; labels use the matched route template, not req.path.
+    function httpMiddleware(req, res, next) {
+        const end = httpRequestDuration.startTimer();
+        res.on('finish', () => {
+            const route = req.route ? `${req.baseUrl}${req.route.path}` : 'unmatched';
+            const labels = { method: req.method, route, status: res.statusCode };
+            httpRequestCount.inc(labels);
+            end(labels);
+        });
+        next();
+    }
+
+    // Time a Supabase call; a rejected promise counts as an error and is rethrown.
+    async function timeSupabase(operation, call) {
+        const end = supabaseDuration.startTimer({ operation });
+        try {
+            const result = await call();
+            if (result && result.error) {
+                supabaseErrors.inc({ operation });
+            }
+            return result;
+        } catch (error) {
+            supabaseErrors.inc({ operation });
+            throw error;
+        } finally {
+            end();
+        }
+    }
+
+    function observeFlush(durationMs) {
+        persistenceFlushDuration.observe(durationMs / 1000);
+    }
+
+    function observeSnapshot(bytes) {
+        persistenceSnapshotBytes.set(bytes);
+    }
+
+    function observeHydration(mode, durationMs, rowCount) {
+        hydrationDuration.observe({ mode }, durationMs / 1000);
+        hydrationRows.inc({ mode }, rowCount);
+    }
+
+    // `reason` is 'rate_limited', 'write_concurrency' or 'sync_backlog'.
+    function observeWriteRejection(routeClass, reason) {
+        writeRejections.inc({ class: routeClass, reason });
+    }
+
+    return {
+        register,
+        httpMiddleware,
+        timeSupabase,
+        observeFlush,
+        observeSnapshot,
+        observeHydration,
+        observeWriteRejection
+    };
+}
+
+module.exports = { createMetrics };
@@ -0,0 +1,272 @@
+// Append-only journal persistence for the message store.
+// Changed messages are appended to an NDJSON journal and fsync'd in batches;
+// once the journal grows past a threshold it is compacted into a compact
+// snapshot written with an atomic rename. Startup replays snapshot + journal.
+
+const fs = require('fs');
+const path = require('path');
+const readline = require('readline');
+
+const EMPTY_STATE = { messages: [], messageLikes: {}, messageReports: {} };
+
+// `seedFile` is read instead when `snapshotFile` does not exist yet.
+async function readSnapshot(snapshotFile, seedFile = null) {
+    let raw;
+    try {
+        raw = await fs.promises.readFile(snapshotFile, 'utf8');
+    } catch (error) {
+        if (error.code === 'ENOENT') {
+            return seedFile ? readSnapshot(seedFile) : { ...EMPTY_STATE };
+        }
+        throw error;
+    }
+
+    if (!raw.trim()) {
+        return { ...EMPTY_STATE };
+    }
+
+    const parsed = JSON.parse(raw);
+    return {
+        messages: Array.isArray(parsed.messages) ? parsed.messages : [],
+        messageLikes: parsed.messageLikes && typeof parsed.messageLikes === 'object' ? parsed.messageLikes : {},
+        messageReports: parsed.messageReports && typeof parsed.messageReports === 'object' ? parsed.messageReports : {}
+    };
+}
+
+// Apply journal records on top of the snapshot. A torn final line (crash
+// mid-append) is ignored.
+async function replayJournal(journalFile, state) {
+    const messagesById = new Map(state.messages.map(message => [message.id, message]));
+    const reports = { ...state.messageReports };
+    const likes = { ...state.messageLikes };
+    let records = 0;
+    let bytes = 0;
+
+    try {
+        await fs.promises.access(journalFile);
+    } catch (error) {
+        return { state, records, bytes };
+    }
+
+    const lines = readline.createInterface({
+        input: fs.createReadStream(journalFile, { encoding: 'utf8' }),
+        crlfDelay: Infinity
+    });
+
+    for await (const line of lines) {
+        bytes += Buffer.byteLength(line) + 1;
+        if (!line.trim()) {
+            continue;
+        }
+
+        let record;
+        try {
+            record = JSON.parse(line);
+        } catch (error) {
+            console.error('Skipping unreadable journal record');
+            continue;
+        }
+
+        records += 1;
+        if (record.op === 'put' && record.message) {
+            messagesById.set(record.message.id, record.message);
+            likes[record.message.id] = record.message.likes;
+            // Report summaries (or legacy report lists) are normalized by the store.
+            if (record.reports && (!Array.isArray(record.reports) || record.reports.length > 0)) {
+                reports[record.message.id] = record.reports;
+            } else {
+                delete reports[record.message.id];
+            }
+        } else if (record.op === 'del') {
+            messagesById.delete(record.id);
+            delete likes[record.id];
+            delete reports[record.id];
+        }
+    }
+
+    return {
+        state: { messages: [...messagesById.values()], messageLikes: likes, messageReports: reports },
+        records,
+        bytes
+    };
+}
+
+function createJournalPersistence(options) {
+    const {
+        snapshotFile,
+        seedSnapshotFile = null,
+        journalFile,
+        store,
+        flushDelayMs = 120,
+        compactAfterRecords = 2000,
+        compactAfterBytes = 8 * 1024 * 1024,
+        onFlush = () => {},
+        onSnapshot = () => {}
+    } = options;
+
+    const dirty = new Set(); // messageIds changed since the last flush
+    let flushTimer = null;
+    let flushPromise = null;
+    let journalHandle = null;
+    let journalRecords = 0;
+    let journalBytes = 0;
+    const stats = {
+        flushes: 0,
+        compactions: 0,
+        lastFlushDurationMs: 0,
+        lastSnapshotBytes: 0,
+        lastError: null
+    };
+
+    async function load() {
+        try {
+            const snapshot = await readSnapshot(snapshotFile, seedSnapshotFile);
+            const replayed = await replayJournal(journalFile, snapshot);
+            journalRecords = replayed.records;
+            journalBytes = replayed.bytes;
+            return replayed.state;
+        } catch (error) {
+            console.error('Failed to load persisted data, starting with empty state:', error.message);
+            return { ...EMPTY_STATE };
+        }
+    }
+
+    function scheduleFlush() {
+        if (flushTimer) {
+            return;
+        }
+
+        flushTimer = setTimeout(() => {
+            flushTimer = null;
+            flush();
+        }, flushDelayMs);
+    }
+
+    // Start journaling store changes (call after the loaded state is in the store).
+    function start() {
+        store.subscribe(({ messageId }) => {
+            dirty.add(messageId);
+            scheduleFlush();
+        });
+    }
+
+    async function openJournal() {
+        if (!journalHandle) {
+            await fs.promises.mkdir(path.dirname(journalFile), { recursive: true });
+            journalHandle = await fs.promises.open(journalFile, 'a');
+        }
+        return journalHandle;
+    }
+
+    async function writeSnapshot() {
+        const snapshot = JSON.stringify({
+            messages: store.list(),
+            messageLikes: store.likesSnapshot(),
+            messageReports: store.reportsSnapshot()
+        });
+        const tempFile = `${snapshotFile}.${process.pid}.tmp`;
+
+        await fs.promises.mkdir(path.dirname(snapshotFile), { recursive: true });
+        const handle = await fs.promises.open(tempFile, 'w');
+        try {
+            await handle.writeFile(snapshot, 'utf8');
+            await handle.sync();
+        } finally {
+            await handle.close();
+        }
+        await fs.promises.rename(tempFile, snapshotFile);
+        stats.lastSnapshotBytes = Buffer.byteLength(snapshot);
+        onSnapshot(stats.lastSnapshotBytes);
+    }
+
+    // Fold the journal into a fresh snapshot. The snapshot is renamed into
+    // place before the journal is truncated, so a crash in between only
+    // replays records that are already reflected in the snapshot.
+    async function compact() {
+        await writeSnapshot();
+        const handle = await openJournal();
+        await handle.truncate(0);
+        await handle.sync();
+        journalRecords = 0;
+        journalBytes = 0;
+        stats.compactions += 1;
+    }
+
+    async function writeDirtyRecords() {
+        const ids = [...dirty];
+        dirty.clear();
+
+        const payload = ids.map(messageId => {
+            const message = store.get(messageId);
+            const record = message
+                ? { op: 'put', message, reports: store.getReports(messageId) }
+                : { op: 'del', id: messageId };
+            return `${JSON.stringify(record)}\n`;
+        }).join('');
+
+        try {
+            const handle = await openJournal();
+            await handle.write(payload);
+            await handle.sync();
+        } catch (error) {
+            ids.forEach(messageId => dirty.add(messageId));
+            throw error;
+        }
+
+        journalRecords += ids.length;
+        journalBytes += Buffer.byteLength(payload);
+    }
+
+    function flush() {
+        if (flushPromise) {
+            return flushPromise.then(() => (dirty.size > 0 ? flush() : undefined));
+        }
+
+        flushPromise = (async () => {
+            const startedAt = Date.now();
+            try {
+                if (dirty.size > 0) {
+                    await writeDirtyRecords();
+                }
+
+                if (journalRecords >= compactAfterRecords || journalBytes >= compactAfterBytes) {
+                    await compact();
+                }
+
+                stats.flushes += 1;
+                stats.lastFlushDurationMs = Date.now() - startedAt;
+                onFlush(stats.lastFlushDurationMs);
+            } catch (error) {
+                stats.lastError = error.message;
+                console.error('Failed to save persisted data:', error.message);
+            } finally {
+                flushPromise = null;
+            }
+
+            if (dirty.size > 0) {
+                scheduleFlush();
+            }
+        })();
+
+        return flushPromise;
+    }
+
+    function getStats() {
+        return {
+            pending: dirty.size,
+            journalRecords,
+            journalBytes,
+            ...stats
+        };
+    }
+
+    return {
+        load,
+        start,
+        flush,
+        compact,
+        stats: getStats
+    };
+}
+
+module.exports = { createJournalPersistence };
@@ -0,0 +1,217 @@
+// Socket.io push channel for the message feed.
+// Store changes made in the same tick are coalesced into one compact delta
+// per category room ({ version, messages, removed }, the same shape as
+// `GET /api/messages?since=`, plus `patches`). Like counts and reply changes
+// go out as patches ({ id, likes, replies: [reply ops] }) rather than the
+// whole message with its reply tree. Idle sockets cost nothing between changes.
+// A (re)connecting client sends the last version it saw and is caught up
+// from the change feed before live deltas resume.
+
+const MAX_RESUME_PAGE = 100;
+
+const ALL_ROOM = 'feed:all';
+
+function roomFor(category) {
+    return category && category !== 'all' ? `feed:${category}` : ALL_ROOM;
+}
+
+function createRealtimeFeed(options) {
+    const { io, store, categories, ready = Promise.resolve() } = options;
+    const categoryById = new Map(); // messageId -> category, so removals reach the right room
+    const changed = new Set(); // sent whole
+    const patched = new Map(); // messageId -> { likes, replyOps, likedReplies }
+    const removed = new Set();
+    let flushScheduled = false;
+    const stats = { broadcasts: 0, resumes: 0 };
+
+    store.list().forEach(message => categoryById.set(message.id, message.category));
+
+    function buildDelta(category, messages, removedIds, patches = []) {
+        return { category, version: store.versionTag, full: false, messages, removed: removedIds, patches };
+    }
+
+    function pendingPatch(messageId) {
+        if (!patched.has(messageId)) {
+            patched.set(messageId, { likes: false, replyOps: [], likedReplies: new Set() });
+        }
+
+        return patched.get(messageId);
+    }
+
+    // Reply additions are copied when they happen, so replies nested under them
+    // later in the same tick are not sent twice; like counts are read at flush.
+    function recordPatch(messageId, reason, reply) {
+        const patch = pendingPatch(messageId);
+        if (!reply) {
+            patch.likes = true;
+        } else if (reply.removed) {
+            patch.replyOps.push({ op: 'remove', id: reply.replyId });
+        } else if (reason === 'replies') {
+            const added = store.findReply(messageId, reply.replyId);
+            if (added) {
+                patch.replyOps.push({ op: 'add', parentId: reply.parentReplyId || null, reply: JSON.parse(JSON.stringify(added)) });
+            }
+        } else if (!patch.likedReplies.has(reply.replyId)) {
+            patch.likedReplies.add(reply.replyId);
+            patch.replyOps.push({ op: 'likes', id: reply.replyId });
+        }
+    }
+
+    function buildPatch(message, patch) {
+        const result = { id: message.id };
+        if (patch.likes) {
+            result.likes = message.likes || 0;
+        }
+
+        const replies = patch.replyOps
+            .map(replyOp => {
+                if (replyOp.op !== 'likes') return replyOp;
+                const reply = store.findReply(message.id, replyOp.id);
+                return reply ? { op: 'likes', id: replyOp.id, likes: reply.likes || 0 } : null;
+            })
+            .filter(Boolean);
+        if (replies.length > 0) {
+            result.replies = replies;
+        }
+
+        return result;
+    }
+
+    function flush() {
+        flushScheduled = false;
+        if (changed.size === 0 && patched.size === 0 && removed.size === 0) {
+            return;
+        }
+
+        const messagesByRoom = new Map();
+        const patchesByRoom = new Map();
+        const removedByRoom = new Map();
+        const addTo = (roomMap, room, value) => {
+            if (!roomMap.has(room)) roomMap.set(room, []);
+            roomMap.get(room).push(value);
+        };
+
+        changed.forEach(messageId => {
+            const message = store.get(messageId);
+            if (!message) return;
+            addTo(messagesByRoom, ALL_ROOM, message);
+            addTo(messagesByRoom, roomFor(message.category), message);
+        });
+
+        patched.forEach((patch, messageId) => {
+            const message = store.get(messageId);
+            if (!message) return;
+            const messagePatch = buildPatch(message, patch);
+            addTo(patchesByRoom, ALL_ROOM, messagePatch);
+            addTo(patchesByRoom, roomFor(message.category), messagePatch);
+        });
+
+        removed.forEach(messageId => {
+            addTo(removedByRoom, ALL_ROOM, messageId);
+            const category = categoryById.get(messageId);
+            if (category) {
+                addTo(removedByRoom, roomFor(category), messageId);
+            }
+            categoryById.delete(messageId);
+        });
+
+        changed.clear();
+        patched.clear();
+        removed.clear();
+
+        const rooms = new Set([...messagesByRoom.keys(), ...patchesByRoom.keys(), ...removedByRoom.keys()]);
+        rooms.forEach(room => {
+            const category = room === ALL_ROOM ? 'all' : room.slice('feed:'.length);
+            io.to(room).emit('feed:delta', buildDelta(
+                category,
+                messagesByRoom.get(room) || [],
+                removedByRoom.get(room) || [],
+                patchesByRoom.get(room) || []
+            ));
+            stats.broadcasts += 1;
+        });
+    }
+
+    store.subscribe(({ type, messageId, reason, reply }) => {
+        if (type === 'reports') {
+            return;
+        }
+
+        if (type === 'remove') {
+            changed.delete(messageId);
+            patched.delete(messageId);
+            removed.add(messageId);
+        } else if (type === 'update' && (reason === 'likes' || (reason === 'replies' && reply)) && !removed.has(messageId)) {
+            if (!changed.has(messageId)) recordPatch(messageId, reason, reply);
+        } else {
+            removed.delete(messageId);
+            patched.delete(messageId);
+            changed.add(messageId);
+            const message = store.get(messageId);
+            if (message) categoryById.set(messageId, message.category);
+        }
+
+        if (!flushScheduled) {
+            flushScheduled = true;
+            setImmediate(flush);
+        }
+    });
+
+    // Catch a client up from `since`; falls back to a full category snapshot
+    // (or its first `limit` messages plus `nextCursor`) when the version is too
+    // old for the change feed.
+    function resume(socket, category, since, limit) {
+        if (since === null || since === undefined || since === '') {
+            socket.emit('feed:delta', buildDelta(category, [], []));
+            return;
+        }
+
+        // A version minted by another node parses to NaN and gets a snapshot.
+        stats.resumes += 1;
+        const changes = store.changesSince(store.parseVersion(since));
+        const inCategory = message => message && (category === 'all' || message.category === category);
+
+        if (changes) {
+            socket.emit('feed:delta', buildDelta(
+                category,
+                changes.changed.map(messageId => store.get(messageId)).filter(inCategory),
+                changes.removed
+            ));
+            return;
+        }
+
+        const pageLimit = Number.parseInt(limit, 10);
+        if (Number.isInteger(pageLimit) && pageLimit > 0) {
+            const feedPage = store.page({ category, limit: Math.min(pageLimit, MAX_RESUME_PAGE) });
+            socket.emit('feed:delta', {
+                category,
+                version: store.versionTag,
+                full: true,
+                messages: feedPage.items,
+                removed: [],
+                nextCursor: feedPage.nextCursor
+            });
+            return;
+        }
+
+        socket.emit('feed:delta', { category, version: store.versionTag, full: true, messages: store.list(category), removed: [] });
+    }
+
+    io.on('connection', socket => {
+        socket.on('feed:subscribe', (payload = {}) => {
+            const category = categories.includes(payload.category) ? payload.category : 'all';
+
+            socket.rooms.forEach(room => {
+                if (room.startsWith('feed:')) socket.leave(room);
+            });
+            socket.join(roomFor(category));
+            ready.then(() => resume(socket, category, payload.since, payload.limit));
+        });
+    });
+
+    return {
+        stats: () => ({ connections: io.engine.clientsCount, ...stats })
+    };
+}
+
+module.exports = { createRealtimeFeed };
@@ -0,0 +1,80 @@
+// Index over one message's nested reply tree.
+// Maps every reply id to its node and the sibling list that holds it, so
+// likes, nested replies and deletes no longer walk the whole tree.
+
+function createReplyIndex(rootReplies) {
+    const entries = new Map(); // replyId -> { reply, siblings }
+
+    function indexSubtree(replyList) {
+        if (!Array.isArray(replyList)) {
+            return;
+        }
+
+        replyList.forEach(reply => {
+            entries.set(reply.id, { reply, siblings: replyList });
+            indexSubtree(reply.replies);
+        });
+    }
+
+    function unindexSubtree(reply) {
+        entries.delete(reply.id);
+        if (Array.isArray(reply.replies)) {
+            reply.replies.forEach(unindexSubtree);
+        }
+    }
+
+    indexSubtree(rootReplies);
+
+    function find(replyId) {
+        const entry = entries.get(replyId);
+        return entry ? entry.reply : null;
+    }
+
+    // Attach `reply` under `parentReplyId`, or to the root list when null.
+    function add(reply, parentReplyId = null) {
+        let siblings = rootReplies;
+
+        if (parentReplyId !== null) {
+            const parent = find(parentReplyId);
+            if (!parent) {
+                return false;
+            }
+
+            if (!Array.isArray(parent.replies)) {
+                parent.replies = [];
+            }
+            siblings = parent.replies;
+        }
+
+        siblings.push(reply);
+        indexSubtree([reply]);
+        entries.set(reply.id, { reply, siblings });
+        return true;
+    }
+
+    function remove(replyId) {
+        const entry = entries.get(replyId);
+        if (!entry) {
+            return false;
+        }
+
+        const position = entry.siblings.indexOf(entry.reply);
+        if (position !== -1) {
+            entry.siblings.splice(position, 1);
+        }
+
+        unindexSubtree(entry.reply);
+        return true;
+    }
+
+    return {
+        find,
+        add,
+        remove,
+        get size() {
+            return entries.size;
+        }
+    };
+}
+
+module.exports = { createReplyIndex };
@@ -0,0 +1,76 @@
+// Bounded per-message report summaries.
+// A message's reports are kept as per-reason counters plus a short sample of
+// the most recent reports, so a brigaded post costs the same few hundred
+// bytes in memory, on disk and in its Supabase row as a post reported once.
+//
+//   { total, reasons: { spam: 3, ... }, recent: [{ reason, timestamp }], lastReportedAt }
+
+const REPORT_REASONS = ['spam', 'harassment', 'hate', 'violence', 'inappropriate', 'other'];
+const REPORT_SAMPLE_SIZE = 10;
+
+// Free-text or legacy reasons ("No reason provided") are counted as 'other'.
+function normalizeReason(reason) {
+    const value = String(reason || '').trim().toLowerCase();
+    return REPORT_REASONS.includes(value) ? value : 'other';
+}
+
+function emptyReportSummary() {
+    return { total: 0, reasons: {}, recent: [], lastReportedAt: null };
+}
+
+// Fold one report into `summary` in place and return it.
+function addToReportSummary(summary, report) {
+    const reason = normalizeReason(report && report.reason);
+    const timestamp = (report && report.timestamp) || new Date().toISOString();
+
+    summary.total += 1;
+    summary.reasons[reason] = (summary.reasons[reason] || 0) + 1;
+    summary.recent.push({ reason, timestamp });
+    if (summary.recent.length > REPORT_SAMPLE_SIZE) {
+        summary.recent.splice(0, summary.recent.length - REPORT_SAMPLE_SIZE);
+    }
+    if (!summary.lastReportedAt || timestamp > summary.lastReportedAt) {
+        summary.lastReportedAt = timestamp;
+    }
+
+    return summary;
+}
+
+// Accept a summary or a legacy `[{ reason, timestamp }]` history (persisted
+// snapshots and Supabase rows written before summaries). Returns null when
+// there are no reports.
+function normalizeReportSummary(value) {
+    if (Array.isArray(value)) {
+        return value.length > 0 ? value.reduce(addToReportSummary, emptyReportSummary()) : null;
+    }
+
+    if (!value || typeof value !== 'object' || !Number.isFinite(value.total) || value.total <= 0) {
+        return null;
+    }
+
+    const reasons = {};
+    Object.entries(value.reasons || {}).forEach(([reason, count]) => {
+        if (Number.isFinite(count) && count > 0) {
+            const key = normalizeReason(reason);
+            reasons[key] = (reasons[key] || 0) + count;
+        }
+    });
+
+    return {
+        total: value.total,
+        reasons,
+        recent: (Array.isArray(value.recent) ? value.recent : []).slice(-REPORT_SAMPLE_SIZE).map(report => ({
+            reason: normalizeReason(report && report.reason),
+            timestamp: (report && report.timestamp) || null
+        })),
+        lastReportedAt: typeof value.lastReportedAt === 'string' ? value.lastReportedAt : null
+    };
+}
+
+module.exports = {
+    REPORT_REASONS,
+    REPORT_SAMPLE_SIZE,
+    addToReportSummary,
+    emptyReportSummary,
+    normalizeReportSummary
+};
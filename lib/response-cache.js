@@ -0,0 +1,102 @@
+// Cache of serialized (and compressed) JSON responses keyed by request shape
+// and store version. A body is serialized at most once per version and each
+// encoding is compressed at most once, so the CPU spent on the feed follows
+// the write rate instead of the read rate. Entries are evicted LRU. Callers
+// pass a null key for request shapes that should not take a cache slot
+// (arbitrary cursors or versions), which are serialized per request.
+
+const zlib = require('zlib');
+
+const ENCODINGS = ['br', 'gzip'];
+
+// Pick the best encoding the client accepts (ignores q-values other than 0).
+function negotiateEncoding(acceptEncoding) {
+    const accepted = new Set();
+    String(acceptEncoding || '').split(',').forEach(part => {
+        const [name, ...params] = part.trim().toLowerCase().split(';');
+        const refused = params.some(param => /^\s*q=0(\.0*)?\s*$/.test(param));
+        if (name && !refused) accepted.add(name);
+    });
+
+    return ENCODINGS.find(encoding => accepted.has(encoding)) || null;
+}
+
+function compress(encoding, body) {
+    if (encoding === 'br') {
+        return zlib.brotliCompressSync(body, {
+            params: {
+                [zlib.constants.BROTLI_PARAM_QUALITY]: 5,
+                [zlib.constants.BROTLI_PARAM_SIZE_HINT]: body.length
+            }
+        });
+    }
+
+    return zlib.gzipSync(body, { level: 6 });
+}
+
+function createResponseCache(options = {}) {
+    const { maxEntries = 256, minCompressBytes = 1024 } = options;
+    const entries = new Map(); // key -> { version, body, encoded: Map(encoding -> Buffer) }
+    const stats = { hits: 0, misses: 0, uncached: 0, compressions: 0 };
+
+    function getEntry(key, version, build) {
+        if (key === null) {
+            stats.uncached += 1;
+            return { version, body: Buffer.from(JSON.stringify(build()), 'utf8'), encoded: new Map() };
+        }
+
+        const cached = entries.get(key);
+        if (cached && cached.version === version) {
+            stats.hits += 1;
+            // Refresh LRU position.
+            entries.delete(key);
+            entries.set(key, cached);
+            return cached;
+        }
+
+        stats.misses += 1;
+        const entry = {
+            version,
+            body: Buffer.from(JSON.stringify(build()), 'utf8'),
+            encoded: new Map()
+        };
+
+        entries.delete(key);
+        entries.set(key, entry);
+        if (entries.size > maxEntries) {
+            entries.delete(entries.keys().next().value);
+        }
+
+        return entry;
+    }
+
+    // Send the JSON for `key` at `version`, building it with `build()` on a miss
+    // (or every time, when `key` is null).
+    function sendJson(req, res, key, version, build) {
+        const entry = getEntry(key, version, build);
+        const encoding = entry.body.length >= minCompressBytes ? negotiateEncoding(req.get('Accept-Encoding')) : null;
+        let payload = entry.body;
+
+        if (encoding) {
+            if (!entry.encoded.has(encoding)) {
+                entry.encoded.set(encoding, compress(encoding, entry.body));
+                stats.compressions += 1;
+            }
+            payload = entry.encoded.get(encoding);
+            res.set('Content-Encoding', encoding);
+        }
+
+        res.vary('Accept-Encoding');
+        res.set('Content-Type', 'application/json; charset=utf-8');
+        res.set('Content-Length', String(payload.length));
+        res.end(req.method === 'HEAD' ? undefined : payload);
+    }
+
+    return {
+        sendJson,
+        clear: () => entries.clear(),
+        stats: () => ({ entries: entries.size, ...stats })
+    };
+}
+
+module.exports = { createResponseCache, negotiateEncoding };
@@ -0,0 +1,264 @@
+// In-memory inverted index over message text, reply text and usernames.
+// Postings map each term to the messages containing it with a field weight
+// (message text > author name > replies). Terms are also kept sorted so a
+// query token matches every term it is a prefix of with a binary search.
+//
+// Updates are incremental and lazy: the store's change feed marks messages
+// dirty, a background pass re-indexes them in small batches, and a search
+// first indexes whatever is still dirty, so results always reflect the store.
+
+const FIELD_WEIGHTS = { text: 3, username: 2, reply: 1 };
+const MAX_TERM_LENGTH = 32;
+const MAX_QUERY_TOKENS = 8;
+const MAX_PREFIX_EXPANSIONS = 256;
+const MIN_PREFIX_LENGTH = 2;
+const PREFIX_MATCH_FACTOR = 0.5; // prefix hits rank below whole-word hits
+const REINDEX_BATCH_SIZE = 500;
+
+function tokenize(value) {
+    if (typeof value !== 'string' || value.length === 0) {
+        return [];
+    }
+
+    const tokens = value
+        .normalize('NFKD')
+        .replace(/[\u0300-\u036f]/g, '') // strip accents: "café" matches "cafe"
+        .toLowerCase()
+        .match(/[\p{L}\p{N}]+/gu);
+
+    return tokens ? tokens.filter(token => token.length <= MAX_TERM_LENGTH) : [];
+}
+
+function documentTerms(message) {
+    const terms = new Map(); // term -> weight
+    const add = (value, weight) => {
+        tokenize(value).forEach(term => terms.set(term, (terms.get(term) || 0) + weight));
+    };
+
+    add(message.text, FIELD_WEIGHTS.text);
+    add(message.username, FIELD_WEIGHTS.username);
+
+    const stack = Array.isArray(message.replies) ? [...message.replies] : [];
+    while (stack.length > 0) {
+        const reply = stack.pop();
+        add(reply && reply.text, FIELD_WEIGHTS.reply);
+        add(reply && reply.username, FIELD_WEIGHTS.reply);
+        if (reply && Array.isArray(reply.replies)) {
+            stack.push(...reply.replies);
+        }
+    }
+
+    return terms;
+}
+
+function encodeSearchCursor(hit) {
+    return Buffer.from(JSON.stringify({ s: hit.score, i: hit.id }), 'utf8').toString('base64url');
+}
+
+function decodeSearchCursor(cursor) {
+    try {
+        const parsed = JSON.parse(Buffer.from(String(cursor), 'base64url').toString('utf8'));
+        if (!Number.isFinite(parsed.s) || !Number.isFinite(parsed.i)) {
+            return null;
+        }
+
+        return { score: parsed.s, id: parsed.i };
+    } catch (error) {
+        return null;
+    }
+}
+
+// Higher score first, newer (higher id) first among equals.
+function ranksBefore(a, b) {
+    return a.score > b.score || (a.score === b.score && a.id > b.id);
+}
+
+function createSearchIndex(options) {
+    const { getMessage } = options;
+    const postings = new Map(); // term -> Map(messageId -> weight)
+    let sortedTerms = []; // every term in `postings`, ascending (unless stale)
+    let termsStale = false; // bulk re-indexing skips per-term splices
+    const documents = new Map(); // messageId -> { category, terms }
+    const dirty = new Set();
+    let reindexTimer = null;
+
+    function findTermIndex(term) {
+        let low = 0;
+        let high = sortedTerms.length;
+
+        while (low < high) {
+            const mid = (low + high) >>> 1;
+            if (sortedTerms[mid] < term) {
+                low = mid + 1;
+            } else {
+                high = mid;
+            }
+        }
+
+        return low;
+    }
+
+    function unindex(messageId) {
+        const document = documents.get(messageId);
+        if (!document) {
+            return;
+        }
+
+        document.terms.forEach((weight, term) => {
+            const termPostings = postings.get(term);
+            termPostings.delete(messageId);
+            if (termPostings.size === 0) {
+                postings.delete(term);
+                if (!termsStale) sortedTerms.splice(findTermIndex(term), 1);
+            }
+        });
+        documents.delete(messageId);
+    }
+
+    function index(message) {
+        unindex(message.id);
+
+        const terms = documentTerms(message);
+        terms.forEach((weight, term) => {
+            if (!postings.has(term)) {
+                postings.set(term, new Map());
+                if (!termsStale) sortedTerms.splice(findTermIndex(term), 0, term);
+            }
+            postings.get(term).set(message.id, weight);
+        });
+        documents.set(message.id, { category: message.category, terms });
+    }
+
+    function reindex(messageId) {
+        dirty.delete(messageId);
+        const message = getMessage(messageId);
+        if (message) {
+            index(message);
+        } else {
+            unindex(messageId);
+        }
+    }
+
+    // Large backlogs (startup, full hydration) re-sort the term list once
+    // instead of splicing every new term into it.
+    function beginBulkIfLarge() {
+        if (dirty.size > REINDEX_BATCH_SIZE) {
+            termsStale = true;
+        }
+    }
+
+    function ensureSortedTerms() {
+        if (termsStale) {
+            sortedTerms = [...postings.keys()].sort();
+            termsStale = false;
+        }
+    }
+
+    function reindexBatch() {
+        reindexTimer = null;
+        beginBulkIfLarge();
+        let processed = 0;
+        for (const messageId of dirty) {
+            if (processed >= REINDEX_BATCH_SIZE) break;
+            reindex(messageId);
+            processed += 1;
+        }
+
+        if (dirty.size > 0) {
+            scheduleReindex();
+        } else {
+            ensureSortedTerms();
+        }
+    }
+
+    function scheduleReindex() {
+        if (!reindexTimer) {
+            reindexTimer = setTimeout(reindexBatch, 0);
+            reindexTimer.unref();
+        }
+    }
+
+    // Called for every store change; the message is re-read when indexed.
+    function markDirty(messageId) {
+        dirty.add(messageId);
+        scheduleReindex();
+    }
+
+    function flush() {
+        beginBulkIfLarge();
+        [...dirty].forEach(reindex);
+        ensureSortedTerms();
+    }
+
+    // messageId -> best score for one query token (exact or prefix matches).
+    function scoreToken(token) {
+        const scores = new Map();
+        const addTerm = (term, factor) => {
+            const termPostings = postings.get(term);
+            const idf = Math.log(1 + documents.size / termPostings.size);
+            termPostings.forEach((weight, messageId) => {
+                const score = weight * idf * factor;
+                if (score > (scores.get(messageId) || 0)) {
+                    scores.set(messageId, score);
+                }
+            });
+        };
+
+        if (token.length < MIN_PREFIX_LENGTH) {
+            if (postings.has(token)) addTerm(token, 1);
+            return scores;
+        }
+
+        let position = findTermIndex(token);
+        for (let expanded = 0; position < sortedTerms.length && expanded < MAX_PREFIX_EXPANSIONS; position += 1, expanded += 1) {
+            const term = sortedTerms[position];
+            if (!term.startsWith(token)) break;
+            addTerm(term, term === token ? 1 : PREFIX_MATCH_FACTOR);
+        }
+        return scores;
+    }
+
+    // Ranked page of messages matching every query token. `after` is the
+    // last hit of the previous page (see decodeSearchCursor).
+    function search({ query, category = null, after = null, limit = 20 }) {
+        flush();
+
+        const tokens = [...new Set(tokenize(query))].slice(0, MAX_QUERY_TOKENS);
+        if (tokens.length === 0) {
+            return { ids: [], total: 0, nextCursor: null };
+        }
+
+        // Intersect from the rarest token so later maps are only probed.
+        const perToken = tokens.map(scoreToken).sort((a, b) => a.size - b.size);
+        const hits = [];
+        perToken[0].forEach((score, messageId) => {
+            let total = score;
+            for (let i = 1; i < perToken.length; i += 1) {
+                const tokenScore = perToken[i].get(messageId);
+                if (tokenScore === undefined) return;
+                total += tokenScore;
+            }
+            if (category && documents.get(messageId).category !== category) return;
+            hits.push({ id: messageId, score: Math.round(total * 1e6) / 1e6 });
+        });
+
+        hits.sort((a, b) => (ranksBefore(a, b) ? -1 : 1));
+        const start = after ? hits.findIndex(hit => ranksBefore(after, hit)) : 0;
+        const page = start === -1 ? [] : hits.slice(start, start + limit);
+        const hasMore = start !== -1 && start + limit < hits.length;
+
+        return {
+            ids: page.map(hit => hit.id),
+            total: hits.length,
+            nextCursor: hasMore && page.length > 0 ? encodeSearchCursor(page[page.length - 1]) : null
+        };
+    }
+
+    return {
+        markDirty,
+        search,
+        stats: () => ({ documents: documents.size, terms: postings.size, dirty: dirty.size })
+    };
+}
+
+module.exports = { createSearchIndex, decodeSearchCursor, tokenize };
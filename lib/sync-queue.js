@@ -0,0 +1,159 @@
+// Coalescing write-behind queue for Supabase sync.
+// Routes mark a message dirty and answer straight away; dirty ids are
+// collected over a short window and flushed as one batched upsert built from
+// the latest in-memory state. Failed batches are retried with exponential
+// backoff, so a burst of likes on one post becomes a single round-trip.
+
+function createSyncQueue(options) {
+    const {
+        loadRow,
+        writeRows,
+        flushDelayMs = 50,
+        maxBatchSize = 200,
+        baseRetryDelayMs = 500,
+        maxRetryDelayMs = 30000
+    } = options;
+
+    const dirty = new Map(); // messageId -> epoch ms it first became dirty
+    const inFlight = new Set(); // messageIds in the batch currently being written
+    let flushTimer = null;
+    let flushPromise = null;
+    let consecutiveFailures = 0;
+    const stats = {
+        flushes: 0,
+        rowsWritten: 0,
+        failures: 0,
+        lastFlushAt: null,
+        lastFlushDurationMs: 0,
+        lastError: null
+    };
+
+    function scheduleFlush(delayMs) {
+        if (flushTimer) {
+            return;
+        }
+
+        flushTimer = setTimeout(() => {
+            flushTimer = null;
+            flush().catch(() => {});
+        }, delayMs);
+
+        if (typeof flushTimer.unref === 'function') {
+            flushTimer.unref();
+        }
+    }
+
+    function markDirty(messageId) {
+        if (!dirty.has(messageId)) {
+            dirty.set(messageId, Date.now());
+        }
+
+        if (!flushPromise && consecutiveFailures === 0) {
+            scheduleFlush(flushDelayMs);
+        }
+    }
+
+    function isPending(messageId) {
+        return dirty.has(messageId) || inFlight.has(messageId);
+    }
+
+    function retryDelayMs() {
+        return Math.min(maxRetryDelayMs, baseRetryDelayMs * (2 ** Math.max(0, consecutiveFailures - 1)));
+    }
+
+    async function flushBatch() {
+        const batch = [];
+        for (const [messageId, dirtySince] of dirty) {
+            batch.push([messageId, dirtySince]);
+            if (batch.length >= maxBatchSize) break;
+        }
+
+        // Rows are built at flush time so every batch carries the latest state.
+        batch.forEach(([messageId]) => {
+            dirty.delete(messageId);
+            inFlight.add(messageId);
+        });
+        const rows = batch.map(([messageId]) => loadRow(messageId)).filter(Boolean);
+        if (rows.length === 0) {
+            inFlight.clear();
+            return;
+        }
+
+        const startedAt = Date.now();
+        try {
+            await writeRows(rows);
+            consecutiveFailures = 0;
+            stats.flushes += 1;
+            stats.rowsWritten += rows.length;
+            stats.lastFlushAt = new Date().toISOString();
+            stats.lastFlushDurationMs = Date.now() - startedAt;
+        } catch (error) {
+            // Put the batch back, keeping the oldest dirty time for lag reporting.
+            batch.forEach(([messageId, dirtySince]) => {
+                const redirtiedAt = dirty.get(messageId);
+                dirty.set(messageId, Math.min(dirtySince, redirtiedAt || dirtySince));
+            });
+            consecutiveFailures += 1;
+            stats.failures += 1;
+            stats.lastError = error.message;
+            throw error;
+        } finally {
+            inFlight.clear();
+        }
+    }
+
+    // Write every dirty row now. Resolves once the queue is empty or a batch fails.
+    function flush() {
+        if (flushPromise) {
+            return flushPromise;
+        }
+
+        if (flushTimer) {
+            clearTimeout(flushTimer);
+            flushTimer = null;
+        }
+
+        flushPromise = (async () => {
+            try {
+                while (dirty.size > 0) {
+                    await flushBatch();
+                }
+            } catch (error) {
+                console.error('Supabase batched sync failed:', error.message);
+                scheduleFlush(retryDelayMs());
+                throw error;
+            } finally {
+                flushPromise = null;
+            }
+        })();
+
+        return flushPromise;
+    }
+
+    function getStats() {
+        let oldestDirtyAt = null;
+        dirty.forEach(dirtySince => {
+            if (oldestDirtyAt === null || dirtySince < oldestDirtyAt) {
+                oldestDirtyAt = dirtySince;
+            }
+        });
+
+        return {
+            depth: dirty.size,
+            flushing: Boolean(flushPromise),
+            lagMs: oldestDirtyAt === null ? 0 : Date.now() - oldestDirtyAt,
+            consecutiveFailures,
+            nextRetryInMs: consecutiveFailures > 0 ? retryDelayMs() : 0,
+            ...stats
+        };
+    }
+
+    return {
+        markDirty,
+        isPending,
+        flush,
+        stats: getStats
+    };
+}
+
+module.exports = { createSyncQueue };
@@ -0,0 +1,94 @@
+// Streaming multer storage engine with a global in-flight byte budget.
+// Uploads are hashed and written to a temp file as the bytes arrive, so memory
+// use per upload is a few stream buffers no matter how large the file is.
+// Each upload reserves its declared size (Content-Length, capped at the file
+// size limit) up front; when the budget is spent new uploads fail fast with
+// code UPLOAD_BUDGET_EXCEEDED. The reservation and the temp file are released
+// when the response closes, including when the client aborts mid-upload.
+
+const fs = require('fs');
+const path = require('path');
+const crypto = require('crypto');
+const { pipeline } = require('stream/promises');
+
+function createStreamingUploadStorage(options) {
+    const { tempDir, maxFileBytes, maxInFlightBytes } = options;
+    const stats = { active: 0, reservedBytes: 0, rejected: 0, aborted: 0 };
+
+    function reserve(req) {
+        const declared = Number.parseInt(req.get('content-length'), 10);
+        const bytes = Number.isFinite(declared) && declared > 0 ? Math.min(declared, maxFileBytes) : maxFileBytes;
+        if (stats.reservedBytes + bytes > maxInFlightBytes && stats.active > 0) {
+            return 0;
+        }
+
+        stats.active += 1;
+        stats.reservedBytes += bytes;
+        return bytes;
+    }
+
+    function removeTempFile(filePath) {
+        fs.promises.rm(filePath, { force: true }).catch(error => {
+            console.error('Upload temp cleanup failed:', error.message);
+        });
+    }
+
+    async function writeFile(req, file) {
+        await fs.promises.mkdir(tempDir, { recursive: true });
+        const tempPath = path.join(tempDir, `${process.pid}-${crypto.randomBytes(12).toString('hex')}.upload`);
+        const hash = crypto.createHash('sha256');
+        let size = 0;
+
+        // Reservation and temp file live until the response is done with them.
+        req.res.once('close', () => removeTempFile(tempPath));
+
+        const output = fs.createWriteStream(tempPath);
+        const aborted = () => {
+            if (!req.complete) {
+                stats.aborted += 1;
+                file.stream.destroy(new Error('Upload aborted by client'));
+            }
+        };
+        req.once('close', aborted);
+
+        try {
+            await pipeline(file.stream, async function* (chunks) {
+                for await (const chunk of chunks) {
+                    hash.update(chunk);
+                    size += chunk.length;
+                    yield chunk;
+                }
+            }, output);
+        } finally {
+            req.removeListener('close', aborted);
+        }
+
+        return { path: tempPath, size, hash: hash.digest('hex') };
+    }
+
+    function _handleFile(req, file, cb) {
+        const reserved = reserve(req);
+        if (!reserved) {
+            stats.rejected += 1;
+            const error = new Error('Too many uploads in progress');
+            error.code = 'UPLOAD_BUDGET_EXCEEDED';
+            file.stream.resume();
+            return cb(error);
+        }
+
+        req.res.once('close', () => {
+            stats.active -= 1;
+            stats.reservedBytes -= reserved;
+        });
+
+        writeFile(req, file).then(info => cb(null, info), cb);
+    }
+
+    function _removeFile(req, file, cb) {
+        fs.promises.rm(file.path, { force: true }).then(() => cb(null), cb);
+    }
+
+    return { _handleFile, _removeFile, stats: () => ({ ...stats }) };
+}
+
+module.exports = { createStreamingUploadStorage };
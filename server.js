@@ -1,33 +1,82 @@
 const express = require('express');
 const path = require('path');
-const fs = require('fs');
 const multer = require('multer');
 const crypto = require('crypto');
 const { createClient } = require('@supabase/supabase-js');
-
-// Prometheus metrics
-// const client = require('prom-client');
-// const collectDefaultMetrics = client.collectDefaultMetrics;
-// collectDefaultMetrics();
-
-// Create custom metrics
-/* const httpRequestCount = new client.Counter({
-  name: 'http_requests_total',
-  help: 'Total number of HTTP requests',
-  labelNames: ['method', 'route', 'status'],
-});
-
-const httpRequestDuration = new client.Histogram({
-  name: 'http_request_duration_seconds',
-  help: 'HTTP request duration in seconds',
-  labelNames: ['method', 'route', 'status'],
-  buckets: [0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5],
-}); */
+const { MESSAGE_CATEGORIES, FEED_ORDERS, createMessageStore, decodeFeedCursor, decodeReportsCursor } = require('./lib/message-store');
+const { createIdGenerator } = require('./lib/id-generator');
+const { createSyncQueue } = require('./lib/sync-queue');
+const { createJournalPersistence } = require('./lib/persistence');
+const { createExpiryScheduler } = require('./lib/expiry-scheduler');
+const { createMediaStore } = require('./lib/media-store');
+const { createMediaPool } = require('./lib/media-pool');
+const { createStreamingUploadStorage } = require('./lib/upload-storage');
+const { createRateLimiter, createConcurrencyGate } = require('./lib/admission');
+const { createSearchIndex, decodeSearchCursor } = require('./lib/search-index');
+const { createRealtimeFeed } = require('./lib/realtime');
+const { createMetrics } = require('./lib/metrics');
+const { createResponseCache } = require('./lib/response-cache');
+const {
+    FORWARDED_HEADER,
+    PEER_CHANGES_PATH,
+    readScaleOutConfig,
+    shouldRunClusterPrimary,
+    runClusterPrimary,
+    createPeerRouter
+} = require('./lib/cluster');
+
+// With STICKLY_WORKERS > 1 the primary process only supervises the workers;
+// each worker runs the rest of this file as its own node.
+const scaleOut = readScaleOutConfig();
+if (require.main === module && shouldRunClusterPrimary(scaleOut)) {
+    runClusterPrimary(scaleOut);
+    return;
+}
 
 const app = express();
+// Behind a load balancer, set TRUST_PROXY (hop count or `true`) so req.ip,
+// and with it the write rate limiter, sees the real client address.
+if (process.env.TRUST_PROXY) {
+    const hops = Number.parseInt(process.env.TRUST_PROXY, 10);
+    app.set('trust proxy', Number.isInteger(hops) ? hops : process.env.TRUST_PROXY === 'true' || process.env.TRUST_PROXY);
+}
 const PORT = process.env.PORT || 3000;
-const DATA_DIR = path.join(__dirname, 'data');
-const DATA_FILE = path.join(DATA_DIR, 'stickly-data.json');
+const DATA_DIR = process.env.STICKLY_DATA_DIR || path.join(__dirname, 'data');
+const LEGACY_DATA_FILE = path.join(DATA_DIR, 'stickly-data.json');
+// Nodes sharing a disk keep their own snapshot + journal, seeded from the legacy file.
+const DATA_FILE = scaleOut.enabled ? path.join(DATA_DIR, `stickly-data.node-${scaleOut.nodeId}.json`) : LEGACY_DATA_FILE;
+const JOURNAL_FILE = scaleOut.enabled
+    ? path.join(DATA_DIR, `stickly-journal.node-${scaleOut.nodeId}.ndjson`)
+    : path.join(DATA_DIR, 'stickly-journal.ndjson');
+const MEDIA_DIR = process.env.MEDIA_DIR || path.join(DATA_DIR, 'media');
+const UPLOAD_TMP_DIR = process.env.UPLOAD_TMP_DIR || path.join(DATA_DIR, 'uploads');
+const UPLOAD_MAX_FILE_BYTES = 20 * 1024 * 1024; // 20MB limit
+// Fraction of requests written to the access log (0 disables it)
+const REQUEST_LOG_SAMPLE_RATE = Number.parseFloat(process.env.REQUEST_LOG_SAMPLE_RATE || '0.01');
+
+// Prometheus metrics; gauges and running-total counters are read from live state at scrape time
+const metrics = createMetrics({
+    gauges: {
+        stickly_store_messages: { help: 'Messages held in memory', read: () => messageStore.size },
+        stickly_expiry_scheduled: { help: 'Messages waiting in the expiry heap', read: () => expiryScheduler.size },
+        stickly_sync_queue_depth: { help: 'Messages waiting for the Supabase write-behind flush', read: () => supabaseSyncQueue.stats().depth },
+        stickly_sync_queue_lag_seconds: { help: 'Age of the oldest unsynced change', read: () => supabaseSyncQueue.stats().lagMs / 1000 },
+        stickly_persistence_pending: { help: 'Changed messages not yet journaled', read: () => persistence.stats().pending },
+        stickly_persistence_journal_bytes: { help: 'Journal size since the last compaction', read: () => persistence.stats().journalBytes },
+        stickly_media_pool_busy: { help: 'Uploads being processed on media worker threads', read: () => mediaPool.stats().busy },
+        stickly_media_pool_queued: { help: 'Uploads waiting for a media worker thread', read: () => mediaPool.stats().queued },
+        stickly_uploads_in_progress: { help: 'Uploads currently streaming or being processed', read: () => uploadStorage.stats().active },
+        stickly_upload_reserved_bytes: { help: 'Bytes reserved against the in-flight upload budget', read: () => uploadStorage.stats().reservedBytes },
+        stickly_rate_limiter_keys: { help: 'Client buckets held by the write rate limiter', read: () => writeRateLimiter.stats().keys },
+        stickly_supabase_writes_in_flight: { help: 'Post inserts waiting on Supabase', read: () => supabaseWriteGate.stats().inFlight },
+        stickly_realtime_connections: { help: 'Connected socket.io clients', read: () => (realtimeFeed ? realtimeFeed.stats().connections : 0) }
+    },
+    counters: {
+        stickly_response_cache_hits_total: { help: 'Feed responses served from the serialized cache', read: () => feedResponseCache.stats().hits },
+        stickly_response_cache_misses_total: { help: 'Feed responses serialized because the store changed', read: () => feedResponseCache.stats().misses },
+        stickly_response_cache_uncached_total: { help: 'Feed responses serialized without caching (later pages, arbitrary versions)', read: () => feedResponseCache.stats().uncached }
+    }
+});
 
 const supabaseUrl =
     process.env.SUPABASE_URL ||
@@ -41,84 +90,124 @@ const supabase = (supabaseUrl && supabaseServiceRoleKey)
     : null;
 const supabaseMessagesTable = process.env.SUPABASE_MESSAGES_TABLE || 'stickly_messages';
 const supabaseHydrateCacheMs = Number.parseInt(process.env.SUPABASE_HYDRATE_CACHE_MS || '8000', 10);
+const supabaseHydratePageSize = 1000;
+// Rows are stamped with app-server clocks, so each incremental read overlaps
+// the previous watermark a little to tolerate skew between replicas.
+const supabaseHydrateOverlapMs = Number.parseInt(process.env.SUPABASE_HYDRATE_OVERLAP_MS || '5000', 10);
+const SUPABASE_MESSAGE_COLUMNS =
+    'message_id,text,category,timestamp,image,thumbnail,likes,username,avatar,expires_at,replies,reports,deleted,updated_at';
 const supabaseMissingConfigMessage =
     'Missing Supabase env vars. Set SUPABASE_URL (or NEXT_PUBLIC_SUPABASE_URL / NEXT_PUBLIC_*SUPABASE_URL) and SUPABASE_SERVICE_ROLE_KEY (or SUPABASE_SECRET_KEY).';
+const idGenerator = createIdGenerator(scaleOut.enabled
+    ? { nodeId: scaleOut.nodeId }
+    : { nodeId: process.env.STICKLY_NODE_ID, replicas: Number.parseInt(process.env.STICKLY_REPLICAS || '1', 10) });
+const peerRouter = createPeerRouter(scaleOut); // Owner lookup, request forwarding and change fan-out between nodes
+// messageId -> { seq, receivedAt } of the last copy pushed by its owner; `seq`
+// is the owner's push sequence when it sent the copy, so reordered pushes can
+// be told apart. Removed messages keep their entry briefly as a tombstone.
+const peerCopies = new Map();
+const localChangedAt = new Map(); // messageId -> epoch ms of the last like/reply/report made on this node
+const PEER_TOMBSTONE_MS = 30 * 1000;
 let lastSupabaseHydrationAt = 0;
+let supabaseHydrationWatermarkMs = 0; // Highest updated_at merged so far (epoch ms)
 let hydrateMessagesPromise = null;
 
-function toSupabaseMessageRow(messagePayload, reports = []) {
+function toSupabaseMessageRow(messagePayload, reports = null) {
     return {
         message_id: messagePayload.id,
         text: messagePayload.text || '',
         category: messagePayload.category || 'thoughts',
         timestamp: messagePayload.timestamp || new Date().toISOString(),
         image: messagePayload.image || null,
+        thumbnail: messagePayload.thumbnail || null,
         likes: Number.isFinite(messagePayload.likes) ? messagePayload.likes : 0,
         username: messagePayload.username || 'Anonymous',
         avatar: messagePayload.avatar || '👤',
         expires_at: messagePayload.expiresAt || null,
         replies: Array.isArray(messagePayload.replies) ? messagePayload.replies : [],
-        reports: Array.isArray(reports) ? reports : [],
+        reports: reports || [], // report summary (see lib/report-summary.js)
         deleted: false,
         updated_at: new Date().toISOString()
     };
 }
 
-async function upsertMessageToSupabase(messagePayload, reports = []) {
+async function upsertMessageToSupabase(messagePayload, reports = null) {
     if (!supabase || !messagePayload) {
         return;
     }
 
-    const row = toSupabaseMessageRow(messagePayload, reports);
-    const { error } = await supabase
+    await upsertMessageRowsToSupabase([toSupabaseMessageRow(messagePayload, reports)]);
+}
+
+async function upsertMessageRowsToSupabase(rows) {
+    const { error } = await metrics.timeSupabase('upsert', () => supabase
         .from(supabaseMessagesTable)
-        .upsert(row, { onConflict: 'message_id' });
+        .upsert(rows, { onConflict: 'message_id' }));
 
     if (error) {
         throw new Error(error.message || 'Supabase message sync failed');
     }
 }
 
-async function syncMessageStateToSupabase(messageId) {
+// Likes, replies and reports are synced write-behind: dirty message ids are
+// coalesced and flushed in batches built from the latest in-memory state.
+const supabaseSyncQueue = createSyncQueue({
+    flushDelayMs: Number.parseInt(process.env.SUPABASE_SYNC_FLUSH_MS || '50', 10),
+    loadRow: messageId => {
+        const message = messageStore.get(messageId);
+        return message ? toSupabaseMessageRow(message, messageStore.getReports(messageId)) : null;
+    },
+    writeRows: upsertMessageRowsToSupabase
+});
+
+function queueMessageSync(messageId) {
     if (!supabase) {
         return;
     }
 
-    const message = messages.find(msg => msg.id === messageId);
-    if (!message) {
-        return;
-    }
+    localChangedAt.set(messageId, Date.now());
+    supabaseSyncQueue.markDirty(messageId);
+}
 
-    const reports = Array.isArray(messageReports[messageId]) ? messageReports[messageId] : [];
-    await upsertMessageToSupabase(message, reports);
+// Supabase hands timestamps back as `+00:00`; the store keeps `Z` strings, so
+// normalize before comparing or every hydrated row would look changed.
+function toIsoTimestamp(value) {
+    const parsed = value ? new Date(value) : null;
+    return parsed && Number.isFinite(parsed.getTime()) ? parsed.toISOString() : null;
 }
 
-async function markMessageDeletedInSupabase(messageId) {
-    if (!supabase) {
+// `operation` labels the call in metrics ('expiry_update' or 'soft_delete').
+async function markMessagesDeletedInSupabase(messageIds, operation = 'soft_delete') {
+    if (!supabase || messageIds.length === 0) {
         return;
     }
 
-    const { error } = await supabase
+    const { error } = await metrics.timeSupabase(operation, () => supabase
         .from(supabaseMessagesTable)
         .update({ deleted: true, updated_at: new Date().toISOString() })
-        .eq('message_id', messageId);
+        .in('message_id', messageIds));
 
     if (error) {
         console.error('Supabase delete sync failed:', error.message);
     }
 }
 
+async function markMessageDeletedInSupabase(messageId) {
+    await markMessagesDeletedInSupabase([messageId]);
+}
+
 function normalizeMessageFromSupabase(row) {
     return {
         id: row.message_id,
         text: row.text || '',
         category: row.category || 'thoughts',
-        timestamp: row.timestamp || new Date().toISOString(),
+        timestamp: toIsoTimestamp(row.timestamp) || new Date().toISOString(),
         image: row.image || null,
+        thumbnail: row.thumbnail || null,
         likes: Number.isFinite(row.likes) ? row.likes : 0,
         username: row.username || 'Anonymous',
         avatar: row.avatar || '👤',
-        expiresAt: row.expires_at || null,
+        expiresAt: toIsoTimestamp(row.expires_at),
         replies: normalizeReplyTree(row.replies)
     };
 }
@@ -129,7 +218,7 @@ function normalizeReplyTree(replies) {
     }
 
     return replies.map(reply => ({
-        id: Number.isFinite(reply?.id) ? reply.id : Date.now() + Math.floor(Math.random() * 1000),
+        id: Number.isFinite(reply?.id) ? reply.id : idGenerator.nextId(),
         text: typeof reply?.text === 'string' ? reply.text : '',
         username: reply?.username || 'Anonymous',
         avatar: reply?.avatar || '👤',
@@ -140,72 +229,128 @@ function normalizeReplyTree(replies) {
     }));
 }
 
-function findReplyById(replyList, replyId) {
-    if (!Array.isArray(replyList)) {
-        return null;
+function isRowExpired(row, now = Date.now()) {
+    if (!row.expires_at) {
+        return false;
     }
 
-    for (const reply of replyList) {
-        if (reply.id === replyId) {
-            return reply;
-        }
+    const expiryMs = new Date(row.expires_at).getTime();
+    return !Number.isFinite(expiryMs) || expiryMs <= now;
+}
 
-        const nestedMatch = findReplyById(reply.replies, replyId);
-        if (nestedMatch) {
-            return nestedMatch;
-        }
+// Local state wins over a Supabase row while it has unsynced changes, when it
+// changed here after the row was written (a select can return a snapshot taken
+// before our latest upsert landed), when this node owns the message (the owner
+// is the source of truth), or when the owner pushed a copy newer than the row.
+function hasNewerLocalCopy(row) {
+    if (supabaseSyncQueue.isPending(row.message_id)) {
+        return true;
     }
 
-    return null;
-}
-
-function removeReplyById(replyList, replyId) {
-    if (!Array.isArray(replyList)) {
-        return false;
+    const changedAt = localChangedAt.get(row.message_id);
+    if (changedAt !== undefined && changedAt > new Date(row.updated_at).getTime()) {
+        return true;
     }
 
-    const directIndex = replyList.findIndex(reply => reply.id === replyId);
-    if (directIndex !== -1) {
-        replyList.splice(directIndex, 1);
+    if (peerRouter.enabled && peerRouter.isLocal(row.message_id) && messageStore.has(row.message_id)) {
         return true;
     }
 
-    for (const reply of replyList) {
-        if (removeReplyById(reply.replies, replyId)) {
-            return true;
+    const peerCopy = peerCopies.get(row.message_id);
+    return peerCopy !== undefined && peerCopy.receivedAt >= new Date(row.updated_at).getTime();
+}
+
+// Read rows page by page so hydration is not capped at a fixed row count.
+async function selectMessageRowsFromSupabase(buildQuery) {
+    const rows = [];
+
+    for (let from = 0; ; from += supabaseHydratePageSize) {
+        const { data, error } = await metrics.timeSupabase('hydrate_select', () => buildQuery(
+            supabase.from(supabaseMessagesTable).select(SUPABASE_MESSAGE_COLUMNS)
+        ).range(from, from + supabaseHydratePageSize - 1));
+
+        if (error) {
+            throw new Error(error.message || 'Supabase read failed');
+        }
+
+        rows.push(...(data || []));
+        if (!data || data.length < supabaseHydratePageSize) {
+            return rows;
         }
     }
+}
 
-    return false;
+function advanceHydrationWatermark(rows) {
+    rows.forEach(row => {
+        const updatedAtMs = new Date(row.updated_at).getTime();
+        if (Number.isFinite(updatedAtMs) && updatedAtMs > supabaseHydrationWatermarkMs) {
+            supabaseHydrationWatermarkMs = updatedAtMs;
+        }
+    });
 }
 
-function rebuildLocalIndexesFromMessages(rows) {
-    messageLikes = {};
-    messageReports = {};
+async function hydrateAllMessagesFromSupabase() {
+    const startedAtMs = Date.now();
+    const rows = await selectMessageRowsFromSupabase(query => query
+        .eq('deleted', false)
+        .order('message_id', { ascending: true }));
+
+    const now = Date.now();
+    const activeRows = rows.filter(row => !isRowExpired(row, now));
+    const hydratedReports = {};
+
+    // Messages with unsynced local changes keep their in-memory state.
+    const hydratedMessages = activeRows.map(row => {
+        const localMessage = hasNewerLocalCopy(row) && messageStore.get(row.message_id);
+        if (localMessage) {
+            hydratedReports[row.message_id] = messageStore.getReports(row.message_id);
+            return localMessage;
+        }
 
-    rows.forEach(message => {
-        messageLikes[message.id] = Number.isFinite(message.likes) ? message.likes : 0;
-        if (Array.isArray(message.reports) && message.reports.length > 0) {
-            messageReports[message.id] = message.reports;
+        if (row.reports) {
+            hydratedReports[row.message_id] = row.reports;
         }
+        return normalizeMessageFromSupabase(row);
     });
-}
 
-async function purgeExpiredMessagesInSupabase() {
-    if (!supabase) {
-        return;
+    messageStore.replaceAll(hydratedMessages, hydratedReports);
+    metrics.observeHydration('full', Date.now() - startedAtMs, rows.length);
+    // An empty table still counts as hydrated; later reads only need new rows.
+    advanceHydrationWatermark(rows);
+    if (supabaseHydrationWatermarkMs === 0) {
+        supabaseHydrationWatermarkMs = startedAtMs;
     }
+}
 
-    const nowIso = new Date().toISOString();
-    const { error } = await supabase
-        .from(supabaseMessagesTable)
-        .update({ deleted: true, updated_at: nowIso })
-        .eq('deleted', false)
-        .lte('expires_at', nowIso);
+// Fetch only rows touched since the last watermark (soft-deleted ones
+// included) and merge them into the store.
+async function hydrateChangedMessagesFromSupabase() {
+    const startedAtMs = Date.now();
+    const sinceIso = new Date(supabaseHydrationWatermarkMs - supabaseHydrateOverlapMs).toISOString();
+    const rows = await selectMessageRowsFromSupabase(query => query
+        .gt('updated_at', sinceIso)
+        .order('updated_at', { ascending: true })
+        .order('message_id', { ascending: true }));
 
-    if (error) {
-        console.error('Supabase expiry sync failed:', error.message);
-    }
+    const now = Date.now();
+    rows.forEach(row => {
+        const messageId = row.message_id;
+
+        if (row.deleted || isRowExpired(row, now)) {
+            messageStore.remove(messageId);
+            return;
+        }
+
+        if (hasNewerLocalCopy(row)) {
+            return;
+        }
+
+        messageStore.merge(normalizeMessageFromSupabase(row));
+        messageStore.setReports(messageId, row.reports);
+    });
+
+    advanceHydrationWatermark(rows);
+    metrics.observeHydration('incremental', Date.now() - startedAtMs, rows.length);
 }
 
 async function hydrateMessagesFromSupabase() {
@@ -228,34 +373,18 @@ async function hydrateMessagesFromSupabase() {
     }
 
     hydrateMessagesPromise = (async () => {
-        await purgeExpiredMessagesInSupabase();
-
-        const { data, error } = await supabase
-            .from(supabaseMessagesTable)
-            .select('*')
-            .eq('deleted', false)
-            .order('timestamp', { ascending: false })
-            .limit(500);
-
-        if (error) {
+        try {
+            if (supabaseHydrationWatermarkMs > 0) {
+                await hydrateChangedMessagesFromSupabase();
+            } else {
+                await hydrateAllMessagesFromSupabase();
+            }
+        } catch (error) {
             console.error('Supabase read failed:', error.message);
             return;
         }
 
-        const now = Date.now();
-        const filtered = (data || []).filter(row => {
-            if (!row.expires_at) {
-                return true;
-            }
-
-            const expiryMs = new Date(row.expires_at).getTime();
-            return Number.isFinite(expiryMs) && expiryMs > now;
-        });
-
-        messages = filtered.map(normalizeMessageFromSupabase);
-        rebuildLocalIndexesFromMessages(filtered);
         lastSupabaseHydrationAt = Date.now();
-        savePersistedState();
     })();
 
     try {
@@ -267,11 +396,11 @@ async function hydrateMessagesFromSupabase() {
 
 async function findMessageById(messageId, options = {}) {
     const { hydrateOnMiss = false } = options;
-    let message = messages.find(msg => msg.id === messageId);
+    let message = messageStore.get(messageId);
 
     if (!message && hydrateOnMiss) {
         await hydrateMessagesFromSupabase();
-        message = messages.find(msg => msg.id === messageId);
+        message = messageStore.get(messageId);
     }
 
     return message;
@@ -350,13 +479,38 @@ function isValidAdminSession(sessionId) {
     return verifyAdminToken(sessionId);
 }
 
-// Configure multer for media uploads
-// For Vercel, we need to handle this differently since serverless functions don't have persistent file storage
-const storage = multer.memoryStorage(); // Use memory storage for serverless compatibility
+// Uploaded media is stored once per content hash, on local disk by default or
+// in an S3-compatible bucket when MEDIA_S3_ENDPOINT and MEDIA_S3_BUCKET are set.
+const mediaStore = createMediaStore({
+    rootDir: MEDIA_DIR,
+    s3: {
+        endpoint: process.env.MEDIA_S3_ENDPOINT,
+        bucket: process.env.MEDIA_S3_BUCKET,
+        region: process.env.MEDIA_S3_REGION,
+        prefix: process.env.MEDIA_S3_PREFIX,
+        accessKeyId: process.env.MEDIA_S3_ACCESS_KEY_ID,
+        secretAccessKey: process.env.MEDIA_S3_SECRET_ACCESS_KEY
+    }
+});
+
+// Uploads are sniffed, hashed and thumbnailed on worker threads so a large
+// file never blocks the event loop; excess uploads are refused with a 503.
+const mediaPool = createMediaPool({
+    size: process.env.MEDIA_POOL_SIZE ? Number.parseInt(process.env.MEDIA_POOL_SIZE, 10) : undefined,
+    maxQueue: Number.parseInt(process.env.MEDIA_POOL_MAX_QUEUE || '32', 10)
+});
+
+// Uploads stream to temp files (hashed on the way) instead of RAM. The total
+// size of uploads in progress is capped; beyond it new uploads get a 503.
+const uploadStorage = createStreamingUploadStorage({
+    tempDir: UPLOAD_TMP_DIR,
+    maxFileBytes: UPLOAD_MAX_FILE_BYTES,
+    maxInFlightBytes: Number.parseInt(process.env.UPLOAD_MAX_INFLIGHT_MB || '100', 10) * 1024 * 1024
+});
 
 const upload = multer({
-    storage: storage,
-    limits: { fileSize: 20 * 1024 * 1024 }, // 20MB limit
+    storage: uploadStorage,
+    limits: { fileSize: UPLOAD_MAX_FILE_BYTES, files: 1 },
     fileFilter: (req, file, cb) => {
         const allowedTypes = /jpeg|jpg|gif|png|webp|mp4|webm|ogg|mov|quicktime/;
         const mimetype = allowedTypes.test(file.mimetype);
@@ -369,144 +523,535 @@ const upload = multer({
     }
 });
 
-function loadPersistedState() {
-    try {
-        if (!fs.existsSync(DATA_FILE)) {
-            return { messages: [], messageLikes: {}, messageReports: {} };
+// Run the multer middleware and turn its failures into JSON errors.
+function acceptMediaUpload(req, res, next) {
+    upload.single('mediaFile')(req, res, error => {
+        if (!error) {
+            return next();
         }
-
-        const raw = fs.readFileSync(DATA_FILE, 'utf8');
-        if (!raw.trim()) {
-            return { messages: [], messageLikes: {}, messageReports: {} };
+        if (error.code === 'UPLOAD_BUDGET_EXCEEDED') {
+            res.set('Retry-After', '5');
+            return res.status(503).json({ error: 'Too many uploads in progress. Please try again shortly.' });
         }
+        if (error.code === 'LIMIT_FILE_SIZE') {
+            return res.status(413).json({ error: 'Media files must be 20MB or smaller' });
+        }
+        if (res.destroyed) {
+            return undefined; // client went away mid-upload
+        }
+        return res.status(400).json({ error: error.message || 'Invalid upload' });
+    });
+}
 
-        const parsed = JSON.parse(raw);
-        return {
-            messages: Array.isArray(parsed.messages) ? parsed.messages : [],
-            messageLikes: parsed.messageLikes && typeof parsed.messageLikes === 'object' ? parsed.messageLikes : {},
-            messageReports: parsed.messageReports && typeof parsed.messageReports === 'object' ? parsed.messageReports : {}
-        };
-    } catch (error) {
-        console.error('Failed to load persisted data, starting with empty state:', error.message);
-        return { messages: [], messageLikes: {}, messageReports: {} };
+// Indexed messages, category lists, counts and reports. With several nodes,
+// feed versions are tagged with the node id: they only order this node's changes.
+const messageStore = createMessageStore({ origin: scaleOut.enabled ? scaleOut.nodeId : null });
+let realtimeFeed = null; // socket.io push channel, created once the HTTP server is listening
+const feedResponseCache = createResponseCache(); // Serialized + compressed feed bodies per store version
+// Inverted index for /api/messages/search, kept current from the change feed
+const searchIndex = createSearchIndex({ getMessage: messageId => messageStore.get(messageId) });
+// Like counts are not indexed, so likes do not re-tokenize a message.
+messageStore.subscribe(({ type, messageId, reason }) => {
+    if (type !== 'reports' && reason !== 'likes') {
+        searchIndex.markDirty(messageId);
     }
-}
+});
+
+// Changes are journaled to disk in fsync'd batches and periodically compacted
+// into the snapshot file; startup replays snapshot + journal.
+const persistence = createJournalPersistence({
+    snapshotFile: DATA_FILE,
+    seedSnapshotFile: scaleOut.enabled ? LEGACY_DATA_FILE : null,
+    journalFile: JOURNAL_FILE,
+    store: messageStore,
+    onFlush: durationMs => metrics.observeFlush(durationMs),
+    onSnapshot: bytes => metrics.observeSnapshot(bytes)
+});
 
-let persistWriteTimer = null;
-let persistWriteInProgress = false;
-let persistWriteQueued = false;
+// Expiring messages sit in a min-heap; one timer removes the due ones (those
+// within EXPIRY_COALESCE_MS of each other together) and soft-deletes them in
+// Supabase with a single batched update.
+const expiryScheduler = createExpiryScheduler({
+    coalesceMs: Number.parseInt(process.env.EXPIRY_COALESCE_MS || '250', 10),
+    onExpire: expiredMessageIds => {
+        expiredMessageIds.forEach(messageId => messageStore.remove(messageId));
+        markMessagesDeletedInSupabase(expiredMessageIds.filter(peerRouter.isLocal), 'expiry_update').catch(err => {
+            console.error('Supabase expiry sync failed:', err.message);
+        });
+    }
+});
+
+messageStore.subscribe(({ type, messageId }) => {
+    if (type === 'remove') {
+        expiryScheduler.cancel(messageId);
+        localChangedAt.delete(messageId);
+    } else if (type === 'upsert') {
+        const message = messageStore.get(messageId);
+        expiryScheduler.schedule(messageId, message && message.expiresAt ? new Date(message.expiresAt).getTime() : NaN);
+    }
+});
+
+const stateReady = persistence.load().then(persistedState => {
+    messageStore.replaceAll(
+        persistedState.messages.map(message => {
+            const persistedLikes = persistedState.messageLikes[message.id];
+            return {
+                ...message,
+                likes: Number.isFinite(persistedLikes) ? persistedLikes : (Number.isFinite(message.likes) ? message.likes : 0),
+                replies: normalizeReplyTree(message.replies)
+            };
+        }),
+        persistedState.messageReports
+    );
+    persistence.start();
+    if (peerRouter.enabled) {
+        messageStore.subscribe(collectPeerChange);
+        messageStore.subscribe(({ type, messageId }) => {
+            if (type === 'remove' && !applyingPeerChanges) peerCopies.delete(messageId);
+        });
+    }
+});
+
+// Owners push their messages' changes to the other nodes, coalesced per tick.
+const pendingPeerChanges = new Set();
+let peerFlushScheduled = false;
+let applyingPeerChanges = false; // set while merging pushes, so they are not echoed back
+// Sequence stamped on every push; seeded from the clock so it keeps growing across restarts.
+let peerPushSeq = Date.now() * 1000;
 
-async function flushPersistedStateToDisk() {
-    if (persistWriteInProgress) {
-        persistWriteQueued = true;
+function collectPeerChange({ messageId }) {
+    if (applyingPeerChanges || !peerRouter.isLocal(messageId)) {
         return;
     }
 
-    persistWriteInProgress = true;
+    pendingPeerChanges.add(messageId);
+    if (!peerFlushScheduled) {
+        peerFlushScheduled = true;
+        setImmediate(flushPeerChanges);
+    }
+}
+
+function flushPeerChanges() {
+    peerFlushScheduled = false;
+    const messages = [];
+    const removed = [];
+
+    pendingPeerChanges.forEach(messageId => {
+        const message = messageStore.get(messageId);
+        if (message) {
+            messages.push({ message, reports: messageStore.getReports(messageId) });
+        } else {
+            removed.push(messageId);
+        }
+    });
+    pendingPeerChanges.clear();
+
+    peerPushSeq += 1;
+    peerRouter.publish({ seq: peerPushSeq, messages, removed });
+}
+
+// Pushes travel as concurrent requests, so one can overtake another; a copy
+// older than the one already applied for that message is dropped.
+function isStalePeerCopy(messageId, seq) {
+    const peerCopy = peerCopies.get(messageId);
+    return Number.isFinite(seq) && peerCopy !== undefined && peerCopy.seq >= seq;
+}
 
+function applyPeerChanges({ seq, messages = [], removed = [] }) {
+    const now = Date.now();
+    applyingPeerChanges = true;
     try {
-        do {
-            persistWriteQueued = false;
-            const snapshot = JSON.stringify({ messages, messageLikes, messageReports }, null, 2);
-            await fs.promises.mkdir(DATA_DIR, { recursive: true });
-            await fs.promises.writeFile(DATA_FILE, snapshot, 'utf8');
-        } while (persistWriteQueued);
-    } catch (error) {
-        console.error('Failed to save persisted data:', error.message);
+        messages.forEach(({ message, reports }) => {
+            if (!message || peerRouter.isLocal(message.id) || isStalePeerCopy(message.id, seq)) return;
+            messageStore.merge(message);
+            messageStore.setReports(message.id, reports);
+            peerCopies.set(message.id, { seq, receivedAt: now });
+        });
+        removed.forEach(messageId => {
+            if (peerRouter.isLocal(messageId) || isStalePeerCopy(messageId, seq)) return;
+            messageStore.remove(messageId);
+            // Keep the tombstone until any overtaken push for it has arrived.
+            const tombstone = { seq, receivedAt: now };
+            peerCopies.set(messageId, tombstone);
+            setTimeout(() => {
+                if (peerCopies.get(messageId) === tombstone) peerCopies.delete(messageId);
+            }, PEER_TOMBSTONE_MS).unref();
+        });
     } finally {
-        persistWriteInProgress = false;
+        applyingPeerChanges = false;
     }
 }
 
-function savePersistedState() {
-    if (persistWriteTimer) {
-        clearTimeout(persistWriteTimer);
+// Mutations of a message run on its owner node; other nodes replay the
+// request there and relay the response.
+async function routeToOwner(req, res, next) {
+    const messageId = parseInt(req.params.id);
+    if (!peerRouter.enabled || !Number.isFinite(messageId) || (req.get(FORWARDED_HEADER) && peerRouter.isPeerRequest(req)) || peerRouter.isLocal(messageId)) {
+        return next();
     }
 
-    persistWriteTimer = setTimeout(() => {
-        persistWriteTimer = null;
-        flushPersistedStateToDisk();
-    }, 120);
+    try {
+        const adminSessionId = req.get('x-admin-session-id');
+        const result = await peerRouter.forward(peerRouter.ownerOf(messageId), {
+            method: req.method,
+            path: req.originalUrl,
+            headers: adminSessionId ? { 'x-admin-session-id': adminSessionId } : {},
+            body: req.body
+        });
+        res.status(result.status).type(result.contentType).send(result.body);
+    } catch (error) {
+        console.error(`Forwarding to owner of message ${messageId} failed:`, error.message);
+        res.status(503).json({ error: 'Unable to reach this message right now. Please try again.' });
+    }
 }
 
-const persistedState = loadPersistedState();
-let messages = persistedState.messages.map(message => ({
-    ...message,
-    replies: normalizeReplyTree(message.replies)
-}));
-let messageLikes = persistedState.messageLikes; // Track likes per message: { messageId: count }
-let messageReports = persistedState.messageReports; // Track reports per message: { messageId: [reasons] }
-const AUTO_DELETE_MINUTES = new Set([1, 30, 60, 1440, 10080]);
+// Write admission: per-client token buckets per route class, then load
+// shedding when Supabase is saturated. Reads are never throttled, so abusive
+// writers cannot push up feed latency for everyone else.
+const RATE_LIMIT_ENABLED = process.env.RATE_LIMIT_ENABLED !== 'false';
+const writeRateLimiter = createRateLimiter({
+    classes: {
+        post: { capacity: 5, refillPerSecond: 5 / 60 },
+        reply: { capacity: 20, refillPerSecond: 20 / 60 },
+        like: { capacity: 60, refillPerSecond: 2 },
+        report: { capacity: 10, refillPerSecond: 10 / 60 }
+    },
+    maxKeys: Number.parseInt(process.env.RATE_LIMIT_MAX_CLIENTS || '50000', 10)
+});
+// New posts are written to Supabase before responding; likes, replies and
+// reports go through the write-behind queue and are shed when it backs up.
+const supabaseWriteGate = createConcurrencyGate({
+    maxInFlight: Number.parseInt(process.env.SUPABASE_MAX_INFLIGHT_WRITES || '16', 10)
+});
+const SUPABASE_MAX_SYNC_BACKLOG = Number.parseInt(process.env.SUPABASE_MAX_SYNC_BACKLOG || '5000', 10);
 
-function purgeExpiredMessages() {
-    const now = Date.now();
-    const expiredMessageIds = [];
+// Rate limit keys: the client IP, plus the browser's reply session when sent.
+function clientKeysOf(req) {
+    const keys = [`ip:${req.ip}`];
+    const sessionId = req.body && req.body.authorSessionId;
+    if (typeof sessionId === 'string' && sessionId.length > 0 && sessionId.length <= 128) {
+        keys.push(`session:${sessionId}`);
+    }
+    return keys;
+}
 
-    messages = messages.filter(message => {
-        if (!message.expiresAt) return true;
+function rejectWrite(res, routeClass, reason, status, retryAfterSeconds, error) {
+    metrics.observeWriteRejection(routeClass, reason);
+    res.set('Retry-After', String(retryAfterSeconds));
+    return res.status(status).json({ error });
+}
+
+function rejectBusyPost(res) {
+    return rejectWrite(res, 'post', 'write_concurrency', 503, 1, 'The board is busy right now. Please try again.');
+}
 
-        const expiresAtMs = new Date(message.expiresAt).getTime();
-        const isActive = Number.isFinite(expiresAtMs) && expiresAtMs > now;
-        if (!isActive) {
-            expiredMessageIds.push(message.id);
+function admitWrite(routeClass) {
+    return (req, res, next) => {
+        // Forwarded writes were admitted by the node that received them.
+        if (peerRouter.enabled && peerRouter.isPeerRequest(req)) {
+            return next();
         }
-        return isActive;
-    });
 
-    expiredMessageIds.forEach(messageId => {
-        delete messageLikes[messageId];
-        delete messageReports[messageId];
+        if (RATE_LIMIT_ENABLED) {
+            const limited = writeRateLimiter.take(routeClass, clientKeysOf(req));
+            if (limited) {
+                return rejectWrite(res, routeClass, 'rate_limited', 429, limited.retryAfterSeconds, 'Too many requests. Please slow down.');
+            }
+        }
 
-        markMessageDeletedInSupabase(messageId).catch(err => {
-            console.error('Supabase delete sync failed:', err.message);
-        });
-    });
+        if (!supabase) {
+            return next();
+        }
 
-    if (expiredMessageIds.length > 0) {
-        savePersistedState();
-    }
-}
+        if (routeClass === 'post') {
+            // Shed early while Supabase is saturated; the slot itself is only
+            // taken around the insert, not for the upload before it.
+            const gate = supabaseWriteGate.stats();
+            if (gate.inFlight >= gate.maxInFlight) {
+                return rejectBusyPost(res);
+            }
+        } else if (supabaseSyncQueue.stats().depth >= SUPABASE_MAX_SYNC_BACKLOG) {
+            return rejectWrite(res, routeClass, 'sync_backlog', 503, 2, 'The board is busy right now. Please try again.');
+        }
 
-const purgeInterval = setInterval(purgeExpiredMessages, 30 * 1000);
-if (typeof purgeInterval.unref === 'function') {
-    purgeInterval.unref();
+        return next();
+    };
 }
 
+const AUTO_DELETE_MINUTES = new Set([1, 30, 60, 1440, 10080]);
+
 // Middleware to measure metrics
+app.use(metrics.httpMiddleware);
+
+// Sampled request log, written after the response so it stays off the hot path
 app.use((req, res, next) => {
-  console.log(`${new Date().toISOString()} - ${req.method} ${req.url}`);
-  /* const end = httpRequestDuration.startTimer();
-  res.on('finish', () => {
-    httpRequestCount.labels(req.method, req.path, res.statusCode).inc();
-    end({ method: req.method, route: req.path, status: res.statusCode });
-  }); */
-  next();
+    if (REQUEST_LOG_SAMPLE_RATE <= 0 || Math.random() >= REQUEST_LOG_SAMPLE_RATE) {
+        return next();
+    }
+
+    const startedAt = process.hrtime.bigint();
+    res.on('finish', () => {
+        const durationMs = Number(process.hrtime.bigint() - startedAt) / 1e6;
+        console.log(`${new Date().toISOString()} - ${req.method} ${req.originalUrl} ${res.statusCode} ${durationMs.toFixed(1)}ms`);
+    });
+    next();
 });
 
+// Peer pushes may be large; only parse them once the peer secret checks out.
+app.use(PEER_CHANGES_PATH, (req, res, next) => {
+    if (!peerRouter.isPeerRequest(req)) {
+        return res.status(403).json({ error: 'Forbidden' });
+    }
+    next();
+}, express.json({ limit: '25mb' }));
 app.use(express.json());
 app.use(express.urlencoded({ extended: true }));
 app.use(express.static('public'));
 
+// Hold API requests until the persisted state has been replayed
+app.use((req, res, next) => {
+    stateReady.then(() => next(), next);
+});
+
+// Change pushes from the owner nodes of other messages
+app.post(PEER_CHANGES_PATH, (req, res) => {
+    applyPeerChanges(req.body || {});
+    res.status(204).end();
+});
+
+// Serve uploaded media by content hash (supports Range requests)
+app.get('/media/:key', (req, res) => {
+    mediaStore.serve(req, res, req.params.key);
+});
+
 // Serve the main page
 app.get('/', (req, res) => {
     res.sendFile(path.join(__dirname, 'public', 'index.html'));
 });
 
-// Get all messages or filter by category
+const FEED_PAGE_MAX_LIMIT = 100;
+const FEED_PAGE_CACHED_LIMIT = 50; // the web client's page size
+const RECENT_FEED_VERSIONS = 32;
+const CLOUD_PAGE_DEFAULT_LIMIT = 100;
+const CLOUD_PAGE_MAX_LIMIT = 500;
+
+// Weak ETag over the (node-qualified) store version plus whatever shapes the response body.
+function buildFeedEtag(...parts) {
+    return `W/"${[messageStore.versionTag, ...parts].filter(part => part !== undefined && part !== '').join('-')}"`;
+}
+
+function parsePageLimit(value, maxLimit) {
+    const parsed = Number.parseInt(String(value), 10);
+    if (!Number.isFinite(parsed) || parsed < 1) {
+        return null;
+    }
+
+    return Math.min(parsed, maxLimit);
+}
+
+// Store versions recently handed out in X-Stickly-Version. Only deltas from
+// one of these are cached, so made-up `since` values cannot fill the cache.
+const recentFeedVersions = new Set();
+
+function rememberFeedVersion(version) {
+    recentFeedVersions.delete(version);
+    recentFeedVersions.add(version);
+    if (recentFeedVersions.size > RECENT_FEED_VERSIONS) {
+        recentFeedVersions.delete(recentFeedVersions.values().next().value);
+    }
+}
+
+// Response-cache key for a feed request, or null for shapes clients can vary
+// without bound (later pages, unknown categories, odd limits, arbitrary versions).
+function feedCacheKey({ feedCategory, order, limit, cursor, isDeltaRequest, sinceVersion }) {
+    if ((feedCategory !== 'all' && !MESSAGE_CATEGORIES.includes(feedCategory)) || cursor) {
+        return null;
+    }
+    if (limit !== null && limit !== FEED_PAGE_CACHED_LIMIT) {
+        return null;
+    }
+
+    if (!isDeltaRequest) {
+        return limit !== null ? `page:${feedCategory}:${order}:${limit}` : `list:${feedCategory}:${order}`;
+    }
+
+    // Undiffable versions all get the same full answer.
+    if (Number.isNaN(sinceVersion)) {
+        return `delta:${feedCategory}:${order}:full:${limit || ''}`;
+    }
+
+    return recentFeedVersions.has(sinceVersion) ? `delta:${feedCategory}:${order}:${sinceVersion}:${limit || ''}` : null;
+}
+
+function isEtagFresh(req, etag) {
+    const ifNoneMatch = req.get('if-none-match');
+    if (!ifNoneMatch) {
+        return false;
+    }
+
+    return ifNoneMatch.split(',').some(tag => tag.trim() === etag);
+}
+
+// Get all messages or filter by category.
+// Supports `?since=<version>` to receive only messages added, changed or
+// removed after that version, `?order=trending` for most-liked-first,
+// `?limit=&cursor=` for cursor pagination, and ETag/If-None-Match revalidation.
+// With both `since` and `limit`, a version too old to diff is answered with
+// the first page (`full: true` plus `nextCursor`) instead of the whole board.
 app.get('/api/messages', async (req, res) => {
-    purgeExpiredMessages();
     await hydrateMessagesFromSupabase();
 
-    const { category } = req.query;
-    
-    if (category && category !== 'all') {
-        const filtered = messages.filter(msg => msg.category === category);
-        return res.json(filtered);
+    const { category, since, cursor } = req.query;
+    const hasCategory = category && category !== 'all';
+    const feedCategory = hasCategory ? category : 'all';
+    const order = FEED_ORDERS.includes(req.query.order) ? req.query.order : 'newest';
+    // A version from another node (or a malformed one) is NaN and gets a full answer.
+    const sinceVersion = messageStore.parseVersion(since);
+    const isDeltaRequest = since !== undefined;
+    const limit = req.query.limit === undefined ? null : parsePageLimit(req.query.limit, FEED_PAGE_MAX_LIMIT);
+
+    if (req.query.limit !== undefined && limit === null) {
+        return res.status(400).json({ error: 'limit must be a positive integer' });
     }
-    
-    res.json(messages);
+
+    const after = cursor ? decodeFeedCursor(cursor, order) : null;
+    if (cursor && !after) {
+        return res.status(400).json({ error: 'Invalid cursor' });
+    }
+
+    const etag = limit !== null
+        ? buildFeedEtag(feedCategory, order, limit, cursor, isDeltaRequest ? `s${sinceVersion}` : '')
+        : buildFeedEtag(feedCategory, order === 'newest' ? '' : order, isDeltaRequest ? sinceVersion : '');
+
+    res.set('ETag', etag);
+    res.set('Cache-Control', 'no-cache');
+    res.set('X-Stickly-Version', String(messageStore.versionTag));
+
+    if (isEtagFresh(req, etag) || (isDeltaRequest && sinceVersion === messageStore.version)) {
+        return res.status(304).end();
+    }
+
+    // Identical requests between mutations share one serialized, compressed body.
+    const version = messageStore.version;
+    const versionTag = messageStore.versionTag;
+    const cacheKey = feedCacheKey({ feedCategory, order, limit, cursor, isDeltaRequest, sinceVersion });
+    rememberFeedVersion(version);
+
+    if (limit !== null && !isDeltaRequest) {
+        return feedResponseCache.sendJson(req, res, cacheKey, version, () => {
+            const feedPage = messageStore.page({ category: feedCategory, order, after, limit });
+            return {
+                version: versionTag,
+                order,
+                items: feedPage.items,
+                nextCursor: feedPage.nextCursor
+            };
+        });
+    }
+
+    if (isDeltaRequest) {
+        return feedResponseCache.sendJson(req, res, cacheKey, version, () => {
+            const changes = messageStore.changesSince(sinceVersion);
+
+            if (changes) {
+                return {
+                    version: versionTag,
+                    full: false,
+                    messages: changes.changed
+                        .map(messageId => messageStore.get(messageId))
+                        .filter(message => message && (!hasCategory || message.category === category)),
+                    removed: changes.removed
+                };
+            }
+
+            if (limit !== null) {
+                const feedPage = messageStore.page({ category: feedCategory, order, limit });
+                return {
+                    version: versionTag,
+                    full: true,
+                    messages: feedPage.items,
+                    removed: [],
+                    nextCursor: feedPage.nextCursor
+                };
+            }
+
+            return {
+                version: versionTag,
+                full: true,
+                messages: messageStore.list(feedCategory, order),
+                removed: []
+            };
+        });
+    }
+
+    feedResponseCache.sendJson(req, res, cacheKey, version, () => messageStore.list(feedCategory, order));
 });
 
+const SEARCH_MAX_QUERY_LENGTH = 200;
+
+// Ranked full-text search over message text, replies and usernames. Every
+// query word must match, as a whole word or as a prefix ("hel" finds "hello").
+app.get('/api/messages/search', async (req, res) => {
+    await hydrateMessagesFromSupabase();
+
+    const query = typeof req.query.q === 'string' ? req.query.q.trim() : '';
+    const { category, cursor } = req.query;
+    if (!query) {
+        return res.status(400).json({ error: 'q is required' });
+    }
+    if (query.length > SEARCH_MAX_QUERY_LENGTH) {
+        return res.status(400).json({ error: `q must be at most ${SEARCH_MAX_QUERY_LENGTH} characters` });
+    }
+    if (category && category !== 'all' && !MESSAGE_CATEGORIES.includes(category)) {
+        return res.status(400).json({ error: 'Invalid category' });
+    }
+
+    const limit = req.query.limit === undefined ? 20 : parsePageLimit(req.query.limit, FEED_PAGE_MAX_LIMIT);
+    if (limit === null) {
+        return res.status(400).json({ error: 'limit must be a positive integer' });
+    }
+
+    const after = cursor ? decodeSearchCursor(cursor) : null;
+    if (cursor && !after) {
+        return res.status(400).json({ error: 'Invalid cursor' });
+    }
+
+    const result = searchIndex.search({
+        query,
+        category: category && category !== 'all' ? category : null,
+        after,
+        limit
+    });
+
+    res.set('Cache-Control', 'no-cache');
+    res.json({
+        version: messageStore.versionTag,
+        query,
+        items: result.ids.map(messageId => messageStore.get(messageId)).filter(Boolean),
+        total: result.total,
+        nextCursor: result.nextCursor
+    });
+});
+
+function encodeCloudCursor(row) {
+    return Buffer.from(JSON.stringify({ t: row.timestamp, i: row.message_id }), 'utf8').toString('base64url');
+}
+
+function decodeCloudCursor(cursor) {
+    try {
+        const parsed = JSON.parse(Buffer.from(String(cursor), 'base64url').toString('utf8'));
+        const timestampMs = new Date(parsed.t).getTime();
+        if (!Number.isFinite(timestampMs) || !Number.isFinite(parsed.i)) {
+            return null;
+        }
+
+        return { timestamp: new Date(timestampMs).toISOString(), messageId: parsed.i };
+    } catch (error) {
+        return null;
+    }
+}
+
+// Keyset-paginated read straight from Supabase, newest first.
 app.get('/api/messages/cloud', async (req, res) => {
     if (!supabase) {
         return res.status(500).json({
@@ -515,14 +1060,32 @@ app.get('/api/messages/cloud', async (req, res) => {
         });
     }
 
-    await purgeExpiredMessagesInSupabase();
+    const { category, includeDeleted, cursor } = req.query;
+    const limit = req.query.limit === undefined
+        ? CLOUD_PAGE_DEFAULT_LIMIT
+        : parsePageLimit(req.query.limit, CLOUD_PAGE_MAX_LIMIT);
+
+    if (limit === null) {
+        return res.status(400).json({ ok: false, error: 'limit must be a positive integer' });
+    }
+
+    const after = cursor ? decodeCloudCursor(cursor) : null;
+    if (cursor && !after) {
+        return res.status(400).json({ ok: false, error: 'Invalid cursor' });
+    }
 
-    const { category, includeDeleted } = req.query;
     let query = supabase
         .from(supabaseMessagesTable)
-        .select('*')
+        .select(SUPABASE_MESSAGE_COLUMNS)
         .order('timestamp', { ascending: false })
-        .limit(100);
+        .order('message_id', { ascending: false })
+        .limit(limit);
+
+    if (after) {
+        query = query.or(
+            `timestamp.lt."${after.timestamp}",and(timestamp.eq."${after.timestamp}",message_id.lt.${after.messageId})`
+        );
+    }
 
     if (includeDeleted !== 'true') {
         query = query.eq('deleted', false);
@@ -538,17 +1101,12 @@ app.get('/api/messages/cloud', async (req, res) => {
         return res.status(500).json({ ok: false, error: error.message });
     }
 
+    const rows = data || [];
     const now = Date.now();
-    const activeData = (data || []).filter(row => {
-        if (!row.expires_at) {
-            return true;
-        }
+    const activeData = rows.filter(row => !isRowExpired(row, now));
+    const nextCursor = rows.length === limit ? encodeCloudCursor(rows[rows.length - 1]) : null;
 
-        const expiryMs = new Date(row.expires_at).getTime();
-        return Number.isFinite(expiryMs) && expiryMs > now;
-    });
-
-    return res.json({ ok: true, table: supabaseMessagesTable, count: activeData.length, data: activeData });
+    return res.json({ ok: true, table: supabaseMessagesTable, count: activeData.length, data: activeData, nextCursor });
 });
 
 app.get('/api/supabase-test', async (req, res) => {
@@ -634,12 +1192,9 @@ app.post('/api/admin/migrate-local-to-cloud', async (req, res) => {
         });
     }
 
-    purgeExpiredMessages();
-
-    const migrationRows = messages.map(message => {
-        const reports = Array.isArray(messageReports[message.id]) ? messageReports[message.id] : [];
-        return toSupabaseMessageRow(message, reports);
-    });
+    const migrationRows = messageStore.list().map(message =>
+        toSupabaseMessageRow(message, messageStore.getReports(message.id))
+    );
 
     if (migrationRows.length === 0) {
         return res.json({ ok: true, migrated: 0, skipped: 0, table: supabaseMessagesTable });
@@ -662,8 +1217,7 @@ app.post('/api/admin/migrate-local-to-cloud', async (req, res) => {
 });
 
 // Post a new message with optional media
-app.post('/api/messages', upload.single('mediaFile'), async (req, res) => {
-    purgeExpiredMessages();
+app.post('/api/messages', admitWrite('post'), acceptMediaUpload, async (req, res) => {
     const { message, category, imageUrl, videoUrl, youtubeUrl, username, avatar, autoDeleteMinutes } = req.body;
     
     const hasImageUrl = typeof imageUrl === 'string' && imageUrl.trim().length > 0;
@@ -675,8 +1229,7 @@ app.post('/api/messages', upload.single('mediaFile'), async (req, res) => {
         return res.status(400).json({ error: 'Message or media is required' });
     }
     
-    const validCategories = ['whistleblower', 'controversy', 'thoughts', 'confessions', 'others'];
-    const messageCategory = validCategories.includes(category) ? category : 'thoughts';
+    const messageCategory = MESSAGE_CATEGORIES.includes(category) ? category : 'thoughts';
 
     const parsedMinutes = (autoDeleteMinutes === undefined || autoDeleteMinutes === null || String(autoDeleteMinutes).trim() === '')
         ? 1440
@@ -690,10 +1243,31 @@ app.post('/api/messages', upload.single('mediaFile'), async (req, res) => {
     
     // Handle media - file upload or URLs
     let imageDataUrl = null;
+    let thumbnailUrl = null;
     if (req.file) {
-        // Convert uploaded file buffer to base64 data URL for serverless compatibility
-        const base64 = req.file.buffer.toString('base64');
-        imageDataUrl = `data:${req.file.mimetype};base64,${base64}`;
+        let processed;
+        try {
+            processed = await mediaPool.process(req.file.path);
+        } catch (error) {
+            if (error.code === 'MEDIA_UNSUPPORTED') {
+                return res.status(400).json({ error: 'Only supported image/video files are allowed' });
+            }
+            console.error('Media processing failed:', error.message);
+            return res.status(503).json({ error: 'Media processing is busy right now. Please try again.' });
+        }
+
+        try {
+            // The sniffed type wins over whatever the client declared.
+            const storedMedia = await mediaStore.putFile(req.file.path, processed.mimetype, req.file.originalname, req.file.hash, req.file.size);
+            imageDataUrl = storedMedia.url;
+            if (processed.thumbnail) {
+                const storedThumbnail = await mediaStore.put(processed.thumbnail.buffer, processed.thumbnail.mimetype);
+                thumbnailUrl = storedThumbnail.url;
+            }
+        } catch (error) {
+            console.error('Media store failed:', error.message);
+            return res.status(503).json({ error: 'Unable to store media right now. Please try again.' });
+        }
     } else if (hasYoutubeUrl) {
         imageDataUrl = youtubeUrl.trim();
     } else if (hasVideoUrl) {
@@ -703,11 +1277,12 @@ app.post('/api/messages', upload.single('mediaFile'), async (req, res) => {
     }
     
     const newMessage = {
-        id: Date.now(),
+        id: idGenerator.nextId(),
         text: message ? message.trim() : '',
         category: messageCategory,
         timestamp: new Date().toISOString(),
         image: imageDataUrl,
+        thumbnail: thumbnailUrl,
         likes: 0,
         username: username || 'Anonymous',
         avatar: avatar || '👤',
@@ -715,27 +1290,29 @@ app.post('/api/messages', upload.single('mediaFile'), async (req, res) => {
         replies: []
     };
     
-    messages.unshift(newMessage); // Add to beginning of array
+    const releaseWriteSlot = supabase ? supabaseWriteGate.tryAcquire() : () => {};
+    if (!releaseWriteSlot) {
+        return rejectBusyPost(res);
+    }
+
+    messageStore.upsert(newMessage);
     lastSupabaseHydrationAt = Date.now();
-    savePersistedState();
 
     try {
         await upsertMessageToSupabase(newMessage);
     } catch (error) {
         console.error('Supabase message sync failed:', error.message);
-        messages = messages.filter(msg => msg.id !== newMessage.id);
-        delete messageLikes[newMessage.id];
-        delete messageReports[newMessage.id];
-        savePersistedState();
+        messageStore.remove(newMessage.id);
         return res.status(503).json({ error: 'Unable to save post right now. Please try again.' });
+    } finally {
+        releaseWriteSlot();
     }
 
     res.status(201).json({ success: true, id: newMessage.id, timestamp: newMessage.timestamp });
 });
 
 // Delete a message (admin only)
-app.delete('/api/messages/:id', async (req, res) => {
-    purgeExpiredMessages();
+app.delete('/api/messages/:id', routeToOwner, async (req, res) => {
     await hydrateMessagesFromSupabase();
 
     const sessionId =
@@ -749,76 +1326,58 @@ app.delete('/api/messages/:id', async (req, res) => {
     }
     
     const messageId = parseInt(req.params.id);
-    const index = messages.findIndex(msg => msg.id === messageId);
-    
-    if (index === -1) {
+    // Removing from the store also drops the message's likes and reports
+    if (!messageStore.remove(messageId)) {
         return res.status(404).json({ error: 'Message not found' });
     }
-    
-    messages.splice(index, 1);
 
     await markMessageDeletedInSupabase(messageId);
 
-    // Clean up likes and reports
-    delete messageLikes[messageId];
-    delete messageReports[messageId];
-    savePersistedState();
     res.status(200).json({ success: true });
 });
 
 // Like a message
-app.post('/api/messages/:id/like', async (req, res) => {
-    purgeExpiredMessages();
+app.post('/api/messages/:id/like', admitWrite('like'), routeToOwner, async (req, res) => {
     await hydrateMessagesFromSupabase();
 
     const messageId = parseInt(req.params.id);
-    const message = messages.find(msg => msg.id === messageId);
+    const message = messageStore.get(messageId);
     
     if (!message) {
         return res.status(404).json({ error: 'Message not found' });
     }
     
-    // Initialize likes count if not exists
-    if (!messageLikes[messageId]) {
-        messageLikes[messageId] = 0;
-    }
-    
-    messageLikes[messageId]++;
-    message.likes = messageLikes[messageId];
-    savePersistedState();
+    message.likes = (Number.isFinite(message.likes) ? message.likes : 0) + 1;
+    messageStore.touch(messageId, 'likes');
 
-    await syncMessageStateToSupabase(messageId);
+    queueMessageSync(messageId);
     
-    res.json({ likes: messageLikes[messageId] });
+    res.json({ likes: message.likes });
 });
 
 // Unlike a message
-app.post('/api/messages/:id/unlike', async (req, res) => {
-    purgeExpiredMessages();
+app.post('/api/messages/:id/unlike', admitWrite('like'), routeToOwner, async (req, res) => {
     await hydrateMessagesFromSupabase();
 
     const messageId = parseInt(req.params.id);
-    const message = messages.find(msg => msg.id === messageId);
+    const message = messageStore.get(messageId);
     
     if (!message) {
         return res.status(404).json({ error: 'Message not found' });
     }
     
-    if (messageLikes[messageId] && messageLikes[messageId] > 0) {
-        messageLikes[messageId]--;
-        message.likes = messageLikes[messageId];
-        savePersistedState();
+    if (Number.isFinite(message.likes) && message.likes > 0) {
+        message.likes -= 1;
+        messageStore.touch(messageId, 'likes');
 
-        await syncMessageStateToSupabase(messageId);
+        queueMessageSync(messageId);
     }
     
-    res.json({ likes: messageLikes[messageId] || 0 });
+    res.json({ likes: message.likes || 0 });
 });
 
 // Reply to a message
-app.post('/api/messages/:id/reply', async (req, res) => {
-    purgeExpiredMessages();
-
+app.post('/api/messages/:id/reply', admitWrite('reply'), routeToOwner, async (req, res) => {
     const messageId = parseInt(req.params.id);
     const { text, username, avatar, authorSessionId } = req.body;
     const message = await findMessageById(messageId, { hydrateOnMiss: true });
@@ -831,12 +1390,8 @@ app.post('/api/messages/:id/reply', async (req, res) => {
         return res.status(400).json({ error: 'Reply text is required' });
     }
 
-    if (!message.replies) {
-        message.replies = [];
-    }
-
     const reply = {
-        id: Date.now(),
+        id: idGenerator.nextId(),
         text: text.trim(),
         username: username || 'Anonymous',
         avatar: avatar || '👤',
@@ -846,30 +1401,26 @@ app.post('/api/messages/:id/reply', async (req, res) => {
         replies: []
     };
 
-    message.replies.push(reply);
-    savePersistedState();
+    messageStore.addReply(messageId, reply);
 
-    syncMessageStateToSupabase(messageId).catch(error => {
-        console.error('Supabase reply sync failed:', error.message);
-    });
+    queueMessageSync(messageId);
 
     res.status(201).json(reply);
 });
 
 // Like a comment/reply
-app.post('/api/messages/:id/replies/:replyId/like', async (req, res) => {
-    purgeExpiredMessages();
+app.post('/api/messages/:id/replies/:replyId/like', admitWrite('like'), routeToOwner, async (req, res) => {
     await hydrateMessagesFromSupabase();
 
     const messageId = parseInt(req.params.id);
     const replyId = parseInt(req.params.replyId);
-    const message = messages.find(msg => msg.id === messageId);
+    const message = messageStore.get(messageId);
 
     if (!message) {
         return res.status(404).json({ error: 'Message not found' });
     }
 
-    const reply = findReplyById(message.replies, replyId);
+    const reply = messageStore.findReply(messageId, replyId);
     if (!reply) {
         return res.status(404).json({ error: 'Comment not found' });
     }
@@ -879,27 +1430,26 @@ app.post('/api/messages/:id/replies/:replyId/like', async (req, res) => {
     }
 
     reply.likes += 1;
-    savePersistedState();
+    messageStore.touch(messageId, 'likes', replyId);
 
-    await syncMessageStateToSupabase(messageId);
+    queueMessageSync(messageId);
 
     res.json({ likes: reply.likes });
 });
 
 // Unlike a comment/reply
-app.post('/api/messages/:id/replies/:replyId/unlike', async (req, res) => {
-    purgeExpiredMessages();
+app.post('/api/messages/:id/replies/:replyId/unlike', admitWrite('like'), routeToOwner, async (req, res) => {
     await hydrateMessagesFromSupabase();
 
     const messageId = parseInt(req.params.id);
     const replyId = parseInt(req.params.replyId);
-    const message = messages.find(msg => msg.id === messageId);
+    const message = messageStore.get(messageId);
 
     if (!message) {
         return res.status(404).json({ error: 'Message not found' });
     }
 
-    const reply = findReplyById(message.replies, replyId);
+    const reply = messageStore.findReply(messageId, replyId);
     if (!reply) {
         return res.status(404).json({ error: 'Comment not found' });
     }
@@ -910,19 +1460,16 @@ app.post('/api/messages/:id/replies/:replyId/unlike', async (req, res) => {
 
     if (reply.likes > 0) {
         reply.likes -= 1;
+        messageStore.touch(messageId, 'likes', replyId);
     }
 
-    savePersistedState();
-
-    await syncMessageStateToSupabase(messageId);
+    queueMessageSync(messageId);
 
     res.json({ likes: reply.likes });
 });
 
 // Reply to an existing comment/reply
-app.post('/api/messages/:id/replies/:replyId/reply', async (req, res) => {
-    purgeExpiredMessages();
-
+app.post('/api/messages/:id/replies/:replyId/reply', admitWrite('reply'), routeToOwner, async (req, res) => {
     const messageId = parseInt(req.params.id);
     const replyId = parseInt(req.params.replyId);
     const { text, username, avatar, authorSessionId } = req.body;
@@ -936,17 +1483,12 @@ app.post('/api/messages/:id/replies/:replyId/reply', async (req, res) => {
         return res.status(400).json({ error: 'Reply text is required' });
     }
 
-    const parentReply = findReplyById(message.replies, replyId);
-    if (!parentReply) {
+    if (!messageStore.findReply(messageId, replyId)) {
         return res.status(404).json({ error: 'Comment not found' });
     }
 
-    if (!Array.isArray(parentReply.replies)) {
-        parentReply.replies = [];
-    }
-
     const nestedReply = {
-        id: Date.now(),
+        id: idGenerator.nextId(),
         text: text.trim(),
         username: username || 'Anonymous',
         avatar: avatar || '👤',
@@ -956,18 +1498,14 @@ app.post('/api/messages/:id/replies/:replyId/reply', async (req, res) => {
         replies: []
     };
 
-    parentReply.replies.push(nestedReply);
-    savePersistedState();
+    messageStore.addReply(messageId, nestedReply, replyId);
 
-    syncMessageStateToSupabase(messageId).catch(error => {
-        console.error('Supabase nested reply sync failed:', error.message);
-    });
+    queueMessageSync(messageId);
 
     res.status(201).json(nestedReply);
 });
 
-app.delete('/api/messages/:id/replies/:replyId', async (req, res) => {
-    purgeExpiredMessages();
+app.delete('/api/messages/:id/replies/:replyId', routeToOwner, async (req, res) => {
     await hydrateMessagesFromSupabase();
 
     const messageId = Number.parseInt(req.params.id, 10);
@@ -977,13 +1515,13 @@ app.delete('/api/messages/:id/replies/:replyId', async (req, res) => {
         req.body?.sessionId ||
         req.get('x-admin-session-id') ||
         req.query?.sessionId;
-    const message = messages.find(msg => msg.id === messageId);
+    const message = messageStore.get(messageId);
 
     if (!message) {
         return res.status(404).json({ error: 'Message not found' });
     }
 
-    const targetReply = findReplyById(message.replies, replyId);
+    const targetReply = messageStore.findReply(messageId, replyId);
     if (!targetReply) {
         return res.status(404).json({ error: 'Comment not found' });
     }
@@ -997,92 +1535,95 @@ app.delete('/api/messages/:id/replies/:replyId', async (req, res) => {
         return res.status(403).json({ error: 'You can only delete your own comment.' });
     }
 
-    const removed = removeReplyById(message.replies, replyId);
-    if (!removed) {
+    if (!messageStore.removeReply(messageId, replyId)) {
         return res.status(404).json({ error: 'Comment not found' });
     }
 
-    savePersistedState();
-    await syncMessageStateToSupabase(messageId);
+    queueMessageSync(messageId);
 
     return res.json({ success: true });
 });
 
 // Report a message
-app.post('/api/messages/:id/report', async (req, res) => {
-    purgeExpiredMessages();
+app.post('/api/messages/:id/report', admitWrite('report'), routeToOwner, async (req, res) => {
     await hydrateMessagesFromSupabase();
 
     const messageId = parseInt(req.params.id);
     const { reason } = req.body;
-    const message = messages.find(msg => msg.id === messageId);
+    const message = messageStore.get(messageId);
     
     if (!message) {
         return res.status(404).json({ error: 'Message not found' });
     }
     
-    if (!messageReports[messageId]) {
-        messageReports[messageId] = [];
-    }
-    
-    messageReports[messageId].push({
+    const reportCount = messageStore.addReport(messageId, {
         reason: reason || 'No reason provided',
         timestamp: new Date().toISOString()
     });
 
-    savePersistedState();
-
-    await syncMessageStateToSupabase(messageId);
+    queueMessageSync(messageId);
     
-    res.json({ success: true, reportCount: messageReports[messageId].length });
+    res.json({ success: true, reportCount });
 });
 
-// Get reported messages (admin only)
+// Page through reported messages, most reported first (admin only).
+// Each item carries its report summary: per-reason counts plus recent reports.
 app.post('/api/admin/reports', async (req, res) => {
-    purgeExpiredMessages();
     await hydrateMessagesFromSupabase();
 
-    const { sessionId } = req.body;
+    const { sessionId, cursor } = req.body;
     
     if (!isValidAdminSession(sessionId)) {
         return res.status(403).json({ error: 'Unauthorized' });
     }
+
+    const limit = req.body.limit === undefined ? 20 : Number.parseInt(req.body.limit, 10);
+    if (!Number.isInteger(limit) || limit < 1 || limit > 100) {
+        return res.status(400).json({ error: 'limit must be between 1 and 100' });
+    }
+
+    const after = cursor ? decodeReportsCursor(cursor) : null;
+    if (cursor && !after) {
+        return res.status(400).json({ error: 'Invalid cursor' });
+    }
     
-    const reportedMessages = Object.keys(messageReports)
-        .map(msgId => {
-            const message = messages.find(m => m.id === parseInt(msgId));
-            return message ? {
-                ...message,
-                reports: messageReports[msgId]
-            } : null;
-        })
-        .filter(m => m !== null);
-    
-    res.json(reportedMessages);
+    res.json(messageStore.reportsPage({ after, limit }));
 });
 
 // Get message counts by category
 app.get('/api/messages/counts', async (req, res) => {
-    purgeExpiredMessages();
     await hydrateMessagesFromSupabase();
 
-    const counts = {
-        all: messages.length,
-        whistleblower: messages.filter(m => m.category === 'whistleblower').length,
-        controversy: messages.filter(m => m.category === 'controversy').length,
-        thoughts: messages.filter(m => m.category === 'thoughts').length,
-        confessions: messages.filter(m => m.category === 'confessions').length,
-        others: messages.filter(m => m.category === 'others').length
-    };
-    res.json(counts);
+    feedResponseCache.sendJson(req, res, 'counts', messageStore.version, () => messageStore.counts());
+});
+
+// Write-behind Supabase sync queue depth and lag
+app.get('/api/sync/status', (req, res) => {
+    res.json({ enabled: Boolean(supabase), ...supabaseSyncQueue.stats() });
+});
+
+// Which node answered and how the deployment is split into nodes
+app.get('/api/cluster/status', (req, res) => {
+    res.json({
+        enabled: peerRouter.enabled,
+        nodeId: peerRouter.nodeId,
+        totalNodes: scaleOut.totalNodes,
+        workers: scaleOut.workers,
+        pods: scaleOut.pods,
+        podIndex: scaleOut.podIndex
+    });
+});
+
+// Socket.io push channel status (null when running without a long-lived server)
+app.get('/api/realtime/status', (req, res) => {
+    res.json(realtimeFeed ? { enabled: true, ...realtimeFeed.stats() } : { enabled: false });
 });
 
 // Prometheus metrics endpoint
 app.get('/metrics', async (req, res) => {
     try {
-        // res.set('Content-Type', client.register.contentType);
-        // res.end(await client.register.metrics());
-        res.status(501).send('Metrics disabled'); 
+        res.set('Content-Type', metrics.register.contentType);
+        res.end(await metrics.register.metrics());
     } catch (err) {
         res.status(500).send(err.message);
     }
@@ -1097,11 +1638,38 @@ if (require.main === module) {
         console.log(`Server is running on http://localhost:${PORT}`);
     });
 
+    // Peer traffic (forwarded writes, change pushes) reaches each node on its own port
+    if (peerRouter.enabled) {
+        const peerPort = scaleOut.peerPortBase + scaleOut.workerIndex;
+        app.listen(peerPort, scaleOut.pods > 1 ? '0.0.0.0' : '127.0.0.1', () => {
+            console.log(`Node ${peerRouter.nodeId} accepting peer traffic on port ${peerPort}`);
+        });
+    }
+
+    // Push feed deltas over socket.io; clients fall back to polling without it
+    const { Server: SocketServer } = require('socket.io');
+    const io = new SocketServer(server);
+    realtimeFeed = createRealtimeFeed({
+        io,
+        store: messageStore,
+        categories: MESSAGE_CATEGORIES,
+        ready: stateReady
+    });
+
     // Handle server errors
     server.on('error', (err) => {
         console.error('Server error:', err);
     });
 
+    // Flush pending Supabase and journal writes before the container stops
+    process.on('SIGTERM', () => {
+        server.close();
+        Promise.all([
+            supabaseSyncQueue.flush().catch(error => console.error('Final Supabase sync failed:', error.message)),
+            persistence.flush()
+        ]).finally(() => process.exit(0));
+    });
+
     // Handle unhandled promise rejections
     process.on('unhandledRejection', (reason, promise) => {
         console.error('Unhandled Rejection at:', promise, 'reason:', reason);
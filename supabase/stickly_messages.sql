@@ -4,6 +4,7 @@ create table if not exists public.stickly_messages (
   category text not null default 'thoughts',
   timestamp timestamptz not null default now(),
   image text,
+  thumbnail text,
   likes integer not null default 0,
   username text not null default 'Anonymous',
   avatar text not null default '👤',
@@ -14,12 +15,19 @@ create table if not exists public.stickly_messages (
   updated_at timestamptz not null default now()
 );
 
+-- Downscaled preview of uploaded images (added after the initial schema).
+alter table public.stickly_messages add column if not exists thumbnail text;
+
 create index if not exists idx_stickly_messages_timestamp
   on public.stickly_messages (timestamp desc);
 
 create index if not exists idx_stickly_messages_deleted
   on public.stickly_messages (deleted);
 
+-- Incremental hydration reads `updated_at > watermark order by updated_at`.
+create index if not exists idx_stickly_messages_updated_at
+  on public.stickly_messages (updated_at);
+
 alter table public.stickly_messages enable row level security;
 
 drop policy if exists "Public can read active stickly messages" on public.stickly_messages;